@@ -1,8 +1,11 @@
-from typing import List
+from typing import Any, Dict, List, Optional
 
 from window_store import TelematicsWindowManager
-from data_analysis import run_data_analysis_streaming
-from models import TelematicsEvent, MaintenanceRecord, HealthSummary
+from health_memo import HealthMemo
+from data_analysis import run_data_analysis_streaming, run_data_analysis_from_buffer
+from telematics_buffer import TelematicsRingBuffer
+from maintenance_index import MaintenanceHistory
+from models import TelematicsEvent, HealthSummary
 
 
 class DataAnalysisAgent:
@@ -11,17 +14,75 @@ class DataAnalysisAgent:
     outputs rolling HealthSummary per vehicle.
     """
 
-    def __init__(self, window_days: int = 7):
-        self.window_manager = TelematicsWindowManager(max_days=window_days)
+    def __init__(
+        self,
+        window_days: int = 7,
+        change_epsilon: Optional[float] = 0.01,
+        window_events: Optional[int] = None,
+    ):
+        # window_events caps each vehicle's window (and its memory) at
+        # that many of the newest events
+        self.window_manager = TelematicsWindowManager(
+            max_days=window_days, max_events=window_events
+        )
+        # None disables change detection (every call rescores)
+        self.memo = HealthMemo(epsilon=change_epsilon) if change_epsilon is not None else None
 
     def handle_event(
         self,
         event: TelematicsEvent,
-        maintenance_history: List[MaintenanceRecord],
+        maintenance_history: MaintenanceHistory,
     ) -> HealthSummary:
         summary = run_data_analysis_streaming(
             event=event,
             maintenance_history=maintenance_history,
             window_manager=self.window_manager,
+            memo=self.memo,
         )
         return summary
+
+    def handle_events(
+        self,
+        events: List[TelematicsEvent],
+        maintenance_history: MaintenanceHistory,
+    ) -> Optional[HealthSummary]:
+        """
+        Feed a batch of new events for one vehicle and score only the
+        state after the last one. Returns None if there is nothing new.
+        """
+        if not events:
+            return None
+        for ev in events[:-1]:
+            self.window_manager.add_event(ev)
+        return self.handle_event(events[-1], maintenance_history)
+
+    def handle_buffer(
+        self,
+        buffer: TelematicsRingBuffer,
+        since_seq: int,
+        maintenance_history: MaintenanceHistory,
+    ) -> Optional[HealthSummary]:
+        """Columnar variant of handle_events for rows with seq >= since_seq."""
+        return run_data_analysis_from_buffer(
+            buffer=buffer,
+            since_seq=since_seq,
+            maintenance_history=maintenance_history,
+            window_manager=self.window_manager,
+            memo=self.memo,
+        )
+
+    def detach(self, vehicle_id: str) -> Dict[str, Any]:
+        """
+        Remove and return the vehicle's window store and memo entry; the
+        next batch for it then starts afresh unless attach() puts them back.
+        """
+        return {
+            "window": self.window_manager.pop(vehicle_id),
+            "memo": self.memo.pop(vehicle_id) if self.memo is not None else None,
+        }
+
+    def attach(self, vehicle_id: str, detached: Dict[str, Any]) -> None:
+        if detached["window"] is not None:
+            self.window_manager.put(vehicle_id, detached["window"])
+        if detached["memo"] is not None and self.memo is not None:
+            self.memo.restore(vehicle_id, detached["memo"])
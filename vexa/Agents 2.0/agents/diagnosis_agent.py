@@ -5,6 +5,8 @@ from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
 
 from models import HealthSummary
+from diagnosis_cache import DiagnosisCache, diagnosis_key
+from single_flight import LLM_REQUESTS, prompt_key
 from crewai_agents import health_summary_to_text, dtc_context_text
 
 load_dotenv()
@@ -14,23 +16,50 @@ class DiagnosisAgentLLM:
     """
     LLM agent that reasons about component risk + DTC context
     and produces an internal diagnostic report.
+
+    Reports are cached per (quantized summary, DTCs); pass use_cache=False
+    to call the LLM every time.
     """
 
-    def __init__(self, model_name: Optional[str] = None):
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        cache: Optional[DiagnosisCache] = None,
+        use_cache: bool = True,
+    ):
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise RuntimeError("OPENAI_API_KEY not set in .env")
 
+        self.model_name = model_name or os.getenv("OPENAI_MODEL", "gpt-4o-mini")
         self.llm = ChatOpenAI(
-            model=model_name or os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+            model=self.model_name,
             temperature=0.2,
         )
+        self.cache = (cache or DiagnosisCache()) if use_cache else None
 
     def run(self, summary: HealthSummary, dtc_codes: List[str]) -> str:
+        if self.cache is None:
+            # Concurrent identical prompts share one LLM request
+            prompt = self._prompt(summary, dtc_codes)
+            key = prompt_key("diagnosis", self.model_name, prompt)
+            return LLM_REQUESTS.do(key, lambda: self._ask(prompt))
+
+        # Concurrent misses on the same cache key share one lookup + LLM
+        # request (the prompt itself differs by timestamp and exact eta_km)
+        key = diagnosis_key(summary, dtc_codes, self.model_name)
+        return LLM_REQUESTS.do(
+            f"diagnosis-cache:{key}",
+            lambda: self.cache.get_or_compute(
+                key, lambda: self._ask(self._prompt(summary, dtc_codes))
+            ),
+        )
+
+    def _prompt(self, summary: HealthSummary, dtc_codes: List[str]) -> str:
         health_text = health_summary_to_text(summary)
         dtc_text = dtc_context_text(dtc_codes)
 
-        prompt = f"""
+        return f"""
 You are an automotive diagnostics expert.
 
 [HEALTH SUMMARY]
@@ -46,5 +75,6 @@ TASK:
 
 Return a short report.
 """
-        response = self.llm.invoke(prompt)
-        return response.content
+
+    def _ask(self, prompt: str) -> str:
+        return self.llm.invoke(prompt).content
@@ -2,7 +2,12 @@
 
 from typing import List, Dict, Any, Optional
 from datetime import datetime
+
+import numpy as np
+
 from models import TelematicsEvent
+from telematics_buffer import TelematicsRingBuffer
+from timestamps import datetime_to_epoch_us, iso_to_epoch_us
 
 
 class DriverBehaviorCoachAgent:
@@ -17,8 +22,8 @@ class DriverBehaviorCoachAgent:
     - high-speed incidents
     - excessive idling time
 
-    It accepts a list of TelematicsEvent (Pydantic) or dicts with
-    equivalent keys.
+    It accepts a list of TelematicsEvent (Pydantic), dicts with
+    equivalent keys, or a columnar TelematicsRingBuffer.
     """
 
     def __init__(self) -> None:
@@ -46,41 +51,51 @@ class DriverBehaviorCoachAgent:
 
         return data
 
+    @staticmethod
+    def _timestamp_us(ts_raw: Any) -> Optional[int]:
+        """Epoch microseconds of a datetime / ISO string, None if unparseable."""
+        if isinstance(ts_raw, datetime):
+            return datetime_to_epoch_us(ts_raw)[0]
+        if isinstance(ts_raw, str):
+            try:
+                return iso_to_epoch_us(ts_raw)[0]
+            except Exception:
+                # If timestamp cannot be parsed, skip idle calculations
+                return None
+        return None
+
     # ------------------------------------------------------------------
     # Core behaviour analysis
     # ------------------------------------------------------------------
     def analyze_events(self, events: List[Any]) -> Dict[str, float]:
+        if isinstance(events, TelematicsRingBuffer):
+            return self._analyze_buffer(events)
+
         harsh_brakes = 0
         rapid_acc = 0
         high_speed_incidents = 0
         total_idle_time_sec = 0.0
 
-        idle_start: Optional[datetime] = None
+        idle_start: Optional[int] = None
 
         # We assume events are in chronological order. If not, we can
         # sort them by timestamp.
         for ev in events:
-            data = self._event_to_dict(ev)
-            if not data:
-                continue
-
-            # --- Extract fields using your actual TelematicsEvent model ---
-            speed = float(data.get("speed_kmph", 0.0))
-            brake_pressure = float(data.get("brake_pedal_pressure", 0.0))
-            accel_long = float(data.get("accel_longitudinal", 0.0))
-            ts_raw = data.get("timestamp")
-
-            # Parse timestamp
-            if isinstance(ts_raw, datetime):
-                ts = ts_raw
-            elif isinstance(ts_raw, str):
-                try:
-                    ts = datetime.fromisoformat(ts_raw)
-                except Exception:
-                    # If timestamp cannot be parsed, skip idle calculations
-                    ts = None
+            if isinstance(ev, TelematicsEvent):
+                # Typed event: read attributes directly, timestamp is parsed once per event
+                speed = ev.speed_kmph
+                brake_pressure = ev.brake_pedal_pressure
+                accel_long = ev.accel_longitudinal
+                ts = ev.ts_epoch_us
             else:
-                ts = None
+                data = self._event_to_dict(ev)
+                if not data:
+                    continue
+
+                speed = float(data.get("speed_kmph", 0.0))
+                brake_pressure = float(data.get("brake_pedal_pressure", 0.0))
+                accel_long = float(data.get("accel_longitudinal", 0.0))
+                ts = self._timestamp_us(data.get("timestamp"))
 
             # --- Harsh braking detection ---
             if brake_pressure >= self.BRAKE_PRESSURE_THRESHOLD:
@@ -103,7 +118,7 @@ class DriverBehaviorCoachAgent:
                 else:
                     # Vehicle moving now, end of any idle period
                     if idle_start is not None:
-                        idle_duration = (ts - idle_start).total_seconds()
+                        idle_duration = (ts - idle_start) / 1e6
                         if idle_duration >= self.IDLE_MIN_DURATION_SEC:
                             total_idle_time_sec += idle_duration
                         idle_start = None
@@ -118,6 +133,30 @@ class DriverBehaviorCoachAgent:
             "excessive_idle_seconds": total_idle_time_sec,
         }
 
+    def _analyze_buffer(self, buffer: TelematicsRingBuffer) -> Dict[str, float]:
+        """Same metrics as analyze_events, computed on the buffer columns."""
+        speed = buffer.column("speed_kmph")
+        ts_us = buffer.column("ts_us")
+
+        # Idle periods: runs of stopped rows, closed by the next moving row
+        idle = (speed <= self.IDLE_SPEED_THRESHOLD).astype(np.int8)
+        edges = np.diff(idle, prepend=0)
+        run_starts = np.flatnonzero(edges == 1)
+        run_ends = np.flatnonzero(edges == -1)
+        durations = (ts_us[run_ends] - ts_us[run_starts[: len(run_ends)]]) / 1e6
+        total_idle_time_sec = float(durations[durations >= self.IDLE_MIN_DURATION_SEC].sum())
+
+        return {
+            "harsh_braking_count": int(
+                np.count_nonzero(buffer.column("brake_pedal_pressure") >= self.BRAKE_PRESSURE_THRESHOLD)
+            ),
+            "rapid_accel_count": int(
+                np.count_nonzero(buffer.column("accel_longitudinal") >= self.ACCEL_THRESHOLD)
+            ),
+            "high_speed_incidents": int(np.count_nonzero(speed >= self.SPEED_THRESHOLD)),
+            "excessive_idle_seconds": total_idle_time_sec,
+        }
+
     # ------------------------------------------------------------------
     # Public API: return a driver behaviour summary string
     # ------------------------------------------------------------------
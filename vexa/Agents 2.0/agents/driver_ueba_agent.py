@@ -2,11 +2,14 @@
 
 from __future__ import annotations
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Union
 from datetime import datetime
 
+import numpy as np
+
 from models import TelematicsEvent
 from database import DatabaseManager
+from telematics_buffer import TelematicsRingBuffer
 
 
 class DriverUEBAAgent:
@@ -26,9 +29,9 @@ class DriverUEBAAgent:
     def detect_driver_anomalies(
         self,
         driver_id: str,
-        events: List[TelematicsEvent],
+        events: Union[List[TelematicsEvent], TelematicsRingBuffer],
     ) -> Dict[str, Any]:
-        if not events:
+        if not len(events):
             return {
                 "driver_id": driver_id,
                 "metrics": {},
@@ -104,7 +107,17 @@ class DriverUEBAAgent:
     # ------------------------------------------------------------------
     # Helpers
     # ------------------------------------------------------------------
-    def _compute_metrics(self, events: List[TelematicsEvent]) -> Dict[str, Any]:
+    def _compute_metrics(
+        self, events: Union[List[TelematicsEvent], TelematicsRingBuffer]
+    ) -> Dict[str, Any]:
+        if isinstance(events, TelematicsRingBuffer):
+            return {
+                "total_events": len(events),
+                "harsh_brake_events": int(events.column("hard_brake_events_last_10min").sum()),
+                "harsh_accel_events": int(events.column("harsh_accel_events_last_10min").sum()),
+                "speed_violations": int(np.count_nonzero(events.column("speed_kmph") > 100)),
+            }
+
         total = len(events)
         harsh_brake_events = 0
         harsh_accel_events = 0
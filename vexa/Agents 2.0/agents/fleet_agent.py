@@ -3,59 +3,121 @@
 from __future__ import annotations
 
 import asyncio
-from typing import List, Dict, Any
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
 from collections import defaultdict
 
+from agents.master_agent import DEFAULT_BACKEND_LIMITS
+from fleet_shards import ShardedAnalyzer
+
+
+DEFAULT_CONCURRENCY = 8
+
+FleetItem = Tuple[str, Optional[Dict[str, Any]], Optional[str]]
+
 
 class FleetAgent:
     """
     Fleet-level wrapper around MasterAgent.
 
-    - Processes multiple vehicles in parallel (batched)
-    - Calls MasterAgent.process_vehicle(..., enable_voice=False) to avoid TTS load
+    - Keeps `concurrency` vehicles in flight (a new one starts as soon as
+      any finishes, so one slow vehicle does not hold up the others)
+    - iter_fleet() yields each vehicle's result as it completes
+    - backend_limits overrides the pipeline's caps on concurrent LLM /
+      TecDoc / Nylas calls (DEFAULT_BACKEND_LIMITS, set by MasterAgent)
+    - With process_shards > 0, feature engineering, health scoring and
+      UEBA run in worker processes sharded by vehicle_id (fleet_shards);
+      their vehicle state is their own, not the master agent's
     - Returns aggregated analytics for dashboards / fleet ops
     """
 
-    def __init__(self, master_agent) -> None:
+    def __init__(
+        self,
+        master_agent,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        backend_limits: Optional[Dict[str, Optional[int]]] = None,
+        process_shards: int = 0,
+    ) -> None:
         self.master_agent = master_agent
-
-    async def process_fleet(self, vehicle_ids: List[str]) -> Dict[str, Any]:
-        """Process vehicles in parallel (batched to avoid API throttling)."""
+        self.concurrency = concurrency
+        self.analyzer = (
+            ShardedAnalyzer(
+                process_shards,
+                data_seed=master_agent.data_seed,
+                history_now=master_agent.history_now,
+            )
+            if process_shards > 0
+            else None
+        )
+        self.backend_limits = dict(DEFAULT_BACKEND_LIMITS, **(backend_limits or {}))
+        for backend, limit in (backend_limits or {}).items():
+            master_agent.pipeline.set_limit(backend, limit)
+
+    async def iter_fleet(
+        self,
+        vehicle_ids: Iterable[str],
+        concurrency: Optional[int] = None,
+        **process_kwargs: Any,
+    ) -> AsyncIterator[FleetItem]:
+        """
+        Yield (vehicle_id, result, error) in completion order. At most
+        `concurrency` vehicles are processed at a time; a failing vehicle
+        yields its error message and does not stop the sweep.
+        """
+        slots = asyncio.Semaphore(concurrency or self.concurrency)
+        finished: "asyncio.Queue[Optional[FleetItem]]" = asyncio.Queue()
+        tasks: Set[asyncio.Task] = set()
+
+        async def process(vehicle_id: str) -> None:
+            try:
+                result = await self.master_agent.process_vehicle_async(
+                    vehicle_id, analyzer=self.analyzer, **process_kwargs
+                )
+                finished.put_nowait((vehicle_id, result, None))
+            except Exception as e:
+                finished.put_nowait((vehicle_id, None, str(e)))
+            finally:
+                slots.release()
+
+        async def feed() -> None:
+            try:
+                for vehicle_id in vehicle_ids:
+                    await slots.acquire()
+                    task = asyncio.ensure_future(process(vehicle_id))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                while tasks:
+                    await asyncio.gather(*list(tasks))
+            finally:
+                finished.put_nowait(None)
+
+        feeder = asyncio.ensure_future(feed())
+        try:
+            while True:
+                item = await finished.get()
+                if item is None:
+                    break
+                yield item
+            await feeder  # re-raise errors from the vehicle_ids iterable
+        finally:
+            feeder.cancel()
+            for task in list(tasks):
+                task.cancel()
+
+    async def process_fleet(
+        self, vehicle_ids: List[str], concurrency: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Process all vehicles with bounded concurrency, then aggregate."""
         results: Dict[str, Any] = {}
         errors: Dict[str, str] = {}
 
-        BATCH_SIZE = 3
-
-        for i in range(0, len(vehicle_ids), BATCH_SIZE):
-            batch = vehicle_ids[i:i + BATCH_SIZE]
-
-            batch_results = await asyncio.gather(
-                *[
-                    asyncio.to_thread(self._safe_process_vehicle, vid, errors)
-                    for vid in batch
-                ]
-            )
-
-            for vid, res in zip(batch, batch_results):
-                if res is not None:
-                    results[vid] = res
+        async for vid, res, err in self.iter_fleet(vehicle_ids, concurrency):
+            if err is not None:
+                errors[vid] = err
+            else:
+                results[vid] = res
 
         return self._fleet_summary(results, errors)
 
-    # -----------------------------------------------------------
-    def _safe_process_vehicle(self, vehicle_id: str, errors: Dict[str, str]) -> Any:
-        """
-        Call master_agent.process_vehicle safely.
-
-        - Disables TTS via enable_voice=False
-        - Catches exceptions so one bad vehicle doesn't kill the fleet run
-        """
-        try:
-            return self.master_agent.process_vehicle(vehicle_id, enable_voice=False)
-        except Exception as e:
-            errors[vehicle_id] = str(e)
-            return None
-
     # -----------------------------------------------------------
     def _fleet_summary(self, results: Dict[str, Any], errors: Dict[str, str]) -> Dict[str, Any]:
         """Aggregate fleet-level insights safely."""
@@ -3,10 +3,10 @@ from typing import List, Dict
 
 from models import HealthSummary
 from rag_dtc_tool import dtc_rag_lookup
+from single_flight import LLM_REQUESTS, prompt_key
 import os
 import json
 from dotenv import load_dotenv
-from openai import OpenAI
 
 load_dotenv()
 
@@ -165,6 +165,8 @@ class ManufacturingQualityAgent:
             return self._chat_rule_based(query, context)
 
         try:
+            from openai import OpenAI  # deferred: only needed for Sarvam chat
+
             client = OpenAI(
                 base_url=SARVAM_BASE_URL,
                 api_key=SARVAM_API_KEY,
@@ -189,17 +191,20 @@ class ManufacturingQualityAgent:
             Keep answers concise, professional, and actionable.
             """
 
-            reply = client.chat.completions.create(
-                model="sarvam-m",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": query},
-                ],
-                max_tokens=300,
-                temperature=0.1, # Low temperature for factual consistency
-            )
-            
-            return reply.choices[0].message.content
+            def ask_sarvam() -> str:
+                reply = client.chat.completions.create(
+                    model="sarvam-m",
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": query},
+                    ],
+                    max_tokens=300,
+                    temperature=0.1, # Low temperature for factual consistency
+                )
+                return reply.choices[0].message.content
+
+            # Concurrent identical questions share one Sarvam request
+            return LLM_REQUESTS.do(prompt_key("sarvam", system_prompt, query), ask_sarvam)
 
         except Exception as e:
             print(f"Sarvam AI Error: {e}")
@@ -2,41 +2,86 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
 from datetime import datetime, timezone
 
+from maintenance_index import MaintenanceIndex
 from models import HealthSummary
-from models import HealthSummary
-from synthetic_data import generate_stream_dataset, evolve_vehicle_state
-
-# ----------------------------------------------------------------------
-# Sensor agent import (robust to different class names)
-# ----------------------------------------------------------------------
-try:
-    # If your sensor_agent.py exposes this (old name we used)
-    from agents.sensor_agent import SyntheticSensorAgent
-except ImportError:
-    try:
-        # Fallback: maybe it's called SensorAgent
-        from agents.sensor_agent import SensorAgent as SyntheticSensorAgent
-    except ImportError:
-        # Last fallback: maybe it's called TelematicsSensorAgent
-        from agents.sensor_agent import TelematicsSensorAgent as SyntheticSensorAgent
-
-from agents.diagnosis_agent import DiagnosisAgentLLM
-from agents.data_analysis_agent import DataAnalysisAgent
-from agents.driver_behavior_agent import DriverBehaviorCoachAgent
-from agents.scheduling_agent import SchedulingAgent
-from agents.spare_parts_agent import SparePartsAgent
-from agents.feedback_agent import FeedbackAgent
-from agents.manufacturing_quality_agent import ManufacturingQualityAgent
-from agents.ueba_agent import UEBAAgent
-from agents.fleet_agent import FleetAgent
-
-from agents.vehicle_ueba_agent import VehicleUEBAAgent
-from agents.driver_ueba_agent import DriverUEBAAgent
-
-from database import DatabaseManager
+from pipeline import PipelineRun, Stage, StagePipeline
+from synthetic_data import evolve_vehicle_state
+from startup_profile import STARTUP_PROFILE, LazyAgent, lazy_agent_names
+from telematics_buffer import TelematicsRingBuffer
+from vehicle_state import DEFAULT_MAX_BYTES, DEFAULT_SPILL_DIR, VehicleState, VehicleStateCache
+from versions import VersionCounters
+
+if TYPE_CHECKING:
+    from fleet_shards import ShardedAnalyzer
+
+VEHICLE_HISTORY_SIZE = 200
+
+# Ingest mutates per-vehicle state (ring buffer, window store, state LRU)
+# without locks, so async callers run it on a single dedicated worker
+INGEST_WORKERS = 1
+
+# Worker processes fleet runs shard ingest + CPU stages over (fleet_shards);
+# 0 keeps them in this process
+FLEET_PROCESS_SHARDS = int(os.getenv("FLEET_PROCESS_SHARDS", "0"))
+
+# Stages whose result only depends on the health summary and DTCs
+OUTCOME_STAGES = (
+    "diagnosis", "alert", "log_health", "parts", "slot", "booking",
+    "message", "manufacturing",
+)
+
+# Slow / paid stages (LLM, TecDoc, Nylas, DTC insights). Below the urgency
+# threshold their previous output is reused until urgency or DTCs change.
+EXPENSIVE_STAGES = ("diagnosis", "parts", "slot", "manufacturing")
+
+# Deterministic, CPU-bound stages (see analyze_vehicle / fleet_shards)
+CPU_STAGES = ("driver_tips", "vehicle_ueba", "driver_ueba")
+
+# Max concurrent calls per external backend, across all vehicles in flight
+# (pipeline resources; FleetAgent(backend_limits=...) overrides them)
+DEFAULT_BACKEND_LIMITS: Dict[str, Optional[int]] = {
+    "llm": 4,
+    "tecdoc": 8,
+    "nylas": 4,
+}
+
+URGENCY_ORDER = {"LOW": 0, "MEDIUM": 1, "HIGH": 2, "CRITICAL": 3}
+
+# Settings sub-agents refuse to be built without (the others fall back to
+# mocks); check_config() looks for them before any agent is built
+REQUIRED_SETTINGS = {
+    "OPENAI_API_KEY": "diagnosis",
+    "TECDOC_RAPIDAPI_KEY": "spare_parts",
+}
+
+# process_vehicle result field -> pipeline stages it needs. Fields with
+# no stages come from ingest alone (no LLM / HTTP / DB work).
+RESULT_FIELDS = {
+    "vehicle_id": (),
+    "health_summary": (),
+    "diagnosis_report": ("diagnosis",),
+    "driver_tips": ("driver_tips",),
+    "urgency": (),
+    "booking_info": ("booking",),
+    "feedback": ("feedback",),
+    "customer_message": ("message",),
+    "customer_message_audio": ("message",),
+    "manufacturing_insights": ("manufacturing",),
+    "ueba_report": (),
+    "dtc_codes": (),
+    "vehicle_ueba": ("vehicle_ueba",),
+    "driver_ueba": ("driver_ueba",),
+    "latest_telematics": (),
+    "stage_timings_ms": (),
+    "stage_ages_s": (),
+}
 
 
 class MasterAgent:
@@ -52,35 +97,130 @@ class MasterAgent:
     - generates bilingual voice message (Sarvam)
     - logs UEBA + DB + manufacturing feedback
     - (NEW) runs UEBA for vehicle + driver
+
+    Sub-agents are built (and their modules imported) on first use; see
+    startup_report() for what that cost.
     """
 
-    def __init__(self) -> None:
-        # Core agents
-        self.sensor = SyntheticSensorAgent()
-        self.data_analysis = DataAnalysisAgent()
-        self.diagnosis = DiagnosisAgentLLM()
-        self.driver_coach = DriverBehaviorCoachAgent()
-        self.scheduler = SchedulingAgent()
-        self.spare_parts = SparePartsAgent()
-        self.feedback = FeedbackAgent()
-        self.manufacturing = ManufacturingQualityAgent()
-        self.ueba = UEBAAgent()
-        self.db = DatabaseManager()
-
-        # In-memory "Live" state
-        self.vehicle_memory: Dict[str, List[Any]] = {}
-
-        # Fleet
-        self.fleet_agent = FleetAgent(self)
-
-        # NEW UEBA agents
-        self.vehicle_ueba_agent = VehicleUEBAAgent(self.db)
-        self.driver_ueba_agent = DriverUEBAAgent(self.db)
+    # Core agents
+    # Sensor agent: robust to different class names (old name first)
+    sensor = LazyAgent(
+        "agents.sensor_agent", ("SyntheticSensorAgent", "SensorAgent", "TelematicsSensorAgent")
+    )
+    # Windows hold at most the events the ring buffer keeps, so per-vehicle
+    # memory stays bounded however long the vehicle streams
+    data_analysis = LazyAgent(
+        "agents.data_analysis_agent",
+        "DataAnalysisAgent",
+        lambda cls, master: cls(window_events=VEHICLE_HISTORY_SIZE),
+    )
+    diagnosis = LazyAgent("agents.diagnosis_agent", "DiagnosisAgentLLM")
+    driver_coach = LazyAgent("agents.driver_behavior_agent", "DriverBehaviorCoachAgent")
+    scheduler = LazyAgent("agents.scheduling_agent", "SchedulingAgent")
+    spare_parts = LazyAgent("agents.spare_parts_agent", "SparePartsAgent")
+    feedback = LazyAgent("agents.feedback_agent", "FeedbackAgent")
+    manufacturing = LazyAgent("agents.manufacturing_quality_agent", "ManufacturingQualityAgent")
+    ueba = LazyAgent("agents.ueba_agent", "UEBAAgent")
+    db = LazyAgent("database", "DatabaseManager")
+
+    # NEW UEBA agents
+    vehicle_ueba_agent = LazyAgent(
+        "agents.vehicle_ueba_agent", "VehicleUEBAAgent", lambda cls, master: cls(master.db)
+    )
+    driver_ueba_agent = LazyAgent(
+        "agents.driver_ueba_agent", "DriverUEBAAgent", lambda cls, master: cls(master.db)
+    )
+
+    # Fleet (sets the pipeline's per-backend limits)
+    fleet_agent = LazyAgent(
+        "agents.fleet_agent",
+        "FleetAgent",
+        lambda cls, master: cls(master, process_shards=master.process_shards),
+    )
+
+    def __init__(
+        self,
+        expensive_min_urgency: str = "HIGH",
+        data_seed: int = 0,
+        history_now: Optional[datetime] = None,
+        vehicle_memory_bytes: int = DEFAULT_MAX_BYTES,
+        spill_dir: Optional[str] = DEFAULT_SPILL_DIR,
+        process_shards: int = FLEET_PROCESS_SHARDS,
+    ) -> None:
+        # Urgency from which the expensive stages run on every call
+        self.expensive_min_urgency = expensive_min_urgency
+        # Seed for the synthetic history generated on a vehicle's first load
+        self.data_seed = data_seed
+        # Time that history is relative to (None: the wall clock at first load)
+        self.history_now = history_now
+        # Shard processes for fleet runs (see FleetAgent / fleet_shards)
+        self.process_shards = process_shards
+
+        # In-memory "Live" state (columnar, last VEHICLE_HISTORY_SIZE events,
+        # plus maintenance history). Least recently used vehicles beyond
+        # vehicle_memory_bytes are spilled to disk and reloaded on access.
+        self.vehicle_memory = VehicleStateCache(
+            max_bytes=vehicle_memory_bytes,
+            spill_dir=spill_dir,
+            on_evict=self._on_vehicle_evicted,
+            size_of=self._vehicle_nbytes,
+        )
+
+        # Per vehicle: OUTCOME_STAGES values, when each was computed, and the
+        # urgency + DTCs the expensive stages last ran with
+        self._last_outcome: Dict[str, Dict[str, Any]] = {}
+
+        # Per vehicle: bumped whenever new telematics reach its window store
+        # (API ETags; main also bumps it on booking / service changes)
+        self.versions = VersionCounters()
+
+        # Step 1 for async callers (process_vehicle_async, the live stream)
+        self.ingest_executor = ThreadPoolExecutor(
+            max_workers=INGEST_WORKERS, thread_name_prefix="ingest"
+        )
+
+        # Steps 2-10 as a stage graph (run_sync / async run)
+        self.pipeline = self._build_pipeline()
+
+    # ------------------------------------------------------------------
+    # Startup
+    # ------------------------------------------------------------------
+    def check_config(self) -> None:
+        """
+        Raise RuntimeError if a setting in REQUIRED_SETTINGS is missing
+        (from the environment or .env), without building any agent.
+        """
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        missing = [
+            f"{name} (needed by {agent})"
+            for name, agent in REQUIRED_SETTINGS.items()
+            if not os.getenv(name)
+        ]
+        if missing:
+            raise RuntimeError(f"Missing settings in .env: {', '.join(missing)}")
+
+    def warm_up(self) -> Dict[str, Any]:
+        """Build every sub-agent now (e.g. from a readiness probe)."""
+        for name in lazy_agent_names(type(self)):
+            getattr(self, name)
+        return self.startup_report()
+
+    def startup_report(self) -> Dict[str, Any]:
+        """Import / init time of each sub-agent built so far."""
+        report = STARTUP_PROFILE.report()
+        report["pending"] = [
+            name for name in lazy_agent_names(type(self)) if name not in self.__dict__
+        ]
+        return report
 
     # ------------------------------------------------------------------
     # Helpers
     # ------------------------------------------------------------------
     def _last_dtc_codes(self, events) -> List[str]:
+        if isinstance(events, TelematicsRingBuffer):
+            return events.last_dtc_codes()
         for ev in reversed(events):
             if ev.dtc_codes:
                 return list(ev.dtc_codes)
@@ -127,87 +267,159 @@ class MasterAgent:
             },
         )
 
+    def _vehicle_nbytes(self, vehicle_id: str, state: VehicleState) -> int:
+        store = self.data_analysis.window_manager.get_store(vehicle_id)
+        return state.nbytes + (store.buffer.nbytes if store is not None else 0)
+
+    def _on_vehicle_evicted(self, vehicle_id: str, state: VehicleState) -> None:
+        # The analysis state is spilled along with the vehicle. Reusable
+        # stage outputs are dropped, so a reloaded vehicle runs them again.
+        state.analysis = self.data_analysis.detach(vehicle_id)
+        self._last_outcome.pop(vehicle_id, None)
+
     # ------------------------------------------------------------------
-    # Main single-vehicle workflow
+    # Ingest: telematics -> rolling health (step 1)
     # ------------------------------------------------------------------
-    def process_vehicle(self, vehicle_id: str, simulate: bool = True) -> Dict[str, Any]:
-        """
-        Full workflow for one vehicle:
-        - Read telematics
-        - Compute rolling-health
-        - Driver behaviour summary
-        - UEBA (vehicle + driver)
-        - Determine urgency (LOW/MEDIUM/HIGH/CRITICAL)
-        - Suggest parts + slots (no auto-booking)
-        - Generate bilingual voice/text alert
-        - Log UEBA + DB + manufacturing feedback
-        """
+    def _restore_analysis(self, vehicle_id: str, state: VehicleState) -> None:
+        if state.analysis is not None:
+            # Reloaded from disk: its window store and memo were spilled with it
+            self.data_analysis.attach(vehicle_id, state.analysis)
+            state.analysis = None
+        elif state.ingest_cursor == 0:
+            self.data_analysis.detach(vehicle_id)
+
+    def _ingest(self, vehicle_id: str, simulate: bool) -> Dict[str, Any]:
+        """Update the vehicle's telematics, score health, return the pipeline inputs."""
 
         # 1) Smart Data Generation (Persistence)
-        # Check if we have history
-        if vehicle_id in self.vehicle_memory:
-            history = self.vehicle_memory[vehicle_id]
-            last_event = history[-1]
+        # Check if we have history (in memory or spilled)
+        state = self.vehicle_memory.get(vehicle_id)
+        if state is not None:
+            events = state.events
             
             if simulate:
-                # Evolve one step
-                new_event = evolve_vehicle_state(last_event)
-                history.append(new_event)
-                # Keep buffer size reasonable
-                if len(history) > 200:
-                    history.pop(0)
-            
-            events = history
-            maintenance = [] 
+                # Evolve one step (the ring buffer drops the oldest row itself)
+                new_event = evolve_vehicle_state(events.last_event())
+                events.append(new_event)
         else:
             # First time load: Must generate initial state even if simulate=False
-            dataset = generate_stream_dataset(num_vehicles=10)
-            events, maintenance = self.sensor.get_vehicle_stream(dataset, vehicle_id)
-            self.vehicle_memory[vehicle_id] = events
-
-        latest_summary: Optional[HealthSummary] = None
-        for ev in events:
-            latest_summary = self.data_analysis.handle_event(ev, maintenance)
+            # (only this vehicle's history, seeded by its id)
+            initial_events, maintenance = self.sensor.get_vehicle_history(
+                vehicle_id,
+                num_events=VEHICLE_HISTORY_SIZE,
+                seed=self.data_seed,
+                lazy=True,
+                now=self.history_now,
+            )
+            events = TelematicsRingBuffer(vehicle_id, capacity=VEHICLE_HISTORY_SIZE)
+            events.extend(initial_events)
+            state = VehicleState(events, MaintenanceIndex(maintenance, vehicle_id=vehicle_id))
+            self.vehicle_memory.put(vehicle_id, state)
+
+        self._restore_analysis(vehicle_id, state)
+
+        # Only feed rows the window store has not seen yet; otherwise
+        # reuse the summary from the previous call.
+        if events.end_seq > state.ingest_cursor:
+            # The generated first history is version 0: an ETag read before
+            # this first load already describes it
+            first_load = state.ingest_cursor == 0
+            state.latest_summary = self.data_analysis.handle_buffer(
+                events, state.ingest_cursor, state.maintenance
+            )
+            state.ingest_cursor = events.end_seq
+            if not first_load:
+                self.versions.bump(vehicle_id)
 
+        latest_summary: Optional[HealthSummary] = state.latest_summary
         if latest_summary is None:
             raise RuntimeError("No events for vehicle; cannot compute health.")
 
-        summary_dict = latest_summary.model_dump()
-        
-        # Capture latest telematics for Live View
-        latest_telematics = events[-1].model_dump()
-        
         self.ueba.log(
             "DataAnalysisAgent", "health_computed", {"vehicle_id": vehicle_id}
         )
 
+        return {
+            "vehicle_id": vehicle_id,
+            # The CPU stages run after _ingest returns, while the next
+            # ingest may append to (and compact) the live buffer
+            "events": events.snapshot(),
+            "summary": latest_summary,
+            # 5) Decide urgency (with CRITICAL tier); cheap, always computed
+            "urgency": self._decide_urgency(latest_summary),
+            "dtc_codes": self._last_dtc_codes(events),
+            # Capture latest telematics for Live View
+            "latest_telematics": events.last_event().model_dump(),
+        }
+
+    def ingest_batch(
+        self, batches: Dict[str, TelematicsRingBuffer]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Add pushed telematics (one buffer per vehicle, rows in timestamp
+        order, see telematics_batch). Every row goes through the vehicle's
+        window store; its ring buffer keeps the newest
+        VEHICLE_HISTORY_SIZE. A vehicle seen for the first time starts from
+        the pushed rows alone (no synthetic history or maintenance).
+
+        Returns per vehicle the rows accepted, the latest timestamp and the
+        resulting urgency. Like _ingest, not safe to call concurrently.
+        """
+        acks: Dict[str, Dict[str, Any]] = {}
+        for vehicle_id, batch in batches.items():
+            if not len(batch):
+                continue
+            state = self.vehicle_memory.get(vehicle_id)
+            if state is None:
+                state = VehicleState(
+                    TelematicsRingBuffer(vehicle_id, capacity=VEHICLE_HISTORY_SIZE),
+                    MaintenanceIndex(vehicle_id=vehicle_id),
+                )
+            self._restore_analysis(vehicle_id, state)
+
+            events = state.events
+            if events.end_seq > state.ingest_cursor:
+                self.data_analysis.handle_buffer(events, state.ingest_cursor, state.maintenance)
+            state.latest_summary = self.data_analysis.handle_buffer(batch, 0, state.maintenance)
+            events.extend_from(batch)
+            state.ingest_cursor = events.end_seq
+            self.vehicle_memory.put(vehicle_id, state)
+            self.versions.bump(vehicle_id)
+
+            acks[vehicle_id] = {
+                "accepted": len(batch),
+                "latest_timestamp": events.timestamp_iso(events.end_seq - 1),
+                "urgency": self._decide_urgency(state.latest_summary),
+            }
+        return acks
+
+    # ------------------------------------------------------------------
+    # Pipeline stages (steps 2-10). Each takes the values produced so far.
+    # ------------------------------------------------------------------
+    def _stage_diagnosis(self, ctx: Dict[str, Any]) -> str:
         # 2) Diagnosis (LLM)
-        dtc_codes = self._last_dtc_codes(events)
-        diag_report = self.diagnosis.run(latest_summary, dtc_codes=dtc_codes)
+        diag_report = self.diagnosis.run(ctx["summary"], dtc_codes=ctx["dtc_codes"])
         self.ueba.log(
-            "DiagnosisAgent", "diagnosis_completed", {"vehicle_id": vehicle_id}
+            "DiagnosisAgent", "diagnosis_completed", {"vehicle_id": ctx["vehicle_id"]}
         )
+        return diag_report
 
+    def _stage_driver_tips(self, ctx: Dict[str, Any]) -> str:
         # 3) Driver behaviour coaching (summary from events)
-        driver_tips = self.driver_coach.run(events)
+        driver_tips = self.driver_coach.run(ctx["events"])
         self.ueba.log(
-            "DriverBehaviorCoachAgent", "tips_generated", {"vehicle_id": vehicle_id}
+            "DriverBehaviorCoachAgent", "tips_generated", {"vehicle_id": ctx["vehicle_id"]}
         )
+        return driver_tips
 
-        # 4) UEBA (NEW): vehicle + driver anomalies
+    def _stage_vehicle_ueba(self, ctx: Dict[str, Any]) -> Dict[str, Any]:
+        # 4a) UEBA (NEW): vehicle anomalies
+        vehicle_id = ctx["vehicle_id"]
         vehicle_ueba_result = self.vehicle_ueba_agent.detect_vehicle_anomalies(
             vehicle_id=vehicle_id,
-            events=events,
-            health_summary=latest_summary,
-        )
-
-        # For demo: synthetic mapping driver ↔ vehicle
-        driver_id = f"DRIVER-{vehicle_id}"
-        driver_ueba_result = self.driver_ueba_agent.detect_driver_anomalies(
-            driver_id=driver_id,
-            events=events,
+            events=ctx["events"],
+            health_summary=ctx["summary"],
         )
-
         self.ueba.log(
             "VehicleUEBAAgent",
             "vehicle_analyzed",
@@ -217,7 +429,16 @@ class MasterAgent:
                 "anomaly_count": len(vehicle_ueba_result["anomalies"]),
             },
         )
+        return vehicle_ueba_result
 
+    def _stage_driver_ueba(self, ctx: Dict[str, Any]) -> Dict[str, Any]:
+        # 4b) UEBA (NEW): driver anomalies
+        # For demo: synthetic mapping driver ↔ vehicle
+        driver_id = f"DRIVER-{ctx['vehicle_id']}"
+        driver_ueba_result = self.driver_ueba_agent.detect_driver_anomalies(
+            driver_id=driver_id,
+            events=ctx["events"],
+        )
         self.ueba.log(
             "DriverUEBAAgent",
             "driver_analyzed",
@@ -227,67 +448,81 @@ class MasterAgent:
                 "anomaly_count": len(driver_ueba_result["anomalies"]),
             },
         )
+        return driver_ueba_result
 
-        # 5) Decide urgency (with CRITICAL tier)
-        urgency = self._decide_urgency(latest_summary)
-
+    def _stage_alert(self, ctx: Dict[str, Any]) -> bool:
         # Emergency alert hook for CRITICAL
-        if urgency == "CRITICAL":
-            self._send_emergency_alert(vehicle_id, latest_summary)
+        if ctx["urgency"] != "CRITICAL":
+            return False
+        self._send_emergency_alert(ctx["vehicle_id"], ctx["summary"])
+        return True
 
+    def _stage_log_health(self, ctx: Dict[str, Any]) -> None:
         # 6) Log health into DB
-        self.db.log_health(vehicle_id, latest_summary.model_dump(), urgency)
+        self.db.log_health(ctx["vehicle_id"], ctx["summary"].model_dump(), ctx["urgency"])
 
-        # 7) Parts + Scheduling (no auto-booking; just proposal if possible)
-        booking_info: Optional[Dict[str, Any]] = None
-
-        if urgency in ("CRITICAL", "HIGH"):
-            critical_component = "brake_pad"
-
-            parts_ok = self.spare_parts.is_available_for_vehicle(
-                vehicle_id, critical_component, qty=1
-            )
-            self.ueba.log(
-                "SparePartsAgent",
-                "availability_checked",
-                {
-                    "vehicle_id": vehicle_id,
-                    "component": critical_component,
-                    "available": parts_ok,
-                },
-            )
+    def _stage_parts(self, ctx: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # 7a) Parts availability + reservation (TecDoc), HIGH/CRITICAL only
+        if ctx["urgency"] not in ("CRITICAL", "HIGH"):
+            return None
+        vehicle_id = ctx["vehicle_id"]
+        critical_component = "brake_pad"
 
-            if parts_ok:
-                reservation_info = self.spare_parts.reserve_for_vehicle(
-                    vehicle_id, critical_component, qty=1
-                )
+        parts_ok = self.spare_parts.is_available_for_vehicle(
+            vehicle_id, critical_component, qty=1
+        )
+        self.ueba.log(
+            "SparePartsAgent",
+            "availability_checked",
+            {
+                "vehicle_id": vehicle_id,
+                "component": critical_component,
+                "available": parts_ok,
+            },
+        )
+        if not parts_ok:
+            return None
+        return self.spare_parts.reserve_for_vehicle(vehicle_id, critical_component, qty=1)
+
+    def _stage_slot(self, ctx: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # 7b) Slot proposal (Nylas availability), only once a part is
+        # reserved, so no Nylas quota is spent on vehicles we cannot book
+        if ctx["urgency"] not in ("CRITICAL", "HIGH") or ctx["parts"] is None:
+            return None
+        return self.scheduler.propose_slot(
+            urgency=ctx["urgency"],
+            customer_email=None,  # no auto-email in demo
+        )
 
-                slot_result = self.scheduler.propose_slot(
-                    urgency=urgency,
-                    customer_email=None,  # no auto-email in demo
-                )
+    def _stage_booking(self, ctx: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # 7c) Parts + Scheduling (no auto-booking; just proposal if possible)
+        reservation_info, slot_result = ctx["parts"], ctx["slot"]
+        if reservation_info is None or slot_result is None:
+            return None
 
-                self.ueba.log(
-                    "SchedulingAgent",
-                    "slot_proposed",
-                    {"vehicle_id": vehicle_id, "slot": slot_result.get("slot")},
-                )
+        self.ueba.log(
+            "SchedulingAgent",
+            "slot_proposed",
+            {"vehicle_id": ctx["vehicle_id"], "slot": slot_result.get("slot")},
+        )
 
-                # IMPORTANT: we are NOT auto-booking with Nylas here.
-                booking_info = {
-                    "reservation": reservation_info,
-                    "slot": slot_result.get("slot"),
-                    "event": None,
-                    "status": "pending_customer_confirmation",
-                }
+        # IMPORTANT: we are NOT auto-booking with Nylas here.
+        return {
+            "reservation": reservation_info,
+            "slot": slot_result.get("slot"),
+            "event": None,
+            "status": "pending_customer_confirmation",
+        }
 
+    def _stage_message(self, ctx: Dict[str, Any]) -> Dict[str, Any]:
         # 8) Customer-facing bilingual message + voice (Sarvam)
         # CustomerEngagementAgent removed by user.
         # Fallback: Generate basic alert message manually.
-        
+        vehicle_id, urgency = ctx["vehicle_id"], ctx["urgency"]
+
         message_body = "Vehicle is operating normally."
         if urgency in ("CRITICAL", "HIGH"):
-            high_risk_components = [h for h in latest_summary.component_health if h.risk_level == "HIGH"]
+            high_risk_components = [h for h in ctx["summary"].component_health if h.risk_level == "HIGH"]
             
             lines = [f"🚨 Safety Alert for {vehicle_id}!\n"]
             for h in high_risk_components:
@@ -311,47 +546,232 @@ class MasterAgent:
         #     "message_generated",
         #     ...
         # )
+        return {"text": customer_message_text, "audio": customer_message_audio}
 
+    def _stage_feedback(self, ctx: Dict[str, Any]) -> Dict[str, Any]:
         # 9) Feedback (simulated)
         feedback = self.feedback.collect_feedback(
             rating=9,
             comments="Voice alert was clear and easy to understand.",
         )
-        self.ueba.log("FeedbackAgent", "feedback_collected", {"vehicle_id": vehicle_id})
+        self.ueba.log("FeedbackAgent", "feedback_collected", {"vehicle_id": ctx["vehicle_id"]})
+        return feedback
 
+    def _stage_manufacturing(self, ctx: Dict[str, Any]) -> Dict[str, Any]:
         # 10) Manufacturing insights (RCA / CAPA)
-        manuf_failures = self.manufacturing.summarize_failures([latest_summary])
-        manuf_dtc = self.manufacturing.dtc_insights(dtc_codes)
+        manuf_failures = self.manufacturing.summarize_failures([ctx["summary"]])
+        manuf_dtc = self.manufacturing.dtc_insights(ctx["dtc_codes"])
         self.ueba.log(
             "ManufacturingQualityAgent",
             "insights_generated",
-            {"vehicle_id": vehicle_id},
+            {"vehicle_id": ctx["vehicle_id"]},
         )
+        return {
+            "failures": manuf_failures,
+            "dtc_insights": manuf_dtc,
+        }
 
-        # 11) UEBA report (existing simple UEBAAgent)
-        ueba_report = self.ueba.report()
+    def _build_pipeline(self) -> StagePipeline:
+        pipeline = StagePipeline(
+            [
+                Stage("diagnosis", self._stage_diagnosis, ("summary", "dtc_codes"), "io", "llm"),
+                Stage("driver_tips", self._stage_driver_tips, ("events",), "cpu"),
+                Stage("vehicle_ueba", self._stage_vehicle_ueba, ("events", "summary"), "cpu"),
+                Stage("driver_ueba", self._stage_driver_ueba, ("events",), "cpu"),
+                Stage("alert", self._stage_alert, ("urgency",), "inline"),
+                Stage("log_health", self._stage_log_health, ("urgency",), "io"),
+                Stage("parts", self._stage_parts, ("urgency",), "io", "tecdoc"),
+                Stage("slot", self._stage_slot, ("urgency", "parts"), "io", "nylas"),
+                Stage("booking", self._stage_booking, ("parts", "slot"), "inline"),
+                Stage("message", self._stage_message, ("urgency",), "inline"),
+                Stage("feedback", self._stage_feedback, (), "inline"),
+                Stage("manufacturing", self._stage_manufacturing, ("summary", "dtc_codes"), "io"),
+            ],
+            inputs=("vehicle_id", "events", "summary", "urgency", "dtc_codes", "latest_telematics"),
+        )
+        for backend, limit in DEFAULT_BACKEND_LIMITS.items():
+            pipeline.set_limit(backend, limit)
+        return pipeline
 
-        return {
+    def _reuse_plan(self, inputs: Dict[str, Any], refresh: bool) -> Dict[str, Any]:
+        """
+        Outcome stages to take from the previous call instead of running:
+        - all of them if the health summary did not change and DTCs are
+          the same (no new LLM call, alert or DB row),
+        - the expensive ones if urgency is below expensive_min_urgency and
+          neither urgency nor DTCs changed since they last ran,
+        - none if refresh is set or there is no previous outcome.
+        """
+        previous = self._last_outcome.get(inputs["vehicle_id"])
+        if refresh or previous is None or previous["dtc_codes"] != inputs["dtc_codes"]:
+            return {}
+        if inputs["summary"].unchanged:
+            return dict(previous["values"])
+        urgency = inputs["urgency"]
+        if (
+            urgency == previous["urgency"]
+            and URGENCY_ORDER[urgency] < URGENCY_ORDER[self.expensive_min_urgency]
+        ):
+            return {name: previous["values"][name] for name in EXPENSIVE_STAGES}
+        return {}
+
+    def _targets(self, fields: Optional[Sequence[str]]) -> Optional[List[str]]:
+        """Stages to run for a field projection (None = all of them)."""
+        if fields is None:
+            return None
+        unknown = [f for f in fields if f not in RESULT_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown result fields: {unknown}")
+        return sorted({stage for f in fields for stage in RESULT_FIELDS[f]})
+
+    def _assemble_result(
+        self, run: PipelineRun, fields: Optional[Sequence[str]] = None
+    ) -> Dict[str, Any]:
+        vehicle_id = run["vehicle_id"]
+        now = time.time()
+        previous = self._last_outcome.get(vehicle_id)
+        computed_at = dict(previous["computed_at"]) if previous else {}
+        for name in OUTCOME_STAGES:
+            if name in run.values and name not in run.reused:
+                computed_at[name] = now
+        # Only a run that has every outcome stage becomes the reference
+        # for reuse; a projection leaves the previous one in place.
+        if all(name in run.values for name in OUTCOME_STAGES):
+            self._last_outcome[vehicle_id] = {
+                "values": {name: run[name] for name in OUTCOME_STAGES},
+                "computed_at": computed_at,
+                "urgency": run["urgency"],
+                "dtc_codes": run["dtc_codes"],
+            }
+
+        values = run.values
+        message = values.get("message") or {}
+        result = {
             "vehicle_id": vehicle_id,
-            "health_summary": summary_dict,
-            "diagnosis_report": diag_report,
-            "driver_tips": driver_tips,
-            "urgency": urgency,
-            "booking_info": booking_info,
-            "feedback": feedback,
-            "customer_message": customer_message_text,
-            "customer_message_audio": customer_message_audio,
-            "manufacturing_insights": {
-                "failures": manuf_failures,
-                "dtc_insights": manuf_dtc,
-            },
-            "ueba_report": ueba_report,
-            "dtc_codes": dtc_codes,
+            "health_summary": lambda: run["summary"].model_dump(),
+            "diagnosis_report": values.get("diagnosis"),
+            "driver_tips": values.get("driver_tips"),
+            "urgency": run["urgency"],
+            "booking_info": values.get("booking"),
+            "feedback": values.get("feedback"),
+            "customer_message": message.get("text"),
+            "customer_message_audio": message.get("audio"),
+            "manufacturing_insights": values.get("manufacturing"),
+            # 11) UEBA report (existing simple UEBAAgent)
+            "ueba_report": self.ueba.report,
+            "dtc_codes": run["dtc_codes"],
             # NEW UEBA outputs
-            "vehicle_ueba": vehicle_ueba_result,
-            "driver_ueba": driver_ueba_result,
-            "latest_telematics": latest_telematics, # <--- NEW for Live Dashboard
+            "vehicle_ueba": values.get("vehicle_ueba"),
+            "driver_ueba": values.get("driver_ueba"),
+            "latest_telematics": run["latest_telematics"], # <--- NEW for Live Dashboard
+            "stage_timings_ms": run.timings_ms,
+            # Seconds since each reused (not re-run) stage was computed
+            "stage_ages_s": {name: round(now - computed_at[name], 3) for name in run.reused},
         }
+        # Costlier entries are built only when they are returned
+        return {
+            name: value() if callable(value) else value
+            for name, value in result.items()
+            if fields is None or name in fields
+        }
+
+    def analyze_vehicle(self, vehicle_id: str, simulate: bool = True) -> Dict[str, Any]:
+        """
+        Ingest plus the CPU stages only. The result holds no event buffer,
+        so it is cheap to pickle; pass it to the pipeline as inputs and
+        the stages already computed are skipped.
+        """
+        inputs = self._ingest(vehicle_id, simulate)
+        for name in CPU_STAGES:
+            inputs[name] = self.pipeline.stages[name].fn(inputs)
+        inputs["events"] = None
+        return inputs
+
+    # ------------------------------------------------------------------
+    # Main single-vehicle workflow
+    # ------------------------------------------------------------------
+    def live_frame(self, vehicle_id: str, simulate: bool = True) -> Dict[str, Any]:
+        """
+        Latest telematics, health and urgency for the live stream: step 1
+        only, none of the pipeline stages.
+        """
+        inputs = self._ingest(vehicle_id, simulate)
+        summary: HealthSummary = inputs["summary"]
+        return {
+            "vehicle_id": vehicle_id,
+            "timestamp": summary.timestamp,
+            "urgency": inputs["urgency"],
+            "latest_telematics": inputs["latest_telematics"],
+            "health": [c.model_dump() for c in summary.component_health],
+        }
+
+    def process_vehicle(
+        self,
+        vehicle_id: str,
+        simulate: bool = True,
+        refresh: bool = False,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Full workflow for one vehicle:
+        - Read telematics
+        - Compute rolling-health
+        - Driver behaviour summary
+        - UEBA (vehicle + driver)
+        - Determine urgency (LOW/MEDIUM/HIGH/CRITICAL)
+        - Suggest parts + slots (no auto-booking)
+        - Generate bilingual voice/text alert
+        - Log UEBA + DB + manufacturing feedback
+
+        Expensive stages (LLM diagnosis, parts, scheduling, DTC insights)
+        are reused while urgency stays below expensive_min_urgency and
+        unchanged; refresh=True runs everything.
+
+        With `fields` (names from RESULT_FIELDS) only those are returned
+        and only the stages they need run; the emergency alert and health
+        log run with the full result only.
+
+        Stages run one after another; see process_vehicle_async for the
+        concurrent version.
+        """
+        targets = self._targets(fields)
+        inputs = self._ingest(vehicle_id, simulate)
+        run = self.pipeline.run_sync(
+            inputs, reuse=self._reuse_plan(inputs, refresh), targets=targets
+        )
+        return self._assemble_result(run, fields)
+
+    async def process_vehicle_async(
+        self,
+        vehicle_id: str,
+        simulate: bool = True,
+        refresh: bool = False,
+        analyzer: Optional[ShardedAnalyzer] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Same workflow as process_vehicle, but independent stages (LLM,
+        TecDoc, Nylas, DB, UEBA) overlap, so latency approaches the slowest
+        dependency chain rather than the sum of all stages.
+
+        With an analyzer, ingest and the CPU stages run in the vehicle's
+        shard process instead of here, on that shard's own copy of the
+        vehicle's telematics (see fleet_shards).
+        """
+        targets = self._targets(fields)
+        if analyzer is None:
+            inputs = await asyncio.get_running_loop().run_in_executor(
+                self.ingest_executor, self._ingest, vehicle_id, simulate
+            )
+        else:
+            inputs = await analyzer.analyze(vehicle_id, simulate)
+            self.ueba.events.extend(inputs.pop("ueba_events"))
+            # The shard cannot tell us whether it saw new rows
+            self.versions.bump(vehicle_id)
+        run = await self.pipeline.run(
+            inputs, reuse=self._reuse_plan(inputs, refresh), targets=targets
+        )
+        return self._assemble_result(run, fields)
 
     # ------------------------------------------------------------------
     # Fleet wrapper
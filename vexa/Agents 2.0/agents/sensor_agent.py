@@ -1,5 +1,6 @@
-from typing import Dict, List
-from synthetic_data import generate_stream_dataset
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Union
+from synthetic_data import generate_stream_dataset, generate_vehicle_history
 from models import TelematicsEvent, MaintenanceRecord
 
 
@@ -17,3 +18,19 @@ class SensorAgent:
     ) -> tuple[list[TelematicsEvent], list[MaintenanceRecord]]:
         data = dataset[vehicle_id]
         return data["events"], data["maintenance"]
+
+    def get_vehicle_history(
+        self,
+        vehicle_id: str,
+        num_events: int = 200,
+        seed: int = 0,
+        lazy: bool = False,
+        now: Optional[datetime] = None,
+    ) -> tuple[Union[list[TelematicsEvent], Iterator[TelematicsEvent]], list[MaintenanceRecord]]:
+        """
+        Generate only this vehicle's history, deterministically from its
+        id (and `now`, which timestamps are relative to; default wall clock).
+        """
+        return generate_vehicle_history(
+            vehicle_id, num_events=num_events, seed=seed, lazy=lazy, now=now
+        )
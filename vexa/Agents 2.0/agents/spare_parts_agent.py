@@ -17,12 +17,6 @@ TECDOC_BASE_URL = os.getenv("TECDOC_BASE_URL", "https://tecdoc-catalog.p.rapidap
 TECDOC_RAPIDAPI_KEY = os.getenv("TECDOC_RAPIDAPI_KEY")
 TECDOC_RAPIDAPI_HOST = os.getenv("TECDOC_RAPIDAPI_HOST", "tecdoc-catalog.p.rapidapi.com")
 
-if not TECDOC_RAPIDAPI_KEY:
-    raise RuntimeError(
-        "Missing TECDOC_RAPIDAPI_KEY in .env. "
-        "Get it from RapidAPI → TecDoc Catalog → X-RapidAPI-Key."
-    )
-
 # Map our component types → example TecDoc article numbers
 # (These numbers can be replaced with other valid ones from the API docs)
 COMPONENT_ARTICLE_MAP: Dict[str, str] = {
@@ -52,6 +46,12 @@ class SparePartsAgent:
     """
 
     def __init__(self) -> None:
+        # Checked here rather than at import, so importing the module is free
+        if not TECDOC_RAPIDAPI_KEY:
+            raise RuntimeError(
+                "Missing TECDOC_RAPIDAPI_KEY in .env. "
+                "Get it from RapidAPI → TecDoc Catalog → X-RapidAPI-Key."
+            )
         self.base_url = TECDOC_BASE_URL.rstrip("/")
 
     # ------------- HTTP helper -------------
@@ -2,11 +2,14 @@
 
 from __future__ import annotations
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Union
 from datetime import datetime
 
+import numpy as np
+
 from models import TelematicsEvent, HealthSummary
 from database import DatabaseManager
+from telematics_buffer import TelematicsRingBuffer
 
 
 class VehicleUEBAAgent:
@@ -31,10 +34,10 @@ class VehicleUEBAAgent:
     def detect_vehicle_anomalies(
         self,
         vehicle_id: str,
-        events: List[TelematicsEvent],
+        events: Union[List[TelematicsEvent], TelematicsRingBuffer],
         health_summary: HealthSummary,
     ) -> Dict[str, Any]:
-        if not events:
+        if not len(events):
             return {
                 "vehicle_id": vehicle_id,
                 "metrics": {},
@@ -134,7 +137,12 @@ class VehicleUEBAAgent:
     # ------------------------------------------------------------------
     # Internal helpers
     # ------------------------------------------------------------------
-    def _compute_metrics(self, events: List[TelematicsEvent]) -> Dict[str, Any]:
+    def _compute_metrics(
+        self, events: Union[List[TelematicsEvent], TelematicsRingBuffer]
+    ) -> Dict[str, Any]:
+        if isinstance(events, TelematicsRingBuffer):
+            return self._compute_buffer_metrics(events)
+
         total = len(events)
 
         harsh_brake_events = 0
@@ -161,6 +169,18 @@ class VehicleUEBAAgent:
             "idling_events": idling_events,
         }
 
+    def _compute_buffer_metrics(self, buffer: TelematicsRingBuffer) -> Dict[str, Any]:
+        speed = buffer.column("speed_kmph")
+        return {
+            "total_events": len(buffer),
+            "harsh_brake_events": int(buffer.column("hard_brake_events_last_10min").sum()),
+            "harsh_accel_events": int(buffer.column("harsh_accel_events_last_10min").sum()),
+            "speed_violations": int(np.count_nonzero(speed > 100)),
+            "idling_events": int(
+                np.count_nonzero((speed < 5) & (buffer.column("engine_rpm") > 0))
+            ),
+        }
+
     def _severity_count_ratio(self, actual: float, baseline: float) -> float:
         if baseline <= 0:
             return min(10.0, float(actual))
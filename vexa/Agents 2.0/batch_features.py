@@ -0,0 +1,243 @@
+"""
+Vectorized fleet-wide feature engineering.
+
+Same features as feature_engineering.compute_windowed_features, computed
+for many vehicles at once with NumPy segment reductions over rows sorted
+by (vehicle, timestamp).
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from maintenance_index import FleetMaintenanceIndex
+from models import MaintenanceRecord
+from telematics_buffer import DRIVING_MODES, TelematicsRingBuffer
+from timestamps import US_PER_DAY
+from trips import segment_trips
+
+
+FEATURE_NAMES: List[str] = [
+    "latest_odometer_km",
+    "hard_brakes_per_100km",
+    "avg_brake_pressure",
+    "avg_battery_voltage_v",
+    "low_tire_pressure_ratio",
+    "overheat_events",
+    "max_coolant_temp_c",
+    "dtc_count",
+    "harsh_accel_braking_index",
+    "km_since_last_brake_change",
+    "km_since_last_battery_change",
+    "w7d_avg_speed_kmph",
+    "w7d_city_ratio",
+    "w500_avg_speed_kmph",
+    "w50_avg_speed_kmph",
+    "trip_max_brake_pressure_avg",
+    "trip_harsh_index_avg",
+]
+
+REPLACEMENT_COMPONENTS = ("brake_pad", "battery")
+
+
+@dataclass
+class FleetTelematics:
+    """
+    Columnar telematics for many vehicles.
+
+    `vehicle_idx[i]` is the index into `vehicle_ids` of row i; `columns`
+    uses the TelematicsRingBuffer column names.
+    """
+
+    vehicle_ids: List[str]
+    vehicle_idx: np.ndarray
+    columns: Dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return len(self.vehicle_idx)
+
+    @classmethod
+    def from_buffers(cls, buffers: Dict[str, TelematicsRingBuffer]) -> "FleetTelematics":
+        vehicle_ids = [vid for vid, buf in buffers.items() if len(buf)]
+        bufs = [buffers[vid] for vid in vehicle_ids]
+        sizes = [len(b) for b in bufs]
+        names = bufs[0]._data.keys() if bufs else []
+        columns = {
+            name: np.concatenate([b.column(name) for b in bufs]) for name in names
+        }
+        vehicle_idx = np.repeat(np.arange(len(bufs), dtype=np.int32), sizes)
+        return cls(vehicle_ids=vehicle_ids, vehicle_idx=vehicle_idx, columns=columns)
+
+
+@dataclass
+class FleetFeatures:
+    """Feature matrix (one row per vehicle, FEATURE_NAMES columns)."""
+
+    vehicle_ids: List[str]
+    feature_names: List[str]
+    matrix: np.ndarray
+    # Per vehicle, index into the FleetTelematics rows of its newest row
+    latest_rows: Optional[np.ndarray] = None
+
+    def index_of(self, vehicle_id: str) -> int:
+        return self.vehicle_ids.index(vehicle_id)
+
+    def row(self, vehicle_id: str) -> Dict[str, float]:
+        values = self.matrix[self.index_of(vehicle_id)]
+        return dict(zip(self.feature_names, values.tolist()))
+
+    def to_dicts(self) -> Dict[str, Dict[str, float]]:
+        return {
+            vid: dict(zip(self.feature_names, values))
+            for vid, values in zip(self.vehicle_ids, self.matrix.tolist())
+        }
+
+
+def last_replacement_odometers(
+    vehicle_ids: List[str],
+    maintenance_by_vehicle: Union[Dict[str, List[MaintenanceRecord]], FleetMaintenanceIndex],
+) -> Dict[str, np.ndarray]:
+    """Per component, odometer of the latest replacement per vehicle (0 if none)."""
+    if not isinstance(maintenance_by_vehicle, FleetMaintenanceIndex):
+        maintenance_by_vehicle = FleetMaintenanceIndex.bulk_load(maintenance_by_vehicle)
+    return maintenance_by_vehicle.last_replacement_odometers(vehicle_ids, REPLACEMENT_COMPONENTS)
+
+
+def _masked_mean(x: np.ndarray, mask: np.ndarray, starts: np.ndarray, n: np.ndarray) -> np.ndarray:
+    return np.add.reduceat(np.where(mask, x, 0), starts).astype(np.float64) / n
+
+
+def compute_fleet_features(
+    fleet: FleetTelematics,
+    last_replacement_odo: Optional[Dict[str, np.ndarray]] = None,
+    num_trips: int = 5,
+) -> FleetFeatures:
+    """
+    Windowed features for every vehicle in `fleet` in one pass:
+    - rolling 7-day window
+    - rolling 500 km window
+    - last 50 events
+    - last `num_trips` trips
+
+    `last_replacement_odo` maps component -> array aligned with
+    fleet.vehicle_ids (see last_replacement_odometers). Vehicles without
+    rows are left out of the result.
+    """
+    if len(fleet) == 0:
+        return FleetFeatures([], list(FEATURE_NAMES), np.zeros((0, len(FEATURE_NAMES))))
+
+    cols = fleet.columns
+    vidx = fleet.vehicle_idx
+    ts = cols["ts_us"]
+
+    # Rows already grouped by vehicle in timestamp order (fleet_dataset
+    # files, from_buffers) are used as they are, without sorting.
+    same_vehicle = vidx[1:] == vidx[:-1]
+    in_order = bool(
+        np.all(vidx[1:] >= vidx[:-1]) and np.all(~same_vehicle | (ts[1:] >= ts[:-1]))
+    )
+    order = None if in_order else np.lexsort((ts, vidx))
+
+    def col(name: str) -> np.ndarray:
+        return cols[name] if order is None else cols[name][order]
+
+    vidx = vidx if order is None else vidx[order]
+    ts = col("ts_us")
+    odo = col("odometer_km")
+    speed = col("speed_kmph")
+    brake = col("brake_pedal_pressure")
+    coolant = col("engine_coolant_temp_c")
+    hard_brakes = col("hard_brake_events_last_10min").astype(np.int64)
+    harsh_events = hard_brakes + col("harsh_accel_events_last_10min")
+
+    # Segments: one contiguous run of rows per vehicle
+    starts = np.flatnonzero(np.r_[True, vidx[1:] != vidx[:-1]])
+    counts = np.diff(np.r_[starts, len(vidx)])
+    ends = starts + counts
+    seg = np.repeat(np.arange(len(starts)), counts)
+    pos = np.arange(len(vidx)) - starts[seg]
+    latest_odo = odo[ends - 1]
+
+    # ---- 7-day window (suffix of each segment) ----
+    in_7d = ts >= (ts[ends - 1] - 7 * US_PER_DAY)[seg]
+    n_7d = np.add.reduceat(in_7d, starts)
+    w7d_harsh = np.add.reduceat(np.where(in_7d, harsh_events, 0), starts)
+    w7d_overheat = np.add.reduceat(in_7d & (coolant > 105), starts)
+    w7d_max_coolant = np.maximum.reduceat(np.where(in_7d, coolant, -np.inf), starts)
+    w7d_dtc = np.add.reduceat(np.where(in_7d, col("dtc_count"), 0), starts)
+    w7d_speed = _masked_mean(speed, in_7d, starts, n_7d)
+    is_city = col("driving_mode") == DRIVING_MODES.code("city")
+    w7d_city = np.add.reduceat(in_7d & is_city, starts) / n_7d
+
+    # ---- 500 km window (rows within 500 km of the highest odometer) ----
+    max_odo = np.maximum.reduceat(odo, starts)
+    in_500 = odo >= np.maximum(max_odo - 500.0, 0.0)[seg]
+    n_500 = np.add.reduceat(in_500, starts)
+    km_500 = max_odo - np.minimum.reduceat(np.where(in_500, odo, np.inf), starts)
+    w500_hard = np.add.reduceat(np.where(in_500, hard_brakes, 0), starts)
+    low_tire = (
+        (col("tire_pressure_fl_psi") < 30)
+        | (col("tire_pressure_fr_psi") < 30)
+        | (col("tire_pressure_rl_psi") < 30)
+        | (col("tire_pressure_rr_psi") < 30)
+    )
+
+    # ---- last 50 events ----
+    in_50 = pos >= (counts - 50)[seg]
+    n_50 = np.add.reduceat(in_50, starts)
+
+    # ---- last trips (trips.segment_trips rules) ----
+    trips = segment_trips(ts, speed, odo, brake, harsh_events, segment=seg)
+    last_trips = trips.last_per_segment(num_trips)
+    trip_seg = trips.segment[last_trips]
+    trips_per_seg = np.bincount(trip_seg, minlength=len(starts))
+    with np.errstate(invalid="ignore"):
+        trip_brake_avg = np.bincount(
+            trip_seg, trips.max_brake_pressure[last_trips], len(starts)
+        ) / trips_per_seg
+        trip_harsh_avg = np.bincount(trip_seg, trips.harsh_index[last_trips], len(starts)) / trips_per_seg
+    # Vehicles without any trip get 0.0, as in _assemble_features
+    trip_brake_avg = np.where(trips_per_seg > 0, trip_brake_avg, 0.0)
+    trip_harsh_avg = np.where(trips_per_seg > 0, trip_harsh_avg, 0.0)
+
+    # ---- maintenance ----
+    seg_vehicle = vidx[starts]
+    km_since: Dict[str, np.ndarray] = {}
+    for component in REPLACEMENT_COMPONENTS:
+        if last_replacement_odo is None:
+            last = np.zeros(len(starts))
+        else:
+            last = last_replacement_odo[component][seg_vehicle]
+        km_since[component] = np.where(
+            last == 0, latest_odo, np.maximum(latest_odo - last, 0.0)
+        )
+
+    features = {
+        "latest_odometer_km": latest_odo,
+        "hard_brakes_per_100km": w500_hard / np.maximum(km_500, 1.0) * 100.0,
+        "avg_brake_pressure": _masked_mean(brake, in_500, starts, n_500),
+        "avg_battery_voltage_v": _masked_mean(col("battery_voltage_v"), in_500, starts, n_500),
+        "low_tire_pressure_ratio": np.add.reduceat(in_500 & low_tire, starts) / n_500,
+        "overheat_events": w7d_overheat,
+        "max_coolant_temp_c": w7d_max_coolant,
+        "dtc_count": w7d_dtc,
+        "harsh_accel_braking_index": w7d_harsh / n_7d,
+        "km_since_last_brake_change": km_since["brake_pad"],
+        "km_since_last_battery_change": km_since["battery"],
+        "w7d_avg_speed_kmph": w7d_speed,
+        "w7d_city_ratio": w7d_city,
+        "w500_avg_speed_kmph": _masked_mean(speed, in_500, starts, n_500),
+        "w50_avg_speed_kmph": _masked_mean(speed, in_50, starts, n_50),
+        "trip_max_brake_pressure_avg": trip_brake_avg,
+        "trip_harsh_index_avg": trip_harsh_avg,
+    }
+
+    matrix = np.column_stack([np.asarray(features[name], dtype=np.float64) for name in FEATURE_NAMES])
+    latest_rows = ends - 1 if order is None else order[ends - 1]
+    return FleetFeatures(
+        vehicle_ids=[fleet.vehicle_ids[i] for i in seg_vehicle],
+        feature_names=list(FEATURE_NAMES),
+        matrix=matrix,
+        latest_rows=latest_rows,
+    )
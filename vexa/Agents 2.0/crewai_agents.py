@@ -8,21 +8,30 @@ Instead we prepare text context (health summary, DTC context, alerts)
 and feed it into the agents' prompts.
 """
 
-from typing import List
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List
 import os
 
-from crewai import Agent, Task, Crew
-from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
 
 from models import HealthSummary
 from rag_dtc_tool import dtc_rag_lookup
 from alerts import build_bilingual_alert
 
+if TYPE_CHECKING:
+    from crewai import Agent, Crew
+    from langchain_openai import ChatOpenAI
+
 load_dotenv()
 
+# crewai / langchain are imported inside the builders below: the text
+# helpers (used by DiagnosisAgentLLM) must not pay for loading them.
+
 
 def build_llm() -> ChatOpenAI:
+    from langchain_openai import ChatOpenAI
+
     api_key = os.getenv("OPENAI_API_KEY")
     model_name = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 
@@ -82,6 +91,8 @@ def bilingual_alerts_text(summary: HealthSummary) -> str:
 
 
 def build_diagnosis_agent() -> Agent:
+    from crewai import Agent
+
     return Agent(
         role="Diagnosis Agent",
         goal=(
@@ -98,6 +109,8 @@ def build_diagnosis_agent() -> Agent:
 
 
 def build_customer_engagement_agent() -> Agent:
+    from crewai import Agent
+
     return Agent(
         role="Customer Engagement Agent",
         goal=(
@@ -117,6 +130,8 @@ def build_diagnostics_crew(
     health_summary: HealthSummary,
     dtc_codes: List[str],
 ) -> Crew:
+    from crewai import Crew, Task
+
     diagnosis_agent = build_diagnosis_agent()
     customer_agent = build_customer_engagement_agent()
 
@@ -1,4 +1,4 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Union
 
 from models import (
     TelematicsEvent,
@@ -6,15 +6,29 @@ from models import (
     HealthSummary,
     DemandForecast,
 )
-from feature_engineering import compute_windowed_features
-from health_scoring import compute_all_components
+from feature_engineering import compute_windowed_features, compute_streaming_features
+from health_scoring import (
+    DEFAULT_PARAMS,
+    HealthModelParams,
+    compute_all_components,
+    score_batch,
+)
 from demand_forecasting import forecast_demand_for_center
 from window_store import TelematicsWindowManager
+from health_memo import HealthMemo
+from maintenance_index import FleetMaintenanceIndex, MaintenanceHistory
+from telematics_buffer import TelematicsRingBuffer
+from timestamps import epoch_us_to_iso
+from batch_features import (
+    FleetTelematics,
+    compute_fleet_features,
+    last_replacement_odometers,
+)
 
 
 def run_data_analysis_batch(
     telematics_events: List[TelematicsEvent],
-    maintenance_history: List[MaintenanceRecord],
+    maintenance_history: MaintenanceHistory,
 ) -> HealthSummary:
     if not telematics_events:
         raise ValueError("No telematics events provided")
@@ -31,22 +45,101 @@ def run_data_analysis_batch(
     )
 
 
+def _score(
+    vehicle_id: str,
+    timestamp: str,
+    features: Dict[str, float],
+    memo: Optional[HealthMemo],
+) -> HealthSummary:
+    if memo is not None:
+        cached = memo.lookup(vehicle_id, features, timestamp)
+        if cached is not None:
+            return cached
+
+    summary = HealthSummary(
+        vehicle_id=vehicle_id,
+        timestamp=timestamp,
+        component_health=compute_all_components(features),
+    )
+    if memo is not None:
+        memo.store(vehicle_id, features, summary)
+    return summary
+
+
 def run_data_analysis_streaming(
     event: TelematicsEvent,
-    maintenance_history: List[MaintenanceRecord],
+    maintenance_history: MaintenanceHistory,
     window_manager: TelematicsWindowManager,
+    memo: Optional[HealthMemo] = None,
 ) -> HealthSummary:
     store = window_manager.add_event(event)
-    events = store.get_events()
-    features = compute_windowed_features(events, maintenance_history)
-    component_scores = compute_all_components(features)
+    features = compute_streaming_features(store, maintenance_history)
+    return _score(event.vehicle_id, event.timestamp, features, memo)
 
-    return HealthSummary(
-        vehicle_id=event.vehicle_id,
-        timestamp=event.timestamp,
-        component_health=component_scores,
+
+def run_data_analysis_from_buffer(
+    buffer: TelematicsRingBuffer,
+    since_seq: int,
+    maintenance_history: MaintenanceHistory,
+    window_manager: TelematicsWindowManager,
+    memo: Optional[HealthMemo] = None,
+) -> Optional[HealthSummary]:
+    """
+    Streaming analysis for all rows of `buffer` with seq >= since_seq,
+    scored once after the last row. Returns None if there is nothing new.
+    With a memo, a summary whose features did not move is reused.
+    """
+    if buffer.end_seq <= max(since_seq, buffer.start_seq):
+        return None
+
+    store = window_manager.add_from_buffer(buffer, since_seq)
+    features = compute_streaming_features(store, maintenance_history)
+    return _score(
+        buffer.vehicle_id, buffer.timestamp_iso(buffer.end_seq - 1), features, memo
+    )
+
+
+def run_data_analysis_fleet(
+    buffers: Union[Dict[str, TelematicsRingBuffer], FleetTelematics],
+    maintenance_by_vehicle: Optional[
+        Union[Dict[str, List[MaintenanceRecord]], FleetMaintenanceIndex]
+    ] = None,
+    params: HealthModelParams = DEFAULT_PARAMS,
+) -> List[HealthSummary]:
+    """
+    Batch analysis for many vehicles at once (e.g. nightly re-scoring).
+    Features and scores come from vectorized passes over the whole fleet.
+
+    `buffers` may also be a FleetTelematics, e.g. a dataset opened with
+    fleet_dataset.open_fleet_dataset(). Without maintenance history every
+    vehicle counts as never having had a replacement.
+    """
+    if isinstance(buffers, FleetTelematics):
+        fleet = buffers
+    else:
+        fleet = FleetTelematics.from_buffers(buffers)
+    last_odo = None
+    if maintenance_by_vehicle is not None:
+        last_odo = last_replacement_odometers(fleet.vehicle_ids, maintenance_by_vehicle)
+    fleet_features = compute_fleet_features(fleet, last_odo)
+    scores = score_batch(
+        fleet_features.matrix, fleet_features.feature_names, fleet_features.vehicle_ids, params
     )
 
+    ts_us = fleet.columns.get("ts_us")
+    ts_offset = fleet.columns.get("ts_offset_min")
+    summaries: List[HealthSummary] = []
+    for row, vid in enumerate(scores.vehicle_ids):
+        latest = int(fleet_features.latest_rows[row])
+        summaries.append(
+            HealthSummary(
+                vehicle_id=vid,
+                timestamp=epoch_us_to_iso(ts_us[latest], ts_offset[latest]),
+                component_health=scores.to_health_scores(row),
+            )
+        )
+    return summaries
+
 
 def run_demand_forecast(
     center_ids: List[str],
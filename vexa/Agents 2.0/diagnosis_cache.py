@@ -0,0 +1,157 @@
+"""
+Two-tier cache for LLM diagnosis reports.
+
+The key is a hash of the health summary as the diagnosis prompt sees it,
+with the timestamp dropped, scores rounded to the prompt's precision and
+eta_km bucketed, plus the sorted DTC codes and the model name. Lookups hit
+an in-memory LRU first, then an SQLite table; both honour the TTL. The
+table lives in the file DIAGNOSIS_CACHE_DB names; without it the cache is
+memory-only.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from models import HealthSummary
+
+DEFAULT_DB_PATH = os.getenv("DIAGNOSIS_CACHE_DB")
+DEFAULT_TTL_SECONDS = 6 * 3600
+DEFAULT_MAX_ENTRIES = 1024
+ETA_BUCKET_KM = 500.0
+
+
+def canonical_summary(summary: HealthSummary) -> List[Tuple]:
+    """Components in a fixed order, quantized like the prompt text (2 decimals)."""
+    rows = []
+    for c in sorted(summary.component_health, key=lambda h: h.component):
+        eta = None if c.eta_km is None else int(c.eta_km // ETA_BUCKET_KM)
+        rows.append((c.component, round(c.health_score, 2), c.risk_level, eta))
+    return rows
+
+
+def diagnosis_key(summary: HealthSummary, dtc_codes: List[str], model: str = "") -> str:
+    payload = {
+        "model": model,
+        "vehicle_id": summary.vehicle_id,
+        "components": canonical_summary(summary),
+        "dtc_codes": sorted(set(dtc_codes)),
+    }
+    blob = json.dumps(payload, separators=(",", ":"), sort_keys=True)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class DiagnosisCache:
+    """
+    In-memory LRU (max_entries) in front of an SQLite table (db_path, or
+    memory only if db_path is None). Entries older than ttl_seconds are
+    treated as missing.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = DEFAULT_DB_PATH,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lru: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self.conn: Optional[sqlite3.Connection] = None
+        if db_path is not None:
+            self.conn = sqlite3.connect(db_path, check_same_thread=False)
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS diagnosis_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    report TEXT,
+                    created_at REAL
+                )
+                """
+            )
+            self.conn.commit()
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries_in_memory": len(self._lru),
+        }
+
+    def _remember(self, key: str, created_at: float, report: str) -> None:
+        self._lru[key] = (created_at, report)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                if now - entry[0] <= self.ttl_seconds:
+                    self._lru.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry[1]
+                del self._lru[key]
+
+            if self.conn is not None:
+                row = self.conn.execute(
+                    "SELECT report, created_at FROM diagnosis_cache WHERE cache_key = ? AND created_at >= ?",
+                    (key, now - self.ttl_seconds),
+                ).fetchone()
+                if row is not None:
+                    self._remember(key, row[1], row[0])
+                    self.disk_hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, report: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, report)
+            if self.conn is not None:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO diagnosis_cache (cache_key, report, created_at) VALUES (?, ?, ?)",
+                    (key, report, now),
+                )
+                self.conn.commit()
+
+    def get_or_compute(self, key: str, compute: Callable[[], str]) -> str:
+        report = self.get(key)
+        if report is None:
+            report = compute()
+            self.put(key, report)
+        return report
+
+    def purge_expired(self) -> int:
+        """Delete expired rows from SQLite; returns how many were removed."""
+        if self.conn is None:
+            return 0
+        with self._lock:
+            cur = self.conn.execute(
+                "DELETE FROM diagnosis_cache WHERE created_at < ?",
+                (time.time() - self.ttl_seconds,),
+            )
+            self.conn.commit()
+            return cur.rowcount
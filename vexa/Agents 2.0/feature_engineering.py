@@ -1,69 +1,22 @@
-from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 
-from models import TelematicsEvent, MaintenanceRecord
+import numpy as np
 
+from maintenance_index import MaintenanceHistory, as_maintenance_index
+from models import TelematicsEvent
+from telematics_buffer import DRIVING_MODES, TelematicsRingBuffer
+from timestamps import US_PER_DAY
+from trips import TripDetector, TripSummary, segment_trips
+from window_index import EventWindowIndex
+from window_store import VehicleWindowStore
 
-def _parse_ts(ts: str) -> datetime:
-    return datetime.fromisoformat(ts)
 
+def _trip_stats(trips: List[TripSummary]) -> Tuple[List[float], List[float]]:
+    """Per-trip max brake pressure and harsh index."""
+    return [t.max_brake_pressure for t in trips], [t.harsh_index for t in trips]
 
-def _km_since_last_replacement(
-    history: List[MaintenanceRecord],
-    latest_odometer: float,
-    component: str,
-) -> float:
-    last_odo = 0.0
-    for r in history:
-        for part in r.parts_replaced:
-            if part.component == component and r.odometer_km > last_odo:
-                last_odo = r.odometer_km
-    if last_odo == 0:
-        return latest_odometer
-    return max(latest_odometer - last_odo, 0.0)
 
-
-def _window_by_time(events: List[TelematicsEvent], days: int) -> List[TelematicsEvent]:
-    if not events:
-        return []
-    events_sorted = sorted(events, key=lambda e: e.timestamp)
-    latest_ts = _parse_ts(events_sorted[-1].timestamp)
-    cutoff = latest_ts - timedelta(days=days)
-    return [e for e in events_sorted if _parse_ts(e.timestamp) >= cutoff]
-
-
-def _window_by_distance(
-    events: List[TelematicsEvent],
-    km_window: float,
-) -> List[TelematicsEvent]:
-    if not events:
-        return []
-    events_sorted = sorted(events, key=lambda e: e.odometer_km)
-    latest_odo = events_sorted[-1].odometer_km
-    min_odo = max(latest_odo - km_window, 0.0)
-    return [e for e in events_sorted if e.odometer_km >= min_odo]
-
-
-def _window_last_n_events(
-    events: List[TelematicsEvent],
-    n: int,
-) -> List[TelematicsEvent]:
-    return events[-n:] if len(events) > n else events[:]
-
-
-def _approx_last_trips(events: List[TelematicsEvent], num_trips: int = 5) -> List[List[TelematicsEvent]]:
-    """Crude approximation: treat blocks of events as trips."""
-    if not events:
-        return []
-    events_sorted = sorted(events, key=lambda e: e.timestamp)
-    block_size = max(1, len(events_sorted) // (num_trips * 2))
-    trips: List[List[TelematicsEvent]] = []
-    for i in range(0, len(events_sorted), block_size):
-        trips.append(events_sorted[i: i + block_size])
-    return trips[-num_trips:]
-
-
-def _aggregate_basic_stats(events: List[TelematicsEvent]) -> Dict[str, float]:
+def _aggregate_basic_stats(events: Sequence[TelematicsEvent]) -> Dict[str, float]:
     if not events:
         return {}
 
@@ -132,8 +85,8 @@ def _aggregate_basic_stats(events: List[TelematicsEvent]) -> Dict[str, float]:
 
 
 def compute_windowed_features(
-    events: List[TelematicsEvent],
-    history: List[MaintenanceRecord],
+    events: Union[List[TelematicsEvent], EventWindowIndex],
+    history: MaintenanceHistory,
 ) -> Dict[str, float]:
     """
     Compute features using:
@@ -141,41 +94,214 @@ def compute_windowed_features(
     - rolling 500 km window
     - last 50 events
     - last 5 trips
+
+    `events` may be a prebuilt EventWindowIndex; windows are then
+    bisected out of it without sorting.
     """
-    if not events:
+    if not len(events):
         raise ValueError("No events provided")
 
-    events_sorted = sorted(events, key=lambda e: e.timestamp)
-    latest = events_sorted[-1]
-    latest_odo = latest.odometer_km
+    index = events if isinstance(events, EventWindowIndex) else EventWindowIndex(events)
+    latest_odo = index.latest().odometer_km
+
+    win_7d = index.by_time(days=7)
+    win_500km = index.by_distance(km_window=500.0)
+    win_50 = index.last_n(50)
 
-    win_7d = _window_by_time(events_sorted, days=7)
-    win_500km = _window_by_distance(events_sorted, km_window=500.0)
-    win_50 = _window_last_n_events(events_sorted, n=50)
-    trips = _approx_last_trips(events_sorted, num_trips=5)
+    detector = TripDetector()
+    for e in index.time_ordered():
+        detector.add_event(e)
+    trip_max_brake, trip_harsh_indexes = _trip_stats(detector.last_trips(5))
 
     stats_7d = _aggregate_basic_stats(win_7d)
     stats_500 = _aggregate_basic_stats(win_500km)
     stats_50 = _aggregate_basic_stats(win_50)
 
-    trip_max_brake = []
-    trip_harsh_indexes = []
-    for t in trips:
-        s = _aggregate_basic_stats(t)
-        if s:
-            trip_max_brake.append(s["max_brake_pressure"])
-            trip_harsh_indexes.append(s["harsh_accel_braking_index"])
+    return _assemble_features(
+        latest_odo, stats_7d, stats_500, stats_50, trip_max_brake, trip_harsh_indexes, history
+    )
+
+
+# ----------------------------------------------------------------------
+# Columnar (TelematicsRingBuffer) variants
+# ----------------------------------------------------------------------
+_STAT_COLUMNS = [
+    "speed_kmph",
+    "brake_pedal_pressure",
+    "engine_coolant_temp_c",
+    "engine_oil_temp_c",
+    "engine_rpm",
+    "battery_voltage_v",
+    "hard_brake_events_last_10min",
+    "harsh_accel_events_last_10min",
+    "dtc_count",
+    "driving_mode",
+    "tire_pressure_fl_psi",
+    "tire_pressure_fr_psi",
+    "tire_pressure_rl_psi",
+    "tire_pressure_rr_psi",
+]
+
+
+def _column_stats(cols: Dict[str, np.ndarray], km_covered: float) -> Dict[str, float]:
+    """Vectorized _aggregate_basic_stats over already-windowed columns."""
+    n = len(cols["speed_kmph"])
+    if n == 0:
+        return {}
+
+    brake = cols["brake_pedal_pressure"]
+    coolant = cols["engine_coolant_temp_c"]
+    rpm = cols["engine_rpm"]
+    hard_brakes = int(cols["hard_brake_events_last_10min"].sum())
+    harsh_accel = int(cols["harsh_accel_events_last_10min"].sum())
+
+    low_pressure = (
+        (cols["tire_pressure_fl_psi"] < 30)
+        | (cols["tire_pressure_fr_psi"] < 30)
+        | (cols["tire_pressure_rl_psi"] < 30)
+        | (cols["tire_pressure_rr_psi"] < 30)
+    )
+    km_covered = max(km_covered, 1.0)
+
+    return {
+        "avg_speed_kmph": float(cols["speed_kmph"].sum()) / n,
+        "avg_brake_pressure": float(brake.sum()) / n,
+        "avg_coolant_temp_c": float(coolant.sum()) / n,
+        "avg_oil_temp_c": float(cols["engine_oil_temp_c"].sum()) / n,
+        "avg_rpm": float(rpm.sum()) / n,
+        "avg_battery_voltage_v": float(cols["battery_voltage_v"].sum()) / n,
+        "max_brake_pressure": float(brake.max()),
+        "max_coolant_temp_c": float(coolant.max()),
+        "max_rpm": float(rpm.max()),
+        "hard_brakes_per_100km": (hard_brakes / km_covered) * 100.0,
+        "city_ratio": int(np.count_nonzero(cols["driving_mode"] == DRIVING_MODES.code("city"))) / n,
+        "overheat_events": float(np.count_nonzero(coolant > 105)),
+        "low_tire_pressure_ratio": int(np.count_nonzero(low_pressure)) / n,
+        "harsh_accel_braking_index": (hard_brakes + harsh_accel) / n,
+        "dtc_count": float(cols["dtc_count"].sum()),
+    }
+
+
+def _column_trip_stats(
+    cols: Dict[str, np.ndarray],
+    num_trips: int = 5,
+) -> Tuple[List[float], List[float]]:
+    """Per-trip max brake pressure and harsh index of the last trips in time-ordered columns."""
+    table = segment_trips(
+        cols["ts_us"],
+        cols["speed_kmph"],
+        cols["odometer_km"],
+        cols["brake_pedal_pressure"],
+        cols["hard_brake_events_last_10min"] + cols["harsh_accel_events_last_10min"].astype(np.int32),
+    )
+    last = slice(max(len(table) - num_trips, 0), None)
+    return table.max_brake_pressure[last].tolist(), table.harsh_index[last].tolist()
 
-    max_brake_per_trip_avg = sum(trip_max_brake) / len(trip_max_brake) if trip_max_brake else 0.0
-    harsh_index_last_trips_avg = sum(trip_harsh_indexes) / len(trip_harsh_indexes) if trip_harsh_indexes else 0.0
 
-    km_since_brake_change = _km_since_last_replacement(
-        history, latest_odo, component="brake_pad"
+def compute_buffer_features(
+    buffer: TelematicsRingBuffer,
+    history: MaintenanceHistory,
+    trips: Optional[List[TripSummary]] = None,
+) -> Dict[str, float]:
+    """
+    compute_windowed_features over a columnar buffer, using array slices.
+    Trips are segmented from the buffer unless already known (`trips`).
+    """
+    if not len(buffer):
+        raise ValueError("No events provided")
+
+    ts = buffer.column("ts_us")
+    order = None
+    if len(ts) > 1 and np.any(ts[1:] < ts[:-1]):
+        order = np.argsort(ts, kind="stable")
+
+    def col(name: str) -> np.ndarray:
+        c = buffer.column(name)
+        return c if order is None else c[order]
+
+    cols = {name: col(name) for name in _STAT_COLUMNS}
+    ts = col("ts_us")
+    odo = col("odometer_km")
+    latest_odo = float(odo[-1])
+
+    # 7-day window: suffix of the time-ordered rows
+    start = int(np.searchsorted(ts, ts[-1] - 7 * US_PER_DAY, side="left"))
+    stats_7d = _column_stats(
+        {k: v[start:] for k, v in cols.items()}, float(odo[-1] - odo[start])
     )
-    km_since_battery_change = _km_since_last_replacement(
-        history, latest_odo, component="battery"
+
+    # 500 km window: rows within 500 km of the highest odometer
+    mask = odo >= max(float(odo.max()) - 500.0, 0.0)
+    win_odo = odo[mask]
+    stats_500 = _column_stats(
+        {k: v[mask] for k, v in cols.items()}, float(win_odo.max() - win_odo.min())
+    )
+
+    # Last 50 events
+    start_50 = max(len(odo) - 50, 0)
+    stats_50 = _column_stats(
+        {k: v[start_50:] for k, v in cols.items()}, float(odo[-1] - odo[start_50])
+    )
+
+    if trips is None:
+        trip_max_brake, trip_harsh_indexes = _column_trip_stats(
+            dict(cols, ts_us=ts, odometer_km=odo)
+        )
+    else:
+        trip_max_brake, trip_harsh_indexes = _trip_stats(trips)
+
+    return _assemble_features(
+        latest_odo, stats_7d, stats_500, stats_50, trip_max_brake, trip_harsh_indexes, history
     )
 
+
+def compute_streaming_features(
+    store: VehicleWindowStore,
+    history: MaintenanceHistory,
+) -> Dict[str, float]:
+    """
+    Same features as compute_windowed_features, read from the store's
+    running aggregates instead of rescanning the window.
+
+    Falls back to the columnar computation when events arrived out of order.
+    Trip features come from the store's trip detector either way.
+    """
+    buffer = store.buffer
+    if not len(buffer):
+        raise ValueError("No events provided")
+    trips = store.trips.last_trips(5)
+    if not store.is_ordered():
+        return compute_buffer_features(buffer, history, trips)
+
+    trip_max_brake, trip_harsh_indexes = _trip_stats(trips)
+
+    return _assemble_features(
+        float(buffer.column("odometer_km")[-1]),
+        store.time_stats.snapshot(),
+        store.distance_stats.snapshot(),
+        store.recent_stats.snapshot(),
+        trip_max_brake,
+        trip_harsh_indexes,
+        history,
+    )
+
+
+def _assemble_features(
+    latest_odo: float,
+    stats_7d: Dict[str, float],
+    stats_500: Dict[str, float],
+    stats_50: Dict[str, float],
+    trip_max_brake: List[float],
+    trip_harsh_indexes: List[float],
+    history: MaintenanceHistory,
+) -> Dict[str, float]:
+    max_brake_per_trip_avg = sum(trip_max_brake) / len(trip_max_brake) if trip_max_brake else 0.0
+    harsh_index_last_trips_avg = sum(trip_harsh_indexes) / len(trip_harsh_indexes) if trip_harsh_indexes else 0.0
+
+    maintenance = as_maintenance_index(history)
+    km_since_brake_change = maintenance.km_since_last_replacement("brake_pad", latest_odo)
+    km_since_battery_change = maintenance.km_since_last_replacement("battery", latest_odo)
+
     return {
         "latest_odometer_km": latest_odo,
         "hard_brakes_per_100km": stats_500.get("hard_brakes_per_100km", 0.0),
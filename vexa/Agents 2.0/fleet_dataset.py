@@ -0,0 +1,283 @@
+"""
+Vectorized synthetic fleet telematics for load and soak tests.
+
+generate_fleet_chunk() draws the same distributions as
+synthetic_data.generate_telematics_stream, for a block of vehicles at a
+time, with a numpy Generator and straight into TelematicsRingBuffer
+columns. write_fleet_dataset() streams the blocks into a directory with
+one .npy file per column plus meta.json:
+
+    <path>/meta.json         vehicle ids, rows per vehicle, code tables
+    <path>/<column>.npy      rows ordered by (vehicle, timestamp)
+
+open_fleet_dataset() memory-maps the columns back as a FleetTelematics,
+which compute_fleet_features / run_data_analysis_fleet replay without
+copying. vehicle_buffers() loads it into per-vehicle ring buffers for
+the streaming path.
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from batch_features import FleetTelematics
+from telematics_buffer import (
+    DRIVING_MODES,
+    DTC_CODES,
+    MAX_DTC_PER_EVENT,
+    NO_CODE,
+    TelematicsRingBuffer,
+)
+from timestamps import NAIVE_TS, datetime_to_epoch_us
+
+FORMAT_VERSION = 1
+META_FILE = "meta.json"
+
+# Rows generated per block; bounds memory while writing large datasets
+CHUNK_ROWS = 1_000_000
+
+DTC_POOL = ["P0300", "P0420", "P0171", "U0100"]
+DTC_RATE = 0.03
+CITY_RATE = 0.6
+
+# Uniform ranges used by generate_telematics_stream
+UNIFORM_RANGES: Dict[str, Tuple[float, float]] = {
+    "speed_kmph": (0, 110),
+    "accel_longitudinal": (-3, 3),
+    "brake_pedal_pressure": (0, 100),
+    "steering_angle_deg": (-45, 45),
+    "engine_coolant_temp_c": (75, 110),
+    "engine_oil_temp_c": (80, 120),
+    "battery_voltage_v": (11.8, 13.8),
+    "fuel_level_pct": (10, 100),
+    "ambient_temp_c": (10, 45),
+    "tire_pressure_fl_psi": (28, 36),
+    "tire_pressure_fr_psi": (28, 36),
+    "tire_pressure_rl_psi": (28, 36),
+    "tire_pressure_rr_psi": (28, 36),
+}
+
+
+def fleet_vehicle_ids(num_vehicles: int, prefix: str = "LT") -> List[str]:
+    return [f"{prefix}-{i:06d}" for i in range(num_vehicles)]
+
+
+def column_specs() -> Dict[str, Tuple[np.dtype, Tuple[int, ...]]]:
+    """dtype and per-row shape of every ring buffer column."""
+    return {
+        name: (arr.dtype, arr.shape[1:])
+        for name, arr in TelematicsRingBuffer._allocate(1).items()
+    }
+
+
+def generate_fleet_chunk(
+    rng: np.random.Generator,
+    num_vehicles: int,
+    rows_per_vehicle: int,
+    start_us: int,
+    interval_us: int,
+) -> Dict[str, np.ndarray]:
+    """
+    Columns for num_vehicles * rows_per_vehicle rows, vehicle-major.
+    Codes use this process's DRIVING_MODES / DTC_CODES tables.
+    """
+    shape = (num_vehicles, rows_per_vehicle)
+    n = num_vehicles * rows_per_vehicle
+    cols: Dict[str, np.ndarray] = {}
+
+    start_odo = rng.uniform(10000, 60000, size=(num_vehicles, 1))
+    odometer = start_odo + np.cumsum(rng.uniform(0.1, 2.5, size=shape), axis=1)
+    cols["odometer_km"] = odometer.reshape(n)
+    cols["engine_hours"] = 100 + cols["odometer_km"] / 40.0
+    for name, (low, high) in UNIFORM_RANGES.items():
+        cols[name] = rng.uniform(low, high, size=n)
+
+    cols["engine_rpm"] = rng.uniform(800, 4500, size=n).astype(np.int32)
+    cols["hard_brake_events_last_10min"] = rng.integers(0, 5, size=n, dtype=np.int16)
+    cols["harsh_accel_events_last_10min"] = rng.integers(0, 5, size=n, dtype=np.int16)
+
+    ts = start_us + np.arange(rows_per_vehicle, dtype=np.int64) * interval_us
+    cols["ts_us"] = np.tile(ts, num_vehicles)
+    cols["ts_offset_min"] = np.full(n, NAIVE_TS, dtype=np.int16)
+
+    city, highway = DRIVING_MODES.intern("city"), DRIVING_MODES.intern("highway")
+    cols["driving_mode"] = np.where(rng.random(n) < CITY_RATE, city, highway).astype(np.int16)
+
+    pool = np.array([DTC_CODES.intern(code) for code in DTC_POOL], dtype=np.int16)
+    has_dtc = rng.random(n) < DTC_RATE
+    dtc_codes = np.full((n, MAX_DTC_PER_EVENT), NO_CODE, dtype=np.int16)
+    dtc_codes[has_dtc, 0] = pool[rng.integers(0, len(pool), size=int(has_dtc.sum()))]
+    cols["dtc_codes"] = dtc_codes
+    cols["dtc_count"] = has_dtc.astype(np.int8)
+
+    # Random version-4 UUIDs
+    uuids = np.frombuffer(rng.bytes(16 * n), dtype=np.uint8).reshape(n, 16).copy()
+    uuids[:, 6] = (uuids[:, 6] & 0x0F) | 0x40
+    uuids[:, 8] = (uuids[:, 8] & 0x3F) | 0x80
+    cols["event_uuid"] = uuids
+    return cols
+
+
+def _plan(
+    num_vehicles: int,
+    duration_hours: float,
+    sample_interval_s: float,
+    start: Optional[datetime],
+) -> Tuple[int, int, int]:
+    rows_per_vehicle = int(duration_hours * 3600 // sample_interval_s)
+    if num_vehicles <= 0 or rows_per_vehicle <= 0:
+        raise ValueError("Dataset needs at least one vehicle and one sample per vehicle")
+    if start is None:
+        start = datetime.utcnow() - timedelta(hours=duration_hours)
+    start_us, _ = datetime_to_epoch_us(start.replace(tzinfo=None))
+    return rows_per_vehicle, start_us, int(sample_interval_s * 1_000_000)
+
+
+def _chunks(
+    num_vehicles: int, rows_per_vehicle: int, seed: int, chunk_rows: int
+) -> Iterator[Tuple[int, int, np.random.Generator]]:
+    """(first vehicle, vehicle count, generator) per block of vehicles."""
+    per_chunk = max(1, chunk_rows // rows_per_vehicle)
+    for first in range(0, num_vehicles, per_chunk):
+        count = min(per_chunk, num_vehicles - first)
+        yield first, count, np.random.default_rng([seed, first])
+
+
+def generate_fleet_telematics(
+    num_vehicles: int = 100,
+    duration_hours: float = 24.0,
+    sample_interval_s: float = 120.0,
+    seed: int = 0,
+    start: Optional[datetime] = None,
+    chunk_rows: int = CHUNK_ROWS,
+) -> FleetTelematics:
+    """In-memory fleet dataset; same rows as write_fleet_dataset with the same arguments."""
+    rows_per_vehicle, start_us, interval_us = _plan(
+        num_vehicles, duration_hours, sample_interval_s, start
+    )
+    blocks = [
+        generate_fleet_chunk(rng, count, rows_per_vehicle, start_us, interval_us)
+        for _, count, rng in _chunks(num_vehicles, rows_per_vehicle, seed, chunk_rows)
+    ]
+    columns = {name: np.concatenate([b[name] for b in blocks]) for name in blocks[0]}
+    return FleetTelematics(
+        vehicle_ids=fleet_vehicle_ids(num_vehicles),
+        vehicle_idx=np.repeat(np.arange(num_vehicles, dtype=np.int32), rows_per_vehicle),
+        columns=columns,
+    )
+
+
+def write_fleet_dataset(
+    path: str,
+    num_vehicles: int,
+    duration_hours: float = 24.0,
+    sample_interval_s: float = 120.0,
+    seed: int = 0,
+    start: Optional[datetime] = None,
+    chunk_rows: int = CHUNK_ROWS,
+) -> Dict[str, Any]:
+    """
+    Generate the dataset block by block into `path` (created if needed)
+    and return its metadata. Output is deterministic for a given seed,
+    start and chunk_rows.
+    """
+    rows_per_vehicle, start_us, interval_us = _plan(
+        num_vehicles, duration_hours, sample_interval_s, start
+    )
+    total = num_vehicles * rows_per_vehicle
+    os.makedirs(path, exist_ok=True)
+
+    specs = column_specs()
+    files = {
+        name: np.lib.format.open_memmap(
+            os.path.join(path, f"{name}.npy"), mode="w+", dtype=dtype, shape=(total,) + shape
+        )
+        for name, (dtype, shape) in specs.items()
+    }
+    for first, count, rng in _chunks(num_vehicles, rows_per_vehicle, seed, chunk_rows):
+        block = generate_fleet_chunk(rng, count, rows_per_vehicle, start_us, interval_us)
+        lo, hi = first * rows_per_vehicle, (first + count) * rows_per_vehicle
+        for name, arr in files.items():
+            arr[lo:hi] = block[name]
+    for arr in files.values():
+        arr.flush()
+    del files
+
+    meta = {
+        "format": FORMAT_VERSION,
+        "vehicle_ids": fleet_vehicle_ids(num_vehicles),
+        "rows_per_vehicle": rows_per_vehicle,
+        "sample_interval_s": sample_interval_s,
+        "start_us": start_us,
+        "seed": seed,
+        "columns": sorted(specs),
+        # Code tables as of writing, so another process can remap them
+        "driving_modes": [DRIVING_MODES.value(i) for i in range(len(DRIVING_MODES))],
+        "dtc_codes": [DTC_CODES.value(i) for i in range(len(DTC_CODES))],
+    }
+    with open(os.path.join(path, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    return meta
+
+
+def remap_codes(codes: np.ndarray, table: List[str], interner) -> np.ndarray:
+    """File codes -> this process's codes; the array is returned as-is if they agree."""
+    mapping = np.array([interner.intern(v) for v in table], dtype=np.int16)
+    if np.array_equal(mapping, np.arange(len(table))):
+        return codes
+    lookup = np.append(mapping, NO_CODE)  # index -1 (NO_CODE) maps to NO_CODE
+    return lookup[codes]
+
+
+def open_fleet_dataset(path: str, mmap: bool = True) -> FleetTelematics:
+    """
+    Load a write_fleet_dataset() directory. With mmap=True the columns
+    are read-only memory maps, paged in as the analysis touches them.
+    """
+    with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported fleet dataset format: {meta.get('format')!r}")
+
+    mode = "r" if mmap else None
+    columns = {
+        name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode)
+        for name in meta["columns"]
+    }
+    columns["driving_mode"] = remap_codes(columns["driving_mode"], meta["driving_modes"], DRIVING_MODES)
+    columns["dtc_codes"] = remap_codes(columns["dtc_codes"], meta["dtc_codes"], DTC_CODES)
+
+    vehicle_ids = meta["vehicle_ids"]
+    return FleetTelematics(
+        vehicle_ids=vehicle_ids,
+        vehicle_idx=np.repeat(
+            np.arange(len(vehicle_ids), dtype=np.int32), meta["rows_per_vehicle"]
+        ),
+        columns=columns,
+    )
+
+
+def vehicle_buffers(
+    fleet: FleetTelematics, capacity: Optional[int] = None
+) -> Dict[str, TelematicsRingBuffer]:
+    """
+    One ring buffer per vehicle (rows must be grouped by vehicle, as
+    written by write_fleet_dataset). With a capacity only the newest rows
+    of each vehicle are kept.
+    """
+    vidx = np.asarray(fleet.vehicle_idx)
+    starts = np.flatnonzero(np.r_[True, vidx[1:] != vidx[:-1]]) if len(vidx) else []
+    ends = list(starts[1:]) + [len(vidx)]
+
+    buffers: Dict[str, TelematicsRingBuffer] = {}
+    for lo, hi in zip(starts, ends):
+        vid = fleet.vehicle_ids[vidx[lo]]
+        if capacity is not None:
+            lo = max(lo, hi - capacity)
+        buffer = TelematicsRingBuffer(vid, capacity=capacity, initial_rows=hi - lo)
+        buffer.extend_columns({name: col[lo:hi] for name, col in fleet.columns.items()})
+        buffers[vid] = buffer
+    return buffers
@@ -0,0 +1,96 @@
+"""
+Process-pool sharding of the CPU-bound part of the vehicle workflow.
+
+Each shard is a single worker process holding its own MasterAgent, so the
+telematics buffers, window stores and health memos of the vehicles it
+owns stay in that process. A vehicle always goes to shard
+crc32(vehicle_id) % num_shards. The worker runs ingest (features, health,
+urgency) and the CPU stages (driver coaching, vehicle/driver UEBA) and
+sends back only the compact pipeline inputs; the I/O stages (LLM,
+TecDoc, Nylas, DB) are then run by the coordinator's asyncio pipeline.
+
+Shard state is not synchronised with the coordinator's MasterAgent: a
+shard generates and evolves the synthetic history of each vehicle it is
+sent on its own, and never sees telematics pushed to the API (nor does
+the API see the rows shards simulate). Sharded fleet runs are therefore
+batch analyses, separate from the live per-vehicle endpoints. Each
+worker spills to its own shard-<n> subdirectory of the spill dir.
+"""
+
+import asyncio
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from vehicle_state import DEFAULT_SPILL_DIR
+
+_worker_master = None
+
+
+def _init_worker(
+    data_seed: int, history_now: Optional[datetime], spill_dir: Optional[str]
+) -> None:
+    global _worker_master
+    from agents.master_agent import MasterAgent
+
+    _worker_master = MasterAgent(
+        data_seed=data_seed, history_now=history_now, spill_dir=spill_dir, process_shards=0
+    )
+
+
+def _analyze(vehicle_id: str, simulate: bool) -> Dict[str, Any]:
+    result = _worker_master.analyze_vehicle(vehicle_id, simulate)
+    # Hand the UEBA log entries to the coordinator instead of keeping them
+    result["ueba_events"] = _worker_master.ueba.events
+    _worker_master.ueba.events = []
+    return result
+
+
+def shard_of(vehicle_id: str, num_shards: int) -> int:
+    return zlib.crc32(vehicle_id.encode("utf-8")) % num_shards
+
+
+class ShardedAnalyzer:
+    """
+    One single-process pool per shard; processes start on first use.
+    data_seed and history_now must match the coordinator's MasterAgent so
+    vehicles get the same synthetic history wherever they are analysed.
+    Shard n spills to spill_dir/shard-<n> (a temp dir if spill_dir is None).
+    """
+
+    def __init__(
+        self,
+        num_shards: Optional[int] = None,
+        data_seed: int = 0,
+        history_now: Optional[datetime] = None,
+        spill_dir: Optional[str] = DEFAULT_SPILL_DIR,
+    ) -> None:
+        self.num_shards = num_shards or os.cpu_count() or 1
+        self.data_seed = data_seed
+        self.history_now = history_now
+        self.spill_dir = spill_dir
+        self._pools: List[Optional[ProcessPoolExecutor]] = [None] * self.num_shards
+
+    def _pool(self, shard: int) -> ProcessPoolExecutor:
+        pool = self._pools[shard]
+        if pool is None:
+            spill_dir = os.path.join(self.spill_dir, f"shard-{shard}") if self.spill_dir else None
+            pool = self._pools[shard] = ProcessPoolExecutor(
+                max_workers=1,
+                initializer=_init_worker,
+                initargs=(self.data_seed, self.history_now, spill_dir),
+            )
+        return pool
+
+    async def analyze(self, vehicle_id: str, simulate: bool = True) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        pool = self._pool(shard_of(vehicle_id, self.num_shards))
+        return await loop.run_in_executor(pool, _analyze, vehicle_id, simulate)
+
+    def shutdown(self) -> None:
+        for i, pool in enumerate(self._pools):
+            if pool is not None:
+                pool.shutdown()
+                self._pools[i] = None
@@ -0,0 +1,90 @@
+"""
+Per-vehicle memo of the last scored feature vector.
+
+If a new feature vector is within epsilon of the one the cached summary
+was scored from, the summary is reused instead of re-running
+compute_all_components (and the stages that depend on it).
+"""
+
+import threading
+from typing import Dict, Optional, Tuple
+
+from models import HealthSummary
+
+# Cumulative distances grow with every event; compare them in km
+DEFAULT_STEPS: Dict[str, float] = {
+    "latest_odometer_km": 5.0,
+    "km_since_last_brake_change": 5.0,
+    "km_since_last_battery_change": 5.0,
+}
+
+
+class HealthMemo:
+    """
+    A feature counts as changed when it moves more than its step away from
+    the value the cached summary was scored with. The step is
+    `steps[name]` if given, else epsilon * |reference| (at least min_step).
+    Comparing against the scored reference, not the previous poll, keeps
+    small drifts from adding up unnoticed.
+    """
+
+    def __init__(
+        self,
+        epsilon: float = 0.01,
+        min_step: float = 0.01,
+        steps: Optional[Dict[str, float]] = None,
+    ) -> None:
+        self.epsilon = epsilon
+        self.min_step = min_step
+        self.steps = dict(DEFAULT_STEPS if steps is None else steps)
+        self._entries: Dict[str, Tuple[Dict[str, float], HealthSummary]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _step(self, name: str, reference: float) -> float:
+        step = self.steps.get(name)
+        if step is None:
+            step = max(self.min_step, self.epsilon * abs(reference))
+        return step
+
+    def _unchanged(self, reference: Dict[str, float], features: Dict[str, float]) -> bool:
+        if reference.keys() != features.keys():
+            return False
+        return all(
+            abs(value - reference[name]) <= self._step(name, reference[name])
+            for name, value in features.items()
+        )
+
+    def lookup(
+        self, vehicle_id: str, features: Dict[str, float], timestamp: str
+    ) -> Optional[HealthSummary]:
+        """Cached summary marked unchanged (with the new timestamp), or None."""
+        with self._lock:
+            entry = self._entries.get(vehicle_id)
+            if entry is None or not self._unchanged(entry[0], features):
+                self.misses += 1
+                return None
+            self.hits += 1
+            summary = entry[1]
+        return summary.model_copy(update={"timestamp": timestamp, "unchanged": True})
+
+    def store(self, vehicle_id: str, features: Dict[str, float], summary: HealthSummary) -> None:
+        with self._lock:
+            self._entries[vehicle_id] = (dict(features), summary)
+
+    def pop(self, vehicle_id: str) -> Optional[Tuple[Dict[str, float], HealthSummary]]:
+        """Remove and return the vehicle's entry (see restore())."""
+        with self._lock:
+            return self._entries.pop(vehicle_id, None)
+
+    def restore(self, vehicle_id: str, entry: Tuple[Dict[str, float], HealthSummary]) -> None:
+        with self._lock:
+            self._entries[vehicle_id] = entry
+
+    def invalidate(self, vehicle_id: Optional[str] = None) -> None:
+        with self._lock:
+            if vehicle_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(vehicle_id, None)
@@ -1,21 +1,65 @@
-from typing import Dict, List
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
 from models import HealthScore
 
 
-def _risk_from_score(score: float) -> str:
-    if score < 0.3:
+@dataclass(frozen=True)
+class HealthModelParams:
+    """Tunable constants of the component health models."""
+
+    # Brake pads
+    brake_base_life_km: float = 30000.0
+    baseline_hard_brakes: float = 5.0
+    hard_brake_wear_factor: float = 0.6
+
+    # Battery
+    baseline_voltage: float = 12.6
+    battery_max_life_km: float = 60000.0
+    battery_age_weight: float = 0.7
+    battery_voltage_weight: float = 0.3
+    battery_voltage_span: float = 1.5
+
+    # Tires
+    low_tire_pressure_weight: float = 1.5
+
+    # Engine
+    overheat_events_limit: float = 5.0
+    coolant_reference_c: float = 95.0
+    coolant_span_c: float = 20.0
+    dtc_limit: float = 5.0
+    harsh_index_limit: float = 2.0
+    overheat_weight: float = 0.4
+    coolant_weight: float = 0.2
+    dtc_weight: float = 0.2
+    harsh_weight: float = 0.2
+
+    # Risk bands
+    high_risk_below: float = 0.3
+    medium_risk_below: float = 0.6
+
+
+DEFAULT_PARAMS = HealthModelParams()
+
+
+def _risk_from_score(score: float, params: HealthModelParams = DEFAULT_PARAMS) -> str:
+    if score < params.high_risk_below:
         return "HIGH"
-    if score < 0.6:
+    if score < params.medium_risk_below:
         return "MEDIUM"
     return "LOW"
 
 
-def compute_brake_health(features: Dict[str, float]) -> HealthScore:
-    base_life_km = 30000.0
-    baseline_hard_brakes = 5.0
+def compute_brake_health(
+    features: Dict[str, float], params: HealthModelParams = DEFAULT_PARAMS
+) -> HealthScore:
+    base_life_km = params.brake_base_life_km
+    baseline_hard_brakes = params.baseline_hard_brakes
 
     hard_brakes = features.get("hard_brakes_per_100km", baseline_hard_brakes)
-    usage_factor = 1.0 + 0.6 * (hard_brakes / max(baseline_hard_brakes, 0.1))
+    usage_factor = 1.0 + params.hard_brake_wear_factor * (hard_brakes / max(baseline_hard_brakes, 0.1))
     effective_life_km = base_life_km / max(usage_factor, 0.1)
 
     km_since_change = features.get("km_since_last_brake_change", 0.0)
@@ -24,7 +68,7 @@ def compute_brake_health(features: Dict[str, float]) -> HealthScore:
     health_score = max(0.0, min(1.0, raw))
     eta_km = max(0.0, health_score * effective_life_km)
 
-    risk = _risk_from_score(health_score)
+    risk = _risk_from_score(health_score, params)
 
     return HealthScore(
         component="brake_pad",
@@ -39,20 +83,22 @@ def compute_brake_health(features: Dict[str, float]) -> HealthScore:
     )
 
 
-def compute_battery_health(features: Dict[str, float]) -> HealthScore:
-    baseline_voltage = 12.6
+def compute_battery_health(
+    features: Dict[str, float], params: HealthModelParams = DEFAULT_PARAMS
+) -> HealthScore:
+    baseline_voltage = params.baseline_voltage
     min_voltage = features.get("avg_battery_voltage_v", baseline_voltage)
     km_since_change = features.get("km_since_last_battery_change", 0.0)
 
-    max_life_km = 60000.0
+    max_life_km = params.battery_max_life_km
     age_factor = km_since_change / max(max_life_km, 1.0)
 
     voltage_diff = baseline_voltage - min_voltage
-    voltage_penalty = max(0.0, voltage_diff / 1.5)
+    voltage_penalty = max(0.0, voltage_diff / params.battery_voltage_span)
 
-    score = 1.0 - 0.7 * age_factor - 0.3 * voltage_penalty
+    score = 1.0 - params.battery_age_weight * age_factor - params.battery_voltage_weight * voltage_penalty
     health_score = max(0.0, min(1.0, score))
-    risk = _risk_from_score(health_score)
+    risk = _risk_from_score(health_score, params)
 
     remaining_ratio = max(0.0, health_score)
     eta_km = remaining_ratio * max_life_km
@@ -69,13 +115,15 @@ def compute_battery_health(features: Dict[str, float]) -> HealthScore:
     )
 
 
-def compute_tire_health(features: Dict[str, float]) -> HealthScore:
+def compute_tire_health(
+    features: Dict[str, float], params: HealthModelParams = DEFAULT_PARAMS
+) -> HealthScore:
     low_ratio = features.get("low_tire_pressure_ratio", 0.0)
-    base_wear_penalty = low_ratio * 1.5
+    base_wear_penalty = low_ratio * params.low_tire_pressure_weight
 
     score = 1.0 - base_wear_penalty
     health_score = max(0.0, min(1.0, score))
-    risk = _risk_from_score(health_score)
+    risk = _risk_from_score(health_score, params)
 
     return HealthScore(
         component="tire",
@@ -85,20 +133,28 @@ def compute_tire_health(features: Dict[str, float]) -> HealthScore:
     )
 
 
-def compute_engine_health(features: Dict[str, float]) -> HealthScore:
+def compute_engine_health(
+    features: Dict[str, float], params: HealthModelParams = DEFAULT_PARAMS
+) -> HealthScore:
     overheat_events = features.get("overheat_events", 0.0)
     max_coolant = features.get("max_coolant_temp_c", 90.0)
     dtc_count = features.get("dtc_count", 0.0)
     harsh_index = features.get("harsh_accel_braking_index", 0.0)
 
-    overheat_penalty = min(overheat_events / 5.0, 1.0)
-    temp_penalty = max(0.0, (max_coolant - 95.0) / 20.0)
-    dtc_penalty = min(dtc_count / 5.0, 1.0)
-    harsh_penalty = min(harsh_index / 2.0, 1.0)
+    overheat_penalty = min(overheat_events / params.overheat_events_limit, 1.0)
+    temp_penalty = max(0.0, (max_coolant - params.coolant_reference_c) / params.coolant_span_c)
+    dtc_penalty = min(dtc_count / params.dtc_limit, 1.0)
+    harsh_penalty = min(harsh_index / params.harsh_index_limit, 1.0)
 
-    score = 1.0 - 0.4 * overheat_penalty - 0.2 * temp_penalty - 0.2 * dtc_penalty - 0.2 * harsh_penalty
+    score = (
+        1.0
+        - params.overheat_weight * overheat_penalty
+        - params.coolant_weight * temp_penalty
+        - params.dtc_weight * dtc_penalty
+        - params.harsh_weight * harsh_penalty
+    )
     health_score = max(0.0, min(1.0, score))
-    risk = _risk_from_score(health_score)
+    risk = _risk_from_score(health_score, params)
 
     return HealthScore(
         component="engine",
@@ -113,10 +169,175 @@ def compute_engine_health(features: Dict[str, float]) -> HealthScore:
     )
 
 
-def compute_all_components(features: Dict[str, float]) -> List[HealthScore]:
+def compute_all_components(
+    features: Dict[str, float], params: HealthModelParams = DEFAULT_PARAMS
+) -> List[HealthScore]:
     return [
-        compute_brake_health(features),
-        compute_battery_health(features),
-        compute_tire_health(features),
-        compute_engine_health(features),
+        compute_brake_health(features, params),
+        compute_battery_health(features, params),
+        compute_tire_health(features, params),
+        compute_engine_health(features, params),
     ]
+
+
+# ----------------------------------------------------------------------
+# Batch scoring: same models over a (vehicles x features) matrix
+# ----------------------------------------------------------------------
+COMPONENTS = ["brake_pad", "battery", "tire", "engine"]
+RISK_LEVELS = np.array(["LOW", "MEDIUM", "HIGH"])
+
+# Value used when a feature column is missing, as the scalar .get() defaults
+_FEATURE_DEFAULTS = {
+    "hard_brakes_per_100km": None,  # params.baseline_hard_brakes
+    "km_since_last_brake_change": 0.0,
+    "avg_battery_voltage_v": None,  # params.baseline_voltage
+    "km_since_last_battery_change": 0.0,
+    "low_tire_pressure_ratio": 0.0,
+    "overheat_events": 0.0,
+    "max_coolant_temp_c": 90.0,
+    "dtc_count": 0.0,
+    "harsh_accel_braking_index": 0.0,
+}
+
+
+@dataclass
+class BatchHealthScores:
+    """
+    Scores for N vehicles x len(COMPONENTS) components.
+
+    `score` and `eta_km` are (N, C) float arrays (eta_km is NaN where the
+    model has no ETA), `risk` holds indexes into RISK_LEVELS. `details`
+    maps component -> detail name -> (N,) array. HealthScore objects are
+    only built by to_health_scores().
+    """
+
+    vehicle_ids: List[str]
+    components: List[str]
+    score: np.ndarray
+    risk: np.ndarray
+    eta_km: np.ndarray
+    details: Dict[str, Dict[str, np.ndarray]]
+
+    def __len__(self) -> int:
+        return len(self.vehicle_ids)
+
+    def risk_levels(self) -> np.ndarray:
+        return RISK_LEVELS[self.risk]
+
+    def index_of(self, vehicle_id: str) -> int:
+        return self.vehicle_ids.index(vehicle_id)
+
+    def to_health_scores(self, row: int) -> List[HealthScore]:
+        scores: List[HealthScore] = []
+        for c, component in enumerate(self.components):
+            eta = self.eta_km[row, c]
+            scores.append(
+                HealthScore(
+                    component=component,
+                    health_score=float(self.score[row, c]),
+                    risk_level=str(RISK_LEVELS[self.risk[row, c]]),
+                    eta_km=None if np.isnan(eta) else float(eta),
+                    details={k: float(v[row]) for k, v in self.details[component].items()},
+                )
+            )
+        return scores
+
+
+def _risk_codes(score: np.ndarray, params: HealthModelParams) -> np.ndarray:
+    return np.where(
+        score < params.high_risk_below, 2, np.where(score < params.medium_risk_below, 1, 0)
+    ).astype(np.int8)
+
+
+def score_batch(
+    matrix: np.ndarray,
+    feature_names: List[str],
+    vehicle_ids: Optional[List[str]] = None,
+    params: HealthModelParams = DEFAULT_PARAMS,
+) -> BatchHealthScores:
+    """Score every component for every row of a feature matrix in one NumPy pass."""
+    matrix = np.asarray(matrix, dtype=np.float64)
+    n = matrix.shape[0]
+    columns = {name: i for i, name in enumerate(feature_names)}
+    defaults = dict(
+        _FEATURE_DEFAULTS,
+        hard_brakes_per_100km=params.baseline_hard_brakes,
+        avg_battery_voltage_v=params.baseline_voltage,
+    )
+
+    def feature(name: str) -> np.ndarray:
+        if name in columns:
+            return matrix[:, columns[name]]
+        return np.full(n, defaults[name])
+
+    # Brake pads
+    hard_brakes = feature("hard_brakes_per_100km")
+    brake_km = feature("km_since_last_brake_change")
+    usage_factor = 1.0 + params.hard_brake_wear_factor * (
+        hard_brakes / max(params.baseline_hard_brakes, 0.1)
+    )
+    effective_life_km = params.brake_base_life_km / np.maximum(usage_factor, 0.1)
+    brake_score = np.clip(1.0 - brake_km / np.maximum(effective_life_km, 1.0), 0.0, 1.0)
+    brake_eta = np.maximum(0.0, brake_score * effective_life_km)
+
+    # Battery
+    voltage = feature("avg_battery_voltage_v")
+    battery_km = feature("km_since_last_battery_change")
+    age_factor = battery_km / max(params.battery_max_life_km, 1.0)
+    voltage_penalty = np.maximum(0.0, (params.baseline_voltage - voltage) / params.battery_voltage_span)
+    battery_score = np.clip(
+        1.0 - params.battery_age_weight * age_factor - params.battery_voltage_weight * voltage_penalty,
+        0.0,
+        1.0,
+    )
+    battery_eta = np.maximum(0.0, battery_score) * params.battery_max_life_km
+
+    # Tires
+    low_ratio = feature("low_tire_pressure_ratio")
+    tire_score = np.clip(1.0 - low_ratio * params.low_tire_pressure_weight, 0.0, 1.0)
+
+    # Engine
+    overheat = feature("overheat_events")
+    max_coolant = feature("max_coolant_temp_c")
+    dtc_count = feature("dtc_count")
+    harsh_index = feature("harsh_accel_braking_index")
+    engine_score = np.clip(
+        1.0
+        - params.overheat_weight * np.minimum(overheat / params.overheat_events_limit, 1.0)
+        - params.coolant_weight
+        * np.maximum(0.0, (max_coolant - params.coolant_reference_c) / params.coolant_span_c)
+        - params.dtc_weight * np.minimum(dtc_count / params.dtc_limit, 1.0)
+        - params.harsh_weight * np.minimum(harsh_index / params.harsh_index_limit, 1.0),
+        0.0,
+        1.0,
+    )
+
+    score = np.column_stack([brake_score, battery_score, tire_score, engine_score])
+    no_eta = np.full(n, np.nan)
+    eta_km = np.column_stack([brake_eta, battery_eta, no_eta, no_eta])
+
+    return BatchHealthScores(
+        vehicle_ids=list(vehicle_ids) if vehicle_ids is not None else [str(i) for i in range(n)],
+        components=list(COMPONENTS),
+        score=score,
+        risk=_risk_codes(score, params),
+        eta_km=eta_km,
+        details={
+            "brake_pad": {
+                "km_since_last_change": brake_km,
+                "effective_life_km": effective_life_km,
+                "hard_brakes_per_100km": hard_brakes,
+            },
+            "battery": {
+                "km_since_last_change": battery_km,
+                "avg_battery_voltage_v": voltage,
+            },
+            "tire": {"low_tire_pressure_ratio": low_ratio},
+            "engine": {
+                "overheat_events": overheat,
+                "max_coolant_temp_c": max_coolant,
+                "dtc_count": dtc_count,
+                "harsh_index": harsh_index,
+            },
+        },
+    )
@@ -0,0 +1,155 @@
+"""
+Server-push live telematics (Server-Sent Events).
+
+One producer task per watched vehicle calls frame_source(vehicle_id)
+(MasterAgent.live_frame: ingest and health scoring only, no pipeline
+stages) every interval_s, serializes the frame once and fans it out to
+every subscriber of that vehicle. The producer starts with the first
+subscriber and stops when the last one leaves.
+
+Events:
+- "snapshot": telematics plus the full component health; sent first to
+  each new subscriber and to one that fell behind,
+- "frame": telematics plus only the components whose rounded score or
+  risk level changed since the previous frame,
+- "error": the frame source raised; the producer keeps going.
+"""
+
+import asyncio
+import json
+from concurrent.futures import Executor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set
+
+LIVE_INTERVAL_S = 5.0
+KEEPALIVE_S = 15.0
+# Per-subscriber backlog; a subscriber that falls further behind is
+# resynchronised with the latest snapshot instead
+QUEUE_SIZE = 8
+
+
+def format_sse(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append("data: " + json.dumps(data, separators=(",", ":"), default=str))
+    return "\n".join(lines) + "\n\n"
+
+
+def _health_key(component: Dict[str, Any]) -> tuple:
+    return (round(component["health_score"], 2), component["risk_level"])
+
+
+class LiveTelematicsHub:
+    def __init__(
+        self,
+        frame_source: Callable[[str], Dict[str, Any]],
+        interval_s: float = LIVE_INTERVAL_S,
+        queue_size: int = QUEUE_SIZE,
+        executor: Optional[Executor] = None,
+    ) -> None:
+        self.frame_source = frame_source
+        # Where frame_source runs (None: the loop's default executor)
+        self.executor = executor
+        self.interval_s = interval_s
+        self.queue_size = queue_size
+
+        # Only touched from the event loop
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._producers: Dict[str, asyncio.Task] = {}
+        self._snapshots: Dict[str, str] = {}
+
+        self.frames_produced = 0
+        self.messages_sent = 0
+        self.resyncs = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "vehicles": len(self._producers),
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+            "frames_produced": self.frames_produced,
+            "messages_sent": self.messages_sent,
+            "resyncs": self.resyncs,
+        }
+
+    # ------------------------------------------------------------------
+    # Subscriptions
+    # ------------------------------------------------------------------
+    def subscribe(self, vehicle_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(vehicle_id, set()).add(queue)
+        snapshot = self._snapshots.get(vehicle_id)
+        if snapshot is not None:
+            queue.put_nowait(snapshot)
+            self.messages_sent += 1
+        if vehicle_id not in self._producers:
+            self._producers[vehicle_id] = asyncio.create_task(self._produce(vehicle_id))
+        return queue
+
+    def unsubscribe(self, vehicle_id: str, queue: asyncio.Queue) -> None:
+        subscribers = self._subscribers.get(vehicle_id)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[vehicle_id]
+            self._snapshots.pop(vehicle_id, None)
+            producer = self._producers.pop(vehicle_id, None)
+            if producer is not None:
+                producer.cancel()
+
+    async def sse(self, vehicle_id: str) -> AsyncIterator[str]:
+        """SSE text for one subscriber, with keepalive comments while idle."""
+        queue = self.subscribe(vehicle_id)
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), KEEPALIVE_S)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield message
+        finally:
+            self.unsubscribe(vehicle_id, queue)
+
+    # ------------------------------------------------------------------
+    # Producer
+    # ------------------------------------------------------------------
+    def _publish(self, vehicle_id: str, message: str, snapshot: str) -> None:
+        for queue in self._subscribers.get(vehicle_id, ()):
+            if queue.full():
+                # Deltas only make sense in order: drop the backlog, resync
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(snapshot)
+                self.resyncs += 1
+            else:
+                queue.put_nowait(message)
+            self.messages_sent += 1
+
+    async def _produce(self, vehicle_id: str) -> None:
+        seq = 0
+        previous: Dict[str, tuple] = {}
+        while vehicle_id in self._subscribers:
+            seq += 1
+            try:
+                frame = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, self.frame_source, vehicle_id
+                )
+            except Exception as e:
+                error = format_sse("error", {"vehicle_id": vehicle_id, "error": str(e)}, seq)
+                self._publish(vehicle_id, error, self._snapshots.get(vehicle_id, error))
+            else:
+                health: List[Dict[str, Any]] = frame.pop("health")
+                current = {c["component"]: _health_key(c) for c in health}
+                snapshot = format_sse("snapshot", {**frame, "health": health}, seq)
+                if previous:
+                    changed = [c for c in health if previous.get(c["component"]) != current[c["component"]]]
+                    message = format_sse("frame", {**frame, "health": changed}, seq)
+                else:
+                    message = snapshot
+                previous = current
+
+                self._snapshots[vehicle_id] = snapshot
+                self.frames_produced += 1
+                self._publish(vehicle_id, message, snapshot)
+            await asyncio.sleep(self.interval_s)
@@ -1,12 +1,42 @@
-from fastapi import FastAPI, HTTPException, Body
+import time
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Body, Header, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from agents.master_agent import MasterAgent
+from fastapi.responses import StreamingResponse
+from agents.master_agent import RESULT_FIELDS, MasterAgent
 from agents.manufacturing_quality_agent import ManufacturingQualityAgent
-import uvicorn
+from live_stream import LiveTelematicsHub
+from startup_profile import STARTUP_PROFILE
+from versions import VersionCounters, etag_matches
+from telematics_batch import (
+    FRAME_MEDIA_TYPE,
+    MAX_REPORTED_ERRORS,
+    NDJSON_MEDIA_TYPE,
+    BatchError,
+    decode_frame,
+    group_events,
+    group_frame,
+    gunzip,
+    parse_ndjson,
+)
+import asyncio
 import os
-from typing import Dict, Any
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+_import_done = time.perf_counter()
 
-app = FastAPI(title="VEXA Agents API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Sub-agents are built on first use; a missing API key should still
+    # stop the server here rather than fail its first request
+    master_agent.check_config()
+    yield
+
+app = FastAPI(title="VEXA Agents API", lifespan=lifespan)
 
 # Allow all origins for demo purposes
 app.add_middleware(
@@ -15,16 +45,40 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets browser clients read the ETag for conditional polling
+    expose_headers=["ETag"],
 )
 
 # In-memory stores
 bookings_db: Dict[str, Any] = {}
 service_state_db: Dict[str, str] = {} # vehicle_id -> status (e.g., "COMPLETED")
 feedback_db: Dict[str, Any] = {}
+# Bumped on every change to the two stores above (insights ETag)
+insights_versions = VersionCounters()
 
-# Initialize agents
+# Initialize agents (sub-agents of MasterAgent are built on first use)
 master_agent = MasterAgent()
 manufacturing_agent = ManufacturingQualityAgent()
+# Live telematics: one producer per watched vehicle, fanned out over SSE
+live_hub = LiveTelematicsHub(master_agent.live_frame, executor=master_agent.ingest_executor)
+# Blocking calls made by async endpoints outside the vehicle pipeline
+# (manufacturing chat LLM); the pipeline has its own ingest / io / cpu pools
+API_BLOCKING_WORKERS = int(os.getenv("API_BLOCKING_WORKERS", "8"))
+blocking_executor = ThreadPoolExecutor(
+    max_workers=API_BLOCKING_WORKERS, thread_name_prefix="api-blocking"
+)
+
+STARTUP_PROFILE.record(
+    "main",
+    (_import_done - _import_started) * 1000.0,
+    (time.perf_counter() - _import_done) * 1000.0,
+)
+
+async def run_blocking(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(blocking_executor, fn, *args)
+
+# Largest telematics batch accepted, after decompression
+MAX_BATCH_BYTES = int(os.getenv("TELEMATICS_BATCH_MAX_MB", "64")) * 1024 * 1024
 
 # Simple In-Memory User DB for Demo
 users_db = {
@@ -63,22 +117,140 @@ def login(credentials: Dict[str, str] = Body(...)):
 def read_root():
     return {"status": "VEXA Agents API is running"}
 
+@app.get("/system/startup")
+def startup_report(warm: bool = False):
+    """Import / init cost per agent; warm=true builds the remaining agents first."""
+    return master_agent.warm_up() if warm else master_agent.startup_report()
+
+@app.get("/system/vehicle_memory")
+def vehicle_memory_stats():
+    """Hot vehicle state: bytes held, spilled vehicles, eviction / reload counts."""
+    return master_agent.vehicle_memory.stats()
+
+@app.get("/system/live")
+def live_stream_stats():
+    return live_hub.stats()
+
+@app.get("/vehicle/{vehicle_id}/live")
+async def live_telematics(vehicle_id: str):
+    """
+    Server-Sent Events stream of the vehicle's telematics and health
+    changes (see live_stream). Replaces polling full_data for live views.
+    """
+    return StreamingResponse(
+        live_hub.sse(vehicle_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def _decode_batch(body: bytes, media_type: str, gzipped: bool):
+    if gzipped:
+        body = gunzip(body, MAX_BATCH_BYTES)
+    if media_type == FRAME_MEDIA_TYPE:
+        return group_frame(decode_frame(body)), []
+    events, errors = parse_ndjson(body)
+    return group_events(events), errors
+
+@app.post("/telematics/batch")
+async def ingest_telematics_batch(request: Request):
+    """
+    Bulk push of telematics for many vehicles (see telematics_batch):
+    NDJSON (application/x-ndjson) or binary frames
+    (application/x-vexa-telematics), optionally Content-Encoding: gzip.
+    Events go to each vehicle's window store; read them back with
+    simulate=false. Invalid NDJSON lines are rejected, the rest kept.
+    """
+    media_type = request.headers.get("content-type", NDJSON_MEDIA_TYPE).split(";")[0].strip()
+    if media_type not in (NDJSON_MEDIA_TYPE, FRAME_MEDIA_TYPE):
+        raise HTTPException(status_code=415, detail=f"Unsupported batch type: {media_type}")
+    try:
+        content_length = int(request.headers.get("content-length") or 0)
+    except ValueError:
+        content_length = -1
+    if content_length < 0:
+        raise HTTPException(status_code=400, detail="Invalid Content-Length")
+    if content_length > MAX_BATCH_BYTES:
+        raise HTTPException(status_code=413, detail="Batch too large")
+
+    body = await request.body()
+    gzipped = request.headers.get("content-encoding", "").lower() == "gzip"
+    if not gzipped and len(body) > MAX_BATCH_BYTES:
+        raise HTTPException(status_code=413, detail="Batch too large")
+    try:
+        buffers, errors = await run_blocking(_decode_batch, body, media_type, gzipped)
+    except BatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    acks = await asyncio.get_running_loop().run_in_executor(
+        master_agent.ingest_executor, master_agent.ingest_batch, buffers
+    )
+    return {
+        "batch_id": request.headers.get("x-batch-id") or uuid.uuid4().hex,
+        "accepted": sum(ack["accepted"] for ack in acks.values()),
+        "rejected": len(errors),
+        "vehicles": acks,
+        "errors": errors[:MAX_REPORTED_ERRORS],
+    }
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
 @app.get("/vehicle/{vehicle_id}/full_data")
-def get_vehicle_data(vehicle_id: str, simulate: bool = True):
+async def get_vehicle_data(
+    vehicle_id: str,
+    response: Response,
+    simulate: bool = True,
+    refresh: bool = False,
+    fields: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+):
     """
     Orchestrates:
     1. Vehicle Data Retrieval
     2. Diagnosis & Health Check
     3. Part Availability & Scheduling
+
+    refresh=true re-runs the LLM diagnosis, parts lookup and scheduling
+    even when urgency is low and unchanged.
+
+    fields=a,b,c returns only those keys (plus service_status) and runs
+    only the stages they need, e.g. fields=latest_telematics does no LLM
+    or HTTP work.
+
+    Runs on the event loop: ingest, LLM, TecDoc and Nylas calls wait in
+    the pipeline's executors, not in a request worker thread.
+
+    The ETag changes with the vehicle's version (new telematics, booking
+    or service status). With simulate=false a matching If-None-Match
+    gets a 304 before anything runs; simulate=true always adds a step.
     """
+    requested = None
+    if fields:
+        requested = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in requested if f not in RESULT_FIELDS and f != "service_status"]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {unknown}")
+
+    selector = None if requested is None else tuple(requested)
+    if not simulate and not refresh:
+        # Read before running, so a concurrent change yields a stale tag, not a lost update
+        etag = master_agent.versions.etag(vehicle_id, selector)
+        if etag_matches(if_none_match, etag):
+            return _not_modified(etag)
+
     print(f"Processing vehicle: {vehicle_id}")
     
     # 1. Process via Master Agent
     try:
-        result = master_agent.process_vehicle(vehicle_id, simulate=simulate)
+        result = await master_agent.process_vehicle_async(
+            vehicle_id,
+            simulate=simulate,
+            refresh=refresh,
+            fields=None if requested is None else [f for f in requested if f != "service_status"],
+        )
         
         # Inject Booking Info
-        if vehicle_id in bookings_db:
+        if vehicle_id in bookings_db and "booking_info" in result:
             # Handle potential None value from master agent
             current_info = result.get("booking_info")
             if current_info is None:
@@ -91,9 +263,13 @@ def get_vehicle_data(vehicle_id: str, simulate: bool = True):
             }
         
         # Inject Service Status (Post-Service Trigger)
-        if vehicle_id in service_state_db:
+        if vehicle_id in service_state_db and (requested is None or "service_status" in requested):
             result["service_status"] = service_state_db[vehicle_id]
-            
+
+        if simulate or refresh:
+            etag = master_agent.versions.etag(vehicle_id, selector)
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
         return result
             
     except Exception as e:
@@ -101,16 +277,59 @@ def get_vehicle_data(vehicle_id: str, simulate: bool = True):
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+# Lightweight views: ingest + health scoring only, no pipeline stages
+@app.get("/vehicle/{vehicle_id}/telematics")
+async def get_vehicle_telematics(
+    vehicle_id: str,
+    response: Response,
+    simulate: bool = True,
+    if_none_match: Optional[str] = Header(None),
+):
+    return await get_vehicle_data(
+        vehicle_id, response, simulate=simulate, fields="vehicle_id,latest_telematics",
+        if_none_match=if_none_match,
+    )
+
+@app.get("/vehicle/{vehicle_id}/health")
+async def get_vehicle_health(
+    vehicle_id: str,
+    response: Response,
+    simulate: bool = True,
+    if_none_match: Optional[str] = Header(None),
+):
+    return await get_vehicle_data(
+        vehicle_id,
+        response,
+        simulate=simulate,
+        fields="vehicle_id,health_summary,urgency,dtc_codes",
+        if_none_match=if_none_match,
+    )
+
+@app.get("/vehicle/{vehicle_id}/urgency")
+async def get_vehicle_urgency(
+    vehicle_id: str,
+    response: Response,
+    simulate: bool = True,
+    if_none_match: Optional[str] = Header(None),
+):
+    return await get_vehicle_data(
+        vehicle_id, response, simulate=simulate, fields="vehicle_id,urgency",
+        if_none_match=if_none_match,
+    )
+
 @app.post("/vehicle/{vehicle_id}/book")
 def book_slot(vehicle_id: str, booking_data: Dict[str, Any] = Body(...)):
     print(f"Booking slot for {vehicle_id}: {booking_data}")
     bookings_db[vehicle_id] = booking_data
+    master_agent.versions.bump(vehicle_id)
     return {"status": "success", "message": "Booking confirmed", "booking_id": f"BKG-{vehicle_id}"}
 
 @app.post("/vehicle/{vehicle_id}/complete_service")
 def complete_service(vehicle_id: str):
     print(f"Completing service for {vehicle_id}")
     service_state_db[vehicle_id] = "COMPLETED"
+    master_agent.versions.bump(vehicle_id)
+    insights_versions.bump("insights")
     return {"status": "success", "message": "Service marked as completed"}
 
 @app.post("/vehicle/{vehicle_id}/feedback")
@@ -125,19 +344,28 @@ def submit_feedback(vehicle_id: str, feedback: Dict[str, Any] = Body(...)):
         feedback_db[vehicle_id].append(feedback)
     else:
         feedback_db[vehicle_id] = [feedback]
+    insights_versions.bump("insights")
         
     return {"status": "success", "message": "Feedback received"}
 
 @app.get("/manufacturing/insights")
-def get_manufacturing_insights():
+def get_manufacturing_insights(response: Response, if_none_match: Optional[str] = Header(None)):
     """
     Returns aggregated insights for the Manufacturing Dashboard.
     Uses ManufacturingQualityAgent to analyze data.
+
+    Only recomputed when service states or feedback changed since the
+    client's If-None-Match ETag; otherwise 304.
     """
+    etag = insights_versions.etag("insights")
+    if etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
     return manufacturing_agent.generate_dashboard_insights(service_state_db, feedback_db)
 
 @app.post("/manufacturing/chat")
-def chat_with_manufacturing_agent(query_data: Dict[str, str] = Body(...)):
+async def chat_with_manufacturing_agent(query_data: Dict[str, str] = Body(...)):
     """
     Chat with the Manufacturing AI Analyst.
     """
@@ -147,7 +375,7 @@ def chat_with_manufacturing_agent(query_data: Dict[str, str] = Body(...)):
     # Get current insights context
     insights = manufacturing_agent.generate_dashboard_insights(service_state_db, feedback_db)
     
-    response = manufacturing_agent.chat_with_data(query, insights)
+    response = await run_blocking(manufacturing_agent.chat_with_data, query, insights)
     return {"response": response}
 
 from agents.ueba_agent import UEBAAgent
@@ -206,7 +434,7 @@ def trigger_voice_engagement(data: Dict[str, Any] = Body(...)):
     )
     return result
 
-from fastapi import Form, Response
+from fastapi import Form
 
 @app.post("/voice/answer")
 async def voice_answer(vehicle_id: str = "Unknown", risk: str = "High"):
@@ -229,4 +457,6 @@ async def handle_voice_reply(SpeechResult: str = Form(None)):
     return Response(content=twiml, media_type="application/xml")
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,132 @@
+"""
+Maintenance history indexed by component.
+
+MaintenanceIndex keeps, per component, the latest replacement (odometer,
+service date, record id) of one vehicle so km-since-last-replacement is a
+dict lookup instead of a scan over every record and part.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+
+from models import MaintenanceRecord
+
+
+@dataclass
+class ComponentReplacement:
+    odometer_km: float
+    service_date: str
+    record_id: str
+
+
+class MaintenanceIndex:
+    """Service records of one vehicle plus the latest replacement per component."""
+
+    def __init__(
+        self,
+        records: Iterable[MaintenanceRecord] = (),
+        vehicle_id: Optional[str] = None,
+    ) -> None:
+        self.vehicle_id = vehicle_id
+        self.records: List[MaintenanceRecord] = []
+        self._latest: Dict[str, ComponentReplacement] = {}
+        self.extend(records)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[MaintenanceRecord]:
+        return iter(self.records)
+
+    def add(self, record: MaintenanceRecord) -> None:
+        if self.vehicle_id is None:
+            self.vehicle_id = record.vehicle_id
+        self.records.append(record)
+        for part in record.parts_replaced:
+            current = self._latest.get(part.component)
+            # Same rule as the old scan: a replacement only counts above 0 km
+            if record.odometer_km > (current.odometer_km if current else 0.0):
+                self._latest[part.component] = ComponentReplacement(
+                    odometer_km=record.odometer_km,
+                    service_date=record.service_date,
+                    record_id=record.record_id,
+                )
+
+    def extend(self, records: Iterable[MaintenanceRecord]) -> None:
+        for r in records:
+            self.add(r)
+
+    def last_replacement(self, component: str) -> Optional[ComponentReplacement]:
+        return self._latest.get(component)
+
+    def last_replacement_odometer(self, component: str) -> float:
+        """Odometer of the latest replacement, 0.0 if the part was never replaced."""
+        latest = self._latest.get(component)
+        return latest.odometer_km if latest else 0.0
+
+    def km_since_last_replacement(self, component: str, latest_odometer: float) -> float:
+        last_odo = self.last_replacement_odometer(component)
+        if last_odo == 0:
+            return latest_odometer
+        return max(latest_odometer - last_odo, 0.0)
+
+
+MaintenanceHistory = Union[List[MaintenanceRecord], MaintenanceIndex]
+
+
+def as_maintenance_index(history: MaintenanceHistory) -> MaintenanceIndex:
+    return history if isinstance(history, MaintenanceIndex) else MaintenanceIndex(history)
+
+
+class FleetMaintenanceIndex:
+    """MaintenanceIndex per vehicle for a whole fleet."""
+
+    def __init__(self) -> None:
+        self._by_vehicle: Dict[str, MaintenanceIndex] = {}
+
+    @classmethod
+    def bulk_load(
+        cls,
+        records: Union[Iterable[MaintenanceRecord], Dict[str, List[MaintenanceRecord]]],
+    ) -> "FleetMaintenanceIndex":
+        """Build from a flat record list or a {vehicle_id: records} mapping."""
+        index = cls()
+        if isinstance(records, dict):
+            records = (r for rs in records.values() for r in rs)
+        for r in records:
+            index.add(r)
+        return index
+
+    def __contains__(self, vehicle_id: str) -> bool:
+        return vehicle_id in self._by_vehicle
+
+    def __len__(self) -> int:
+        return len(self._by_vehicle)
+
+    def add(self, record: MaintenanceRecord) -> None:
+        self.for_vehicle(record.vehicle_id).add(record)
+
+    def for_vehicle(self, vehicle_id: str) -> MaintenanceIndex:
+        """Index of one vehicle, created empty if it has no history yet."""
+        index = self._by_vehicle.get(vehicle_id)
+        if index is None:
+            index = self._by_vehicle[vehicle_id] = MaintenanceIndex(vehicle_id=vehicle_id)
+        return index
+
+    def last_replacement_odometers(
+        self, vehicle_ids: List[str], components: Iterable[str]
+    ) -> Dict[str, np.ndarray]:
+        """Per component, latest replacement odometer per vehicle (0 if none)."""
+        out = {}
+        for component in components:
+            out[component] = np.array(
+                [
+                    self._by_vehicle[vid].last_replacement_odometer(component)
+                    if vid in self._by_vehicle else 0.0
+                    for vid in vehicle_ids
+                ],
+                dtype=np.float64,
+            )
+        return out
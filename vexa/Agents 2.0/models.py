@@ -1,5 +1,7 @@
-from typing import List, Dict, Optional
-from pydantic import BaseModel
+from typing import List, Dict, Optional, Tuple
+from pydantic import BaseModel, PrivateAttr
+
+from timestamps import iso_to_epoch_us
 
 
 class TelematicsEvent(BaseModel):
@@ -27,6 +29,43 @@ class TelematicsEvent(BaseModel):
     harsh_accel_events_last_10min: int
     dtc_codes: List[str]
 
+    # (timestamp string, (epoch_us, utc offset)) parsed once per event
+    _ts_cache: Optional[Tuple[str, Tuple[int, int]]] = PrivateAttr(default=None)
+
+    @classmethod
+    def trusted(
+        cls, ts_epoch: Optional[Tuple[int, int]] = None, **fields
+    ) -> "TelematicsEvent":
+        """
+        Build an event from an internal producer without validation.
+
+        All fields must be given with their declared types; `ts_epoch` may
+        carry the pre-computed result of iso_to_epoch_us(timestamp). This
+        fills the instance the way model_construct() does, minus its
+        per-field default handling (TelematicsEvent has no defaults).
+        """
+        event = cls.__new__(cls)
+        object.__setattr__(event, "__dict__", fields)
+        object.__setattr__(event, "__pydantic_fields_set__", set(fields))
+        object.__setattr__(event, "__pydantic_extra__", None)
+        cache = (fields["timestamp"], ts_epoch) if ts_epoch is not None else None
+        object.__setattr__(event, "__pydantic_private__", {"_ts_cache": cache})
+        return event
+
+    @property
+    def ts_epoch(self) -> Tuple[int, int]:
+        """(epoch microseconds in UTC, utc offset in minutes) of `timestamp`."""
+        private = self.__pydantic_private__
+        cache = private["_ts_cache"]
+        if cache is None or cache[0] is not self.timestamp:
+            cache = (self.timestamp, iso_to_epoch_us(self.timestamp))
+            private["_ts_cache"] = cache
+        return cache[1]
+
+    @property
+    def ts_epoch_us(self) -> int:
+        return self.ts_epoch[0]
+
 
 class ReplacedPart(BaseModel):
     part_number: str
@@ -63,6 +102,7 @@ class HealthSummary(BaseModel):
     vehicle_id: str
     timestamp: str
     component_health: List[HealthScore]
+    unchanged: bool = False  # reused from the previous poll (features within epsilon)
 
 
 class CenterComponentForecast(BaseModel):
@@ -0,0 +1,242 @@
+"""
+Stage graph for the per-vehicle workflow.
+
+Each Stage names the stages it depends on and is called with a dict of
+the values produced so far (plus the run inputs); its return value is
+stored under the stage name. run_sync() executes the stages one after
+another in dependency order; run() starts every stage as soon as its
+dependencies are done, so independent stages overlap:
+
+- "io" stages (LLM, HTTP, DB) run in a wide thread pool,
+- "cpu" stages run in a separate small pool, off the event loop,
+- "inline" stages are cheap and run directly.
+
+A stage whose name is already present in the run inputs is not executed
+(its value was computed elsewhere, e.g. in a fleet_shards worker). With
+`targets`, a run executes only those stages and their dependencies.
+
+A stage may name the backend it calls (`resource`); set_limit() caps how
+many stages of one resource run at once across all concurrent runs by
+giving the resource its own pool of that size. Stages waiting for it
+queue there without holding an io thread.
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+STAGE_KINDS = ("io", "cpu", "inline")
+# Default pool sizes (see StagePipeline.__init__)
+IO_WORKERS = int(os.getenv("PIPELINE_IO_WORKERS", "32"))
+CPU_WORKERS = int(os.getenv("PIPELINE_CPU_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    fn: Callable[[Dict[str, Any]], Any]
+    deps: Tuple[str, ...] = ()
+    kind: str = "io"
+    resource: Optional[str] = None
+
+
+@dataclass
+class PipelineRun:
+    values: Dict[str, Any]
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+    reused: List[str] = field(default_factory=list)
+
+    def __getitem__(self, name: str) -> Any:
+        return self.values[name]
+
+
+class StagePipeline:
+    """
+    A validated stage graph. Dependencies may name other stages or run
+    inputs; anything else, and cycles, raise ValueError at construction.
+    """
+
+    def __init__(
+        self,
+        stages: Sequence[Stage],
+        inputs: Sequence[str] = (),
+        cpu_executor: Optional[Executor] = None,
+        io_executor: Optional[Executor] = None,
+    ) -> None:
+        self.inputs = tuple(inputs)
+        self.stages: Dict[str, Stage] = {}
+        for stage in stages:
+            if stage.kind not in STAGE_KINDS:
+                raise ValueError(f"Stage {stage.name!r}: unknown kind {stage.kind!r}")
+            if stage.name in self.stages or stage.name in self.inputs:
+                raise ValueError(f"Duplicate stage name {stage.name!r}")
+            self.stages[stage.name] = stage
+
+        for stage in self.stages.values():
+            for dep in stage.deps:
+                if dep not in self.stages and dep not in self.inputs:
+                    raise ValueError(f"Stage {stage.name!r} depends on unknown {dep!r}")
+
+        self.order = self._topological_order()
+        # ThreadPoolExecutor starts its threads lazily, so these are cheap
+        self.cpu_executor = cpu_executor or ThreadPoolExecutor(
+            max_workers=CPU_WORKERS, thread_name_prefix="pipeline-cpu"
+        )
+        self.io_executor = io_executor or ThreadPoolExecutor(
+            max_workers=IO_WORKERS, thread_name_prefix="pipeline-io"
+        )
+        # Cap and pool of each resource set_limit() caps
+        self._limits: Dict[str, Tuple[int, ThreadPoolExecutor]] = {}
+
+    def _topological_order(self) -> List[str]:
+        order: List[str] = []
+        state: Dict[str, int] = {}  # 1 = visiting, 2 = done
+
+        def visit(name: str) -> None:
+            if state.get(name) == 2 or name in self.inputs:
+                return
+            if state.get(name) == 1:
+                raise ValueError(f"Cycle in stage graph at {name!r}")
+            state[name] = 1
+            for dep in self.stages[name].deps:
+                visit(dep)
+            state[name] = 2
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    def plan(self, targets: Optional[Sequence[str]] = None) -> List[str]:
+        """Stages to execute for `targets` (all if None), in dependency order."""
+        if targets is None:
+            return self.order
+        needed = set()
+        pending = list(targets)
+        while pending:
+            name = pending.pop()
+            if name in needed or name in self.inputs:
+                continue
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage {name!r}")
+            needed.add(name)
+            pending.extend(self.stages[name].deps)
+        return [name for name in self.order if name in needed]
+
+    def set_limit(self, resource: str, max_concurrent: Optional[int]) -> None:
+        """Cap concurrently running stages that use `resource`; None removes the cap."""
+        old = self._limits.pop(resource, None)
+        if max_concurrent is not None:
+            pool = ThreadPoolExecutor(
+                max_workers=max_concurrent, thread_name_prefix=f"pipeline-{resource}"
+            )
+            self._limits[resource] = (max_concurrent, pool)
+        if old is not None:
+            # Stages already queued there still run
+            old[1].shutdown(wait=False)
+
+    def limit(self, resource: str) -> Optional[int]:
+        """The cap set_limit() put on `resource`, or None."""
+        return self._limits[resource][0] if resource in self._limits else None
+
+    def _limited_pool(self, stage: Stage) -> Optional[Executor]:
+        limited = self._limits.get(stage.resource) if stage.resource else None
+        return limited[1] if limited is not None else None
+
+    def _executor(self, stage: Stage) -> Optional[Executor]:
+        """Pool a stage runs in; None runs it on the calling thread."""
+        limited = self._limited_pool(stage)
+        if limited is not None:
+            return limited
+        if stage.kind == "inline":
+            return None
+        return self.cpu_executor if stage.kind == "cpu" else self.io_executor
+
+    def _call(self, stage: Stage, values: Dict[str, Any]) -> Any:
+        limited = self._limited_pool(stage)
+        if limited is None:
+            return stage.fn(values)
+        return limited.submit(stage.fn, values).result()
+
+    def _check_inputs(self, inputs: Dict[str, Any]) -> None:
+        missing = [name for name in self.inputs if name not in inputs]
+        if missing:
+            raise ValueError(f"Missing pipeline inputs: {missing}")
+
+    # ------------------------------------------------------------------
+    # Execution
+    # ------------------------------------------------------------------
+    def run_sync(
+        self,
+        inputs: Dict[str, Any],
+        reuse: Optional[Dict[str, Any]] = None,
+        targets: Optional[Sequence[str]] = None,
+    ) -> PipelineRun:
+        """
+        Run the stages in dependency order on the calling thread.
+        Stages named in `reuse` are not executed; they take the given value.
+        """
+        self._check_inputs(inputs)
+        reuse = reuse or {}
+        run = PipelineRun(values=dict(inputs))
+        for name in self.plan(targets):
+            if name in inputs:
+                continue
+            if name in reuse:
+                run.values[name] = reuse[name]
+                run.reused.append(name)
+                continue
+            started = time.perf_counter()
+            run.values[name] = self._call(self.stages[name], run.values)
+            run.timings_ms[name] = (time.perf_counter() - started) * 1000.0
+        return run
+
+    async def run(
+        self,
+        inputs: Dict[str, Any],
+        reuse: Optional[Dict[str, Any]] = None,
+        targets: Optional[Sequence[str]] = None,
+    ) -> PipelineRun:
+        """
+        Run the graph on the event loop: each stage starts once its
+        dependencies have finished. The first failing stage cancels the
+        rest and its exception is raised.
+        """
+        self._check_inputs(inputs)
+        reuse = reuse or {}
+        run = PipelineRun(values=dict(inputs))
+        loop = asyncio.get_running_loop()
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def execute(stage: Stage) -> None:
+            if stage.deps:
+                await asyncio.gather(*(tasks[d] for d in stage.deps if d in tasks))
+            if stage.name in inputs:
+                return
+            if stage.name in reuse:
+                run.values[stage.name] = reuse[stage.name]
+                run.reused.append(stage.name)
+                return
+            started = time.perf_counter()
+            executor = self._executor(stage)
+            if executor is None:
+                value = stage.fn(run.values)
+            else:
+                value = await loop.run_in_executor(executor, stage.fn, run.values)
+            run.values[stage.name] = value
+            run.timings_ms[stage.name] = (time.perf_counter() - started) * 1000.0
+
+        # Dependencies come first in the plan, so their tasks exist already
+        for name in self.plan(targets):
+            tasks[name] = asyncio.ensure_future(execute(self.stages[name]))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+        return run
@@ -0,0 +1,101 @@
+"""
+Ingest throughput: validated vs trusted TelematicsEvent construction.
+
+Each mode builds the same synthetic rows into events, appends them to a
+per-vehicle TelematicsRingBuffer and runs the driver coach over them,
+i.e. the per-event work done by MasterAgent.process_vehicle.
+"""
+
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from agents.driver_behavior_agent import DriverBehaviorCoachAgent
+from models import TelematicsEvent
+from telematics_buffer import TelematicsRingBuffer
+from timestamps import datetime_to_epoch_us
+
+NUM_EVENTS = 50_000
+REPEATS = 3
+
+
+def _make_rows(n: int) -> List[Dict]:
+    rng = random.Random(42)
+    base_time = datetime(2025, 1, 1)
+    rows = []
+    odometer = 25_000.0
+    for i in range(n):
+        odometer += rng.uniform(0.1, 2.5)
+        ts = base_time + timedelta(minutes=i * 2)
+        rows.append(
+            {
+                "_ts": ts,
+                "event_id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                "vehicle_id": "VH-BENCH",
+                "timestamp": ts.isoformat(),
+                "odometer_km": odometer,
+                "engine_hours": 100 + odometer / 40.0,
+                "speed_kmph": rng.uniform(0, 110),
+                "accel_longitudinal": rng.uniform(-3, 3),
+                "brake_pedal_pressure": rng.uniform(0, 100),
+                "steering_angle_deg": rng.uniform(-45, 45),
+                "engine_coolant_temp_c": rng.uniform(75, 110),
+                "engine_oil_temp_c": rng.uniform(80, 120),
+                "engine_rpm": int(rng.uniform(800, 4500)),
+                "battery_voltage_v": rng.uniform(11.8, 13.8),
+                "fuel_level_pct": rng.uniform(10, 100),
+                "ambient_temp_c": rng.uniform(10, 45),
+                "tire_pressure_fl_psi": rng.uniform(28, 36),
+                "tire_pressure_fr_psi": rng.uniform(28, 36),
+                "tire_pressure_rl_psi": rng.uniform(28, 36),
+                "tire_pressure_rr_psi": rng.uniform(28, 36),
+                "driving_mode": "city" if rng.random() < 0.6 else "highway",
+                "hard_brake_events_last_10min": rng.randint(0, 4),
+                "harsh_accel_events_last_10min": rng.randint(0, 4),
+                "dtc_codes": ["P0300"] if rng.random() < 0.03 else [],
+            }
+        )
+    return rows
+
+
+def _validated(row: Dict) -> TelematicsEvent:
+    fields = {k: v for k, v in row.items() if k != "_ts"}
+    return TelematicsEvent(**fields)
+
+
+def _trusted(row: Dict) -> TelematicsEvent:
+    fields = {k: v for k, v in row.items() if k != "_ts"}
+    return TelematicsEvent.trusted(ts_epoch=datetime_to_epoch_us(row["_ts"]), **fields)
+
+
+def _best_rate(n: int, fn: Callable[[], None]) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return n / best
+
+
+def _ingest(rows: List[Dict], build: Callable[[Dict], TelematicsEvent]) -> None:
+    events = [build(r) for r in rows]
+    buffer = TelematicsRingBuffer("VH-BENCH", capacity=200)
+    buffer.extend(events)
+    DriverBehaviorCoachAgent().analyze_events(events)
+
+
+def main():
+    rows = _make_rows(NUM_EVENTS)
+
+    print(f"=== INGEST BENCHMARK ({NUM_EVENTS} events, best of {REPEATS}) ===\n")
+    validated = _best_rate(len(rows), lambda: _ingest(rows, _validated))
+    trusted = _best_rate(len(rows), lambda: _ingest(rows, _trusted))
+    print(f"  validated : {validated:12,.0f} events/s")
+    print(f"  trusted   : {trusted:12,.0f} events/s")
+    print(f"  speedup   : {trusted / validated:12.2f}x")
+
+
+if __name__ == "__main__":
+    main()
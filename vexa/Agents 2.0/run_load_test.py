@@ -0,0 +1,104 @@
+"""
+HTTP load test for the vehicle endpoints.
+
+Runs a closed loop of `concurrency` clients against a running API, each
+sending its next request as soon as the previous one returns, for every
+concurrency level in turn, and reports throughput and latency
+percentiles per level. Point it at two servers (e.g. before and after a
+change) to compare how many concurrent requests each sustains.
+
+    python run_load_test.py [base_url] [path] [levels] [seconds] [vehicles]
+
+    python run_load_test.py http://127.0.0.1:8000 "/vehicle/{vid}/full_data" 1,8,32,64 10
+
+`{vid}` in the path is replaced by one of `vehicles` ids, round robin.
+"""
+
+import asyncio
+import sys
+import time
+from typing import Any, Dict, List
+
+import httpx
+
+REQUEST_TIMEOUT_S = 120.0
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run_level(
+    client: httpx.AsyncClient,
+    path: str,
+    vehicle_ids: List[str],
+    concurrency: int,
+    seconds: float,
+) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    counter = 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker() -> None:
+        nonlocal errors, counter
+        while time.perf_counter() < deadline:
+            vid = vehicle_ids[counter % len(vehicle_ids)]
+            counter += 1
+            started = time.perf_counter()
+            try:
+                response = await client.get(path.format(vid=vid))
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append((time.perf_counter() - started) * 1000.0)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": latencies[-1] if latencies else float("nan"),
+    }
+
+
+async def main():
+    base_url = sys.argv[1] if len(sys.argv) > 1 else "http://127.0.0.1:8000"
+    path = sys.argv[2] if len(sys.argv) > 2 else "/vehicle/{vid}/full_data"
+    levels = [int(x) for x in (sys.argv[3] if len(sys.argv) > 3 else "1,8,32,64").split(",")]
+    seconds = float(sys.argv[4]) if len(sys.argv) > 4 else 10.0
+    vehicles = int(sys.argv[5]) if len(sys.argv) > 5 else 50
+    vehicle_ids = [f"LOAD-{i:04d}" for i in range(vehicles)]
+
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(
+        base_url=base_url, timeout=REQUEST_TIMEOUT_S, limits=limits
+    ) as client:
+        # First load of a vehicle generates its history; keep that out of the numbers
+        await asyncio.gather(*(client.get(path.format(vid=vid)) for vid in vehicle_ids))
+
+        print(f"=== LOAD TEST: GET {base_url}{path}, {seconds:g}s per level ===\n")
+        print(f"  {'clients':>7}  {'req/s':>8}  {'p50 ms':>8}  {'p99 ms':>8}  {'max ms':>8}  {'errors':>6}")
+        for concurrency in levels:
+            r = await run_level(client, path, vehicle_ids, concurrency, seconds)
+            print(
+                f"  {r['concurrency']:7d}  {r['rps']:8.1f}  {r['p50_ms']:8.1f}"
+                f"  {r['p99_ms']:8.1f}  {r['max_ms']:8.1f}  {r['errors']:6d}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,56 @@
+"""
+Single-flight coalescing of identical concurrent calls.
+
+While a call for a key is in flight, other threads asking for the same
+key wait for it and get the same result (or exception) instead of
+issuing their own request. Nothing is kept once the call finishes;
+caching is left to the caller.
+"""
+
+import hashlib
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict
+
+
+def prompt_key(namespace: str, *parts: str) -> str:
+    digest = hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+    return f"{namespace}:{digest}"
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+                self.executed += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+
+# Shared by every agent that talks to an LLM, so identical prompts from
+# different agent instances coalesce as well.
+LLM_REQUESTS = SingleFlight()
@@ -0,0 +1,96 @@
+"""
+Lazy agent construction and a record of what it cost.
+
+LazyAgent is a class attribute that imports the agent's module and
+builds the agent the first time it is read on an instance, then stores
+it on the instance. Each build is recorded in STARTUP_PROFILE as import
+time (module import, including anything it pulls in that was not loaded
+yet) and init time (the constructor).
+"""
+
+import importlib
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Sequence, Union
+
+
+class StartupProfile:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, float]] = {}
+
+    def record(self, name: str, import_ms: float, init_ms: float) -> None:
+        with self._lock:
+            self.entries[name] = {
+                "import_ms": round(import_ms, 3),
+                "init_ms": round(init_ms, 3),
+            }
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = {k: dict(v) for k, v in self.entries.items()}
+        return {
+            "components": entries,
+            "total_import_ms": round(sum(e["import_ms"] for e in entries.values()), 3),
+            "total_init_ms": round(sum(e["init_ms"] for e in entries.values()), 3),
+        }
+
+
+STARTUP_PROFILE = StartupProfile()
+
+
+class LazyAgent:
+    """
+    `module` is imported and the first class in `class_names` that it
+    defines is instantiated with factory(cls, owner) (default cls()).
+    """
+
+    def __init__(
+        self,
+        module: str,
+        class_names: Union[str, Sequence[str]],
+        factory: Optional[Callable[[type, Any], Any]] = None,
+    ) -> None:
+        self.module = module
+        self.class_names = (class_names,) if isinstance(class_names, str) else tuple(class_names)
+        self.factory = factory
+        self.name = ""
+        self._lock = threading.Lock()
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def load_class(self) -> type:
+        mod = importlib.import_module(self.module)
+        for class_name in self.class_names:
+            if hasattr(mod, class_name):
+                return getattr(mod, class_name)
+        raise ImportError(f"{self.module} defines none of {self.class_names}")
+
+    def __get__(self, instance: Any, owner: type) -> Any:
+        if instance is None:
+            return self
+        with self._lock:
+            # Another thread may have built it while we waited
+            if self.name in instance.__dict__:
+                return instance.__dict__[self.name]
+
+            started = time.perf_counter()
+            cls = self.load_class()
+            imported = time.perf_counter()
+            agent = self.factory(cls, instance) if self.factory else cls()
+            built = time.perf_counter()
+
+            # Stored on the instance, so later reads bypass this descriptor
+            instance.__dict__[self.name] = agent
+
+        STARTUP_PROFILE.record(
+            f"{type(instance).__name__}.{self.name}",
+            (imported - started) * 1000.0,
+            (built - imported) * 1000.0,
+        )
+        return agent
+
+
+def lazy_agent_names(owner: type) -> Sequence[str]:
+    return [name for name, value in vars(owner).items() if isinstance(value, LazyAgent)]
@@ -1,86 +1,128 @@
+import hashlib
 import random
 import uuid
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Tuple, Union
 
 from models import TelematicsEvent, MaintenanceRecord, ReplacedPart
-
+from timestamps import datetime_to_epoch_us
 
 def generate_vehicle_ids(n: int = 10) -> List[str]:
     return [f"VH-{1000 + i}" for i in range(n)]
 
 
-def generate_telematics_stream(
+def _new_uuid(rng: Optional[random.Random]) -> str:
+    if rng is None:
+        return str(uuid.uuid4())
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def vehicle_rng(vehicle_id: str, stream: str, seed: int = 0) -> random.Random:
+    """
+    A Random seeded from (seed, vehicle_id, stream). The seed is derived
+    with sha256, so it is the same in every process (unlike hash()).
+    """
+    digest = hashlib.sha256(f"{seed}:{vehicle_id}:{stream}".encode("utf-8")).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def iter_telematics_stream(
     vehicle_id: str,
     start_odometer: float,
     num_events: int = 200,
     base_time: Optional[datetime] = None,
-) -> List[TelematicsEvent]:
+    rng: Optional[random.Random] = None,
+    odometer_rng: Optional[random.Random] = None,
+) -> Iterator[TelematicsEvent]:
+    """
+    Yield events one at a time. Values come from `rng` (the global random
+    module if None); odometer steps come from `odometer_rng` if given, so
+    the final odometer can be known without generating the events.
+    """
     if base_time is None:
         base_time = datetime.utcnow() - timedelta(hours=3)
+    r = rng or random
+    odo_r = odometer_rng or r
 
-    events: List[TelematicsEvent] = []
     odometer = start_odometer
 
     for i in range(num_events):
-        delta_km = random.uniform(0.1, 2.5)
+        delta_km = odo_r.uniform(0.1, 2.5)
         odometer += delta_km
-        speed = random.uniform(0, 110)
-        city_mode = random.random() < 0.6
+        speed = r.uniform(0, 110)
+        city_mode = r.random() < 0.6
         driving_mode = "city" if city_mode else "highway"
 
         dtc_pool = ["P0300", "P0420", "P0171", "U0100"]
         dtc = []
-        if random.random() < 0.03:
-            dtc.append(random.choice(dtc_pool))
+        if r.random() < 0.03:
+            dtc.append(r.choice(dtc_pool))
 
-        hard_brakes = random.randint(0, 4)
-        harsh_accel = random.randint(0, 4)
+        hard_brakes = r.randint(0, 4)
+        harsh_accel = r.randint(0, 4)
 
-        event = TelematicsEvent(
-            event_id=str(uuid.uuid4()),
+        ts = base_time + timedelta(minutes=i * 2)
+
+        # Internal producer: fields are built with the right types, skip validation
+        yield TelematicsEvent.trusted(
+            ts_epoch=datetime_to_epoch_us(ts),
+            event_id=_new_uuid(rng),
             vehicle_id=vehicle_id,
-            timestamp=(base_time + timedelta(minutes=i * 2)).isoformat(),
+            timestamp=ts.isoformat(),
             odometer_km=odometer,
             engine_hours=100 + odometer / 40.0,
             speed_kmph=speed,
-            accel_longitudinal=random.uniform(-3, 3),
-            brake_pedal_pressure=random.uniform(0, 100),
-            steering_angle_deg=random.uniform(-45, 45),
-            engine_coolant_temp_c=random.uniform(75, 110),
-            engine_oil_temp_c=random.uniform(80, 120),
-            engine_rpm=int(random.uniform(800, 4500)),
-            battery_voltage_v=random.uniform(11.8, 13.8),
-            fuel_level_pct=random.uniform(10, 100),
-            ambient_temp_c=random.uniform(10, 45),
-            tire_pressure_fl_psi=random.uniform(28, 36),
-            tire_pressure_fr_psi=random.uniform(28, 36),
-            tire_pressure_rl_psi=random.uniform(28, 36),
-            tire_pressure_rr_psi=random.uniform(28, 36),
+            accel_longitudinal=r.uniform(-3, 3),
+            brake_pedal_pressure=r.uniform(0, 100),
+            steering_angle_deg=r.uniform(-45, 45),
+            engine_coolant_temp_c=r.uniform(75, 110),
+            engine_oil_temp_c=r.uniform(80, 120),
+            engine_rpm=int(r.uniform(800, 4500)),
+            battery_voltage_v=r.uniform(11.8, 13.8),
+            fuel_level_pct=r.uniform(10, 100),
+            ambient_temp_c=r.uniform(10, 45),
+            tire_pressure_fl_psi=r.uniform(28, 36),
+            tire_pressure_fr_psi=r.uniform(28, 36),
+            tire_pressure_rl_psi=r.uniform(28, 36),
+            tire_pressure_rr_psi=r.uniform(28, 36),
             driving_mode=driving_mode,
             hard_brake_events_last_10min=hard_brakes,
             harsh_accel_events_last_10min=harsh_accel,
             dtc_codes=dtc,
         )
-        events.append(event)
 
-    return events
+
+def generate_telematics_stream(
+    vehicle_id: str,
+    start_odometer: float,
+    num_events: int = 200,
+    base_time: Optional[datetime] = None,
+    rng: Optional[random.Random] = None,
+) -> List[TelematicsEvent]:
+    return list(
+        iter_telematics_stream(vehicle_id, start_odometer, num_events, base_time, rng)
+    )
 
 
 def generate_maintenance_history(
     vehicle_id: str,
     current_odometer: float,
+    rng: Optional[random.Random] = None,
+    now: Optional[datetime] = None,
 ) -> List[MaintenanceRecord]:
+    """Service dates are relative to `now` (default: the wall clock)."""
+    r = rng or random
+    now = now or datetime.utcnow()
     history: List[MaintenanceRecord] = []
 
-    brake_odo = current_odometer - random.uniform(8000, 20000)
+    brake_odo = current_odometer - r.uniform(8000, 20000)
     if brake_odo < 0:
         brake_odo = current_odometer * 0.2
 
     brake_record = MaintenanceRecord(
-        record_id=str(uuid.uuid4()),
+        record_id=_new_uuid(rng),
         vehicle_id=vehicle_id,
-        service_date=(datetime.utcnow() - timedelta(days=180)).date().isoformat(),
+        service_date=(now - timedelta(days=180)).date().isoformat(),
         odometer_km=brake_odo,
         service_center_id="CENTER-01",
         complaint_desc="Routine service and brake inspection",
@@ -100,12 +142,12 @@ def generate_maintenance_history(
     )
     history.append(brake_record)
 
-    if random.random() < 0.4:
-        battery_odo = current_odometer - random.uniform(5000, 15000)
+    if r.random() < 0.4:
+        battery_odo = current_odometer - r.uniform(5000, 15000)
         battery_record = MaintenanceRecord(
-            record_id=str(uuid.uuid4()),
+            record_id=_new_uuid(rng),
             vehicle_id=vehicle_id,
-            service_date=(datetime.utcnow() - timedelta(days=365)).date().isoformat(),
+            service_date=(now - timedelta(days=365)).date().isoformat(),
             odometer_km=max(battery_odo, 0),
             service_center_id="CENTER-01",
             complaint_desc="Weak start, replaced battery",
@@ -142,6 +184,51 @@ def generate_stream_dataset(num_vehicles: int = 5) -> Dict[str, Dict[str, list]]
     return dataset
 
 
+
+def generate_vehicle_history(
+    vehicle_id: str,
+    num_events: int = 200,
+    seed: int = 0,
+    base_time: Optional[datetime] = None,
+    lazy: bool = False,
+    now: Optional[datetime] = None,
+) -> Tuple[Union[List[TelematicsEvent], Iterator[TelematicsEvent]], List[MaintenanceRecord]]:
+    """
+    Telematics and maintenance history for one vehicle, for any id.
+    Values (and event/record ids) depend only on (vehicle_id, seed).
+    Event timestamps start at base_time (default: 3 hours before `now`)
+    and service dates are relative to `now` (default: the wall clock), so
+    with `now` fixed the whole history is reproducible.
+
+    With lazy=True the events are returned as an iterator that builds
+    them as it is consumed.
+    """
+    now = now or datetime.utcnow()
+    if base_time is None:
+        base_time = now - timedelta(hours=3)
+    start_odo = vehicle_rng(vehicle_id, "start", seed).uniform(10000, 60000)
+
+    # Replay the odometer steps to place the maintenance records; the
+    # event iterator draws the same steps from its own copy of the stream.
+    steps = vehicle_rng(vehicle_id, "odometer", seed)
+    final_odo = start_odo
+    for _ in range(num_events):
+        final_odo += steps.uniform(0.1, 2.5)
+    maintenance = generate_maintenance_history(
+        vehicle_id, final_odo, rng=vehicle_rng(vehicle_id, "maintenance", seed), now=now
+    )
+
+    events = iter_telematics_stream(
+        vehicle_id,
+        start_odo,
+        num_events,
+        base_time,
+        rng=vehicle_rng(vehicle_id, "events", seed),
+        odometer_rng=vehicle_rng(vehicle_id, "odometer", seed),
+    )
+    return (events if lazy else list(events)), maintenance
+
+
 # Global counter for 3-state cycle simulation via modulo
 _sim_cycle_counter = 0
 
@@ -191,7 +278,8 @@ def evolve_vehicle_state(last_event: TelematicsEvent) -> TelematicsEvent:
         oil = 94.0
         mode = "NORMAL"
 
-    return TelematicsEvent(
+    return TelematicsEvent.trusted(
+        ts_epoch=datetime_to_epoch_us(new_time),
         event_id=str(uuid.uuid4()),
         vehicle_id=last_event.vehicle_id,
         timestamp=new_time.isoformat(),
@@ -214,5 +302,5 @@ def evolve_vehicle_state(last_event: TelematicsEvent) -> TelematicsEvent:
         driving_mode=mode,
         hard_brake_events_last_10min=0,
         harsh_accel_events_last_10min=0,
-        dtc_codes=last_event.dtc_codes, 
+        dtc_codes=list(last_event.dtc_codes),
     )
@@ -0,0 +1,291 @@
+"""
+Bulk telematics ingest: NDJSON and binary batches from gateways.
+
+A batch carries events for any number of vehicles and comes in one of
+two encodings:
+
+- NDJSON (application/x-ndjson): one TelematicsEvent JSON object per
+  line. The lines are validated together with one TypeAdapter pass;
+  only if that fails are the bad lines located and the rest kept.
+- Binary frame (application/x-vexa-telematics): the TelematicsRingBuffer
+  columns of every row, as written by encode_frame():
+
+      b"VXT1" | uint32 LE header length | JSON header | column bytes
+
+  The header lists the vehicle ids, the row count, the driving-mode and
+  DTC code tables the codes refer to (as in a fleet_dataset meta.json)
+  and the columns (plus `vehicle_idx`, int32) in the order their raw
+  little-endian bytes follow.
+
+Both decode to one TelematicsRingBuffer per vehicle with its rows in
+timestamp order, ready for MasterAgent.ingest_batch(). Anything the
+columns cannot hold faithfully (timestamps outside the datetime range,
+integers wider than their column, unknown driving modes, DTCs that are
+not OBD-II codes) is rejected before a code is interned, so a batch
+cannot grow the process-wide code tables with junk.
+"""
+
+import json
+import struct
+import zlib
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from pydantic import TypeAdapter, ValidationError
+
+from batch_features import FleetTelematics
+from fleet_dataset import column_specs, remap_codes, vehicle_buffers
+from models import TelematicsEvent
+from telematics_buffer import (
+    DRIVING_MODES,
+    DTC_CODES,
+    DTC_PATTERN,
+    INT_COLUMNS,
+    MAX_DTC_PER_EVENT,
+    NO_CODE,
+    TelematicsRingBuffer,
+)
+from timestamps import MAX_EPOCH_US, MIN_EPOCH_US, MINUTES_PER_DAY, NAIVE_TS
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+FRAME_MEDIA_TYPE = "application/x-vexa-telematics"
+
+FRAME_MAGIC = b"VXT1"
+_HEADER_LEN = struct.Struct("<I")
+
+EVENT_LIST = TypeAdapter(List[TelematicsEvent])
+
+# Rejected lines reported back per batch; the count covers all of them
+MAX_REPORTED_ERRORS = 100
+
+
+class BatchError(ValueError):
+    """The batch as a whole cannot be decoded."""
+
+
+def gunzip(body: bytes, max_bytes: int) -> bytes:
+    """Decompress a gzip body, refusing to inflate it beyond max_bytes."""
+    inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        data = inflater.decompress(body, max_bytes + 1)
+    except zlib.error as e:
+        raise BatchError(f"Bad gzip body: {e}") from None
+    if len(data) > max_bytes:
+        raise BatchError(f"Batch larger than {max_bytes} bytes")
+    return data
+
+
+def _check_dtc_room(codes) -> None:
+    """Refuse a batch whose new DTCs would not fit in the code table."""
+    new = {code for code in codes if DTC_CODES.code(code) == NO_CODE}
+    if len(new) > DTC_CODES.room():
+        raise BatchError(f"Batch adds {len(new)} DTC codes, only {DTC_CODES.room()} fit")
+
+
+# ----------------------------------------------------------------------
+# NDJSON
+# ----------------------------------------------------------------------
+def _line_error(line: bytes) -> Optional[str]:
+    """Why a single NDJSON line is not a valid event, or None if it is."""
+    try:
+        EVENT_LIST.validate_json(b"[" + line + b"]")
+    except ValidationError as e:
+        first = e.errors()[0]
+        loc = ".".join(str(p) for p in first["loc"][1:])
+        return f"{loc}: {first['msg']}" if loc else first["msg"]
+    return None
+
+
+def _event_error(event: TelematicsEvent) -> Optional[str]:
+    """Why a schema-valid event cannot be stored, or None if it can."""
+    try:
+        ts_us, _ = event.ts_epoch
+    except (ValueError, OverflowError) as e:
+        return f"timestamp: {e}"
+    if not MIN_EPOCH_US <= ts_us <= MAX_EPOCH_US:
+        return "timestamp: out of range"
+    for name, dtype in INT_COLUMNS.items():
+        info = np.iinfo(dtype)
+        if not info.min <= getattr(event, name) <= info.max:
+            return f"{name}: out of range"
+    if DRIVING_MODES.code(event.driving_mode) == NO_CODE:
+        return f"driving_mode: unknown mode {event.driving_mode!r}"
+    for code in event.dtc_codes:
+        if not DTC_PATTERN.fullmatch(code):
+            return f"dtc_codes: not an OBD-II code: {code!r}"
+    return None
+
+
+def parse_ndjson(body: bytes) -> Tuple[List[TelematicsEvent], List[Dict[str, Any]]]:
+    """
+    Events of an NDJSON batch, plus {"line", "error"} for every line that
+    is not a valid TelematicsEvent (blank lines are skipped).
+    """
+    numbered = [(n, line.strip()) for n, line in enumerate(body.split(b"\n"), start=1)]
+    numbered = [(n, line) for n, line in numbered if line]
+    errors: List[Dict[str, Any]] = []
+    try:
+        events = EVENT_LIST.validate_json(b"[" + b",".join(line for _, line in numbered) + b"]")
+        lines = [n for n, _ in numbered]
+    except ValidationError:
+        # Slow path: find the bad lines, then validate the rest in one pass
+        good: List[bytes] = []
+        lines = []
+        for n, line in numbered:
+            error = _line_error(line)
+            if error is None:
+                good.append(line)
+                lines.append(n)
+            else:
+                errors.append({"line": n, "error": error})
+        events = EVENT_LIST.validate_json(b"[" + b",".join(good) + b"]") if good else []
+
+    # Values the schema accepts but the columns cannot hold. Parsing the
+    # timestamp here also fills the cache group_events() sorts by.
+    kept: List[TelematicsEvent] = []
+    for n, event in zip(lines, events):
+        error = _event_error(event)
+        if error is None:
+            kept.append(event)
+        else:
+            errors.append({"line": n, "error": error})
+    errors.sort(key=lambda e: e["line"])
+    _check_dtc_room(code for event in kept for code in event.dtc_codes)
+    return kept, errors
+
+
+def group_events(events: List[TelematicsEvent]) -> Dict[str, TelematicsRingBuffer]:
+    """One unbounded buffer per vehicle, rows in timestamp order."""
+    by_vehicle: Dict[str, List[TelematicsEvent]] = defaultdict(list)
+    for ev in events:
+        by_vehicle[ev.vehicle_id].append(ev)
+
+    buffers: Dict[str, TelematicsRingBuffer] = {}
+    for vehicle_id, group in by_vehicle.items():
+        group.sort(key=lambda ev: ev.ts_epoch_us)
+        buffer = TelematicsRingBuffer(vehicle_id, capacity=None, initial_rows=len(group))
+        try:
+            buffer.extend(group)
+        except ValueError as e:  # a concurrent batch filled the code table
+            raise BatchError(str(e)) from None
+        buffers[vehicle_id] = buffer
+    return buffers
+
+
+# ----------------------------------------------------------------------
+# Binary frames
+# ----------------------------------------------------------------------
+def encode_frame(fleet: FleetTelematics) -> bytes:
+    """Binary batch of `fleet` (codes from this process's interners)."""
+    specs = column_specs()
+    names = ["vehicle_idx"] + sorted(specs)
+    arrays = {"vehicle_idx": np.asarray(fleet.vehicle_idx, dtype="<i4")}
+    for name in specs:
+        dtype, _ = specs[name]
+        arrays[name] = np.asarray(fleet.columns[name], dtype=dtype.newbyteorder("<"))
+
+    header = json.dumps(
+        {
+            "rows": len(fleet),
+            "vehicle_ids": list(fleet.vehicle_ids),
+            "driving_modes": [DRIVING_MODES.value(i) for i in range(len(DRIVING_MODES))],
+            "dtc_codes": [DTC_CODES.value(i) for i in range(len(DTC_CODES))],
+            "columns": names,
+        },
+        separators=(",", ":"),
+    ).encode("utf-8")
+    parts = [FRAME_MAGIC, _HEADER_LEN.pack(len(header)), header]
+    parts.extend(np.ascontiguousarray(arrays[name]).tobytes() for name in names)
+    return b"".join(parts)
+
+
+def decode_frame(body: bytes) -> FleetTelematics:
+    """
+    Parse and check a binary batch. Raises BatchError if the frame is
+    malformed, any code is outside its table or any value is one the
+    columns could not have been written with.
+    """
+    if body[:4] != FRAME_MAGIC or len(body) < 8:
+        raise BatchError("Not a telematics frame")
+    (header_len,) = _HEADER_LEN.unpack_from(body, 4)
+    try:
+        header = json.loads(body[8:8 + header_len])
+        rows = int(header["rows"])
+        vehicle_ids = list(header["vehicle_ids"])
+        names = list(header["columns"])
+        modes, dtcs = list(header["driving_modes"]), list(header["dtc_codes"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise BatchError(f"Bad frame header: {e}") from None
+
+    if rows < 0:
+        raise BatchError("Negative row count")
+    if len(set(vehicle_ids)) != len(vehicle_ids):
+        raise BatchError("Duplicate vehicle ids in frame header")
+    specs = column_specs()
+    if sorted(names) != sorted(["vehicle_idx"] + list(specs)):
+        raise BatchError("Frame columns do not match the telematics schema")
+
+    arrays: Dict[str, np.ndarray] = {}
+    offset = 8 + header_len
+    for name in names:
+        dtype, shape = (np.dtype(np.int32), ()) if name == "vehicle_idx" else specs[name]
+        dtype = dtype.newbyteorder("<")
+        count = rows * int(np.prod(shape, dtype=np.int64))
+        size = count * dtype.itemsize
+        if offset + size > len(body):
+            raise BatchError(f"Frame truncated in column {name!r}")
+        arrays[name] = np.frombuffer(body, dtype=dtype, count=count, offset=offset).reshape(
+            (rows,) + shape
+        )
+        offset += size
+    if offset != len(body):
+        raise BatchError("Trailing bytes after the last column")
+
+    vehicle_idx = arrays.pop("vehicle_idx")
+    if rows and (vehicle_idx.min() < 0 or vehicle_idx.max() >= len(vehicle_ids)):
+        raise BatchError("vehicle_idx out of range")
+    mode = arrays["driving_mode"]
+    if rows and (mode.min() < 0 or mode.max() >= len(modes)):
+        raise BatchError("driving_mode code out of range")
+    dtc = arrays["dtc_codes"]
+    if dtc.size and (dtc.min() < NO_CODE or dtc.max() >= len(dtcs)):
+        raise BatchError("dtc code out of range")
+    dtc_count = arrays["dtc_count"]
+    if rows and (dtc_count.min() < 0 or dtc_count.max() > MAX_DTC_PER_EVENT):
+        raise BatchError("dtc_count out of range")
+    # Codes are packed at the front of each row, dtc_count of them
+    packed = np.arange(MAX_DTC_PER_EVENT) < dtc_count[:, None]
+    if not np.array_equal(dtc != NO_CODE, packed):
+        raise BatchError("dtc_count does not match the dtc codes")
+    ts_offset = arrays["ts_offset_min"]
+    if not np.all((ts_offset == NAIVE_TS) | (np.abs(ts_offset.astype(np.int32)) < MINUTES_PER_DAY)):
+        raise BatchError("ts_offset_min out of range")
+    ts_us = arrays["ts_us"]
+    if rows and (ts_us.min() < MIN_EPOCH_US or ts_us.max() > MAX_EPOCH_US):
+        raise BatchError("ts_us out of range")
+
+    # Only then touch the shared interners
+    if any(not isinstance(m, str) or DRIVING_MODES.code(m) == NO_CODE for m in modes):
+        raise BatchError("Unknown driving mode in frame header")
+    if any(not isinstance(c, str) or not DTC_PATTERN.fullmatch(c) for c in dtcs):
+        raise BatchError("dtc code table holds a value that is not an OBD-II code")
+    _check_dtc_room(dtcs)
+
+    try:
+        arrays["driving_mode"] = remap_codes(mode, modes, DRIVING_MODES)
+        arrays["dtc_codes"] = remap_codes(dtc, dtcs, DTC_CODES)
+    except ValueError as e:  # a concurrent batch filled the code table
+        raise BatchError(str(e)) from None
+    return FleetTelematics(vehicle_ids=vehicle_ids, vehicle_idx=vehicle_idx, columns=arrays)
+
+
+def group_frame(fleet: FleetTelematics) -> Dict[str, TelematicsRingBuffer]:
+    """One unbounded buffer per vehicle, rows in timestamp order."""
+    order = np.lexsort((fleet.columns["ts_us"], fleet.vehicle_idx))
+    ordered = FleetTelematics(
+        vehicle_ids=fleet.vehicle_ids,
+        vehicle_idx=fleet.vehicle_idx[order],
+        columns={name: col[order] for name, col in fleet.columns.items()},
+    )
+    return vehicle_buffers(ordered)
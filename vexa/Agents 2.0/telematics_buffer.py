@@ -0,0 +1,475 @@
+"""
+Columnar (struct-of-arrays) storage for per-vehicle telematics.
+
+One NumPy column per numeric TelematicsEvent field, epoch-microsecond
+timestamps, interned codes for driving_mode / DTCs and raw UUID bytes for
+event ids. A row costs ~170 bytes versus several KB for a Pydantic event.
+"""
+
+import re
+import threading
+import uuid
+from typing import Dict, Iterator, List, Optional, Union
+
+import numpy as np
+
+from models import TelematicsEvent
+from timestamps import epoch_us_to_iso
+
+
+FLOAT_COLUMNS: List[str] = [
+    "odometer_km",
+    "engine_hours",
+    "speed_kmph",
+    "accel_longitudinal",
+    "brake_pedal_pressure",
+    "steering_angle_deg",
+    "engine_coolant_temp_c",
+    "engine_oil_temp_c",
+    "battery_voltage_v",
+    "fuel_level_pct",
+    "ambient_temp_c",
+    "tire_pressure_fl_psi",
+    "tire_pressure_fr_psi",
+    "tire_pressure_rl_psi",
+    "tire_pressure_rr_psi",
+]
+
+INT_COLUMNS: Dict[str, type] = {
+    "engine_rpm": np.int32,
+    "hard_brake_events_last_10min": np.int16,
+    "harsh_accel_events_last_10min": np.int16,
+}
+
+MAX_DTC_PER_EVENT = 4
+NO_CODE = -1
+
+# Codes are stored as int16
+MAX_INTERNED = int(np.iinfo(np.int16).max) + 1
+
+# OBD-II trouble codes, the only DTC values accepted from outside
+DTC_PATTERN = re.compile(r"[PCBU][0-9A-F]{4}")
+
+
+class Interner:
+    """
+    Thread-safe string <-> small int mapping shared by all buffers.
+    Holds at most max_size values; intern() raises ValueError beyond that.
+    """
+
+    def __init__(self, initial: Optional[List[str]] = None, max_size: int = MAX_INTERNED) -> None:
+        self._codes: Dict[str, int] = {}
+        self._values: List[str] = []
+        self._lock = threading.Lock()
+        self.max_size = max_size
+        for v in initial or []:
+            self.intern(v)
+
+    def intern(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(value)
+                if code is None:
+                    if len(self._values) >= self.max_size:
+                        raise ValueError(f"Code table full ({self.max_size} values)")
+                    code = len(self._values)
+                    self._values.append(value)
+                    self._codes[value] = code
+        return code
+
+    def code(self, value: str) -> int:
+        """Code for value, or NO_CODE if it was never interned."""
+        return self._codes.get(value, NO_CODE)
+
+    def value(self, code: int) -> str:
+        return self._values[code]
+
+    def room(self) -> int:
+        """How many more values fit."""
+        return self.max_size - len(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+
+DRIVING_MODES = Interner(["city", "highway", "mixed", "NORMAL", "SPORT"])
+DTC_CODES = Interner()
+
+
+def _uuid_bytes(event_id: str) -> Optional[bytes]:
+    """Raw bytes of a canonical (lowercase, hyphenated) UUID string, else None."""
+    if len(event_id) != 36 or event_id != event_id.lower():
+        return None
+    if not (event_id[8] == event_id[13] == event_id[18] == event_id[23] == "-"):
+        return None
+    try:
+        raw = bytes.fromhex(event_id.replace("-", ""))
+    except ValueError:
+        return None
+    return raw if len(raw) == 16 else None
+
+
+# Spare rows of a bounded buffer, as a fraction of capacity: the live
+# rows are moved back to the front once per capacity * CAPACITY_SLACK
+# appended rows
+CAPACITY_SLACK = 0.25
+
+
+class TelematicsRingBuffer:
+    """
+    Fixed-capacity ring of telematics rows for one vehicle.
+
+    Rows are addressed by an absolute sequence number (seq); the oldest
+    rows drop off once `capacity` is exceeded. With capacity=None the
+    buffer grows and rows are only removed through popleft().
+
+    Storage is a sliding window over arrays CAPACITY_SLACK larger than
+    capacity (twice the live size when unbounded), so column() always
+    returns a contiguous view, oldest row first. Views are only valid
+    until the next append.
+    """
+
+    def __init__(
+        self,
+        vehicle_id: Optional[str] = None,
+        capacity: Optional[int] = 200,
+        initial_rows: int = 64,
+    ) -> None:
+        self.vehicle_id = vehicle_id
+        self.capacity = capacity
+
+        size = capacity + max(int(capacity * CAPACITY_SLACK), 1) if capacity else max(initial_rows, 2)
+        self._data: Dict[str, np.ndarray] = self._allocate(size)
+        self._size = size
+        self._head = 0
+        self._tail = 0
+        self._start_seq = 0
+
+        # Rare values that do not fit the fixed-width columns, keyed by seq
+        self._extra_ids: Dict[int, str] = {}
+        self._extra_dtcs: Dict[int, List[str]] = {}
+
+    @staticmethod
+    def _allocate(size: int) -> Dict[str, np.ndarray]:
+        data: Dict[str, np.ndarray] = {
+            name: np.zeros(size, dtype=np.float64) for name in FLOAT_COLUMNS
+        }
+        for name, dtype in INT_COLUMNS.items():
+            data[name] = np.zeros(size, dtype=dtype)
+        data["ts_us"] = np.zeros(size, dtype=np.int64)
+        data["ts_offset_min"] = np.zeros(size, dtype=np.int16)
+        data["driving_mode"] = np.zeros(size, dtype=np.int16)
+        data["dtc_count"] = np.zeros(size, dtype=np.int8)
+        data["dtc_codes"] = np.full((size, MAX_DTC_PER_EVENT), NO_CODE, dtype=np.int16)
+        data["event_uuid"] = np.zeros((size, 16), dtype=np.uint8)
+        return data
+
+    # ------------------------------------------------------------------
+    # Size / addressing
+    # ------------------------------------------------------------------
+    def __len__(self) -> int:
+        return self._tail - self._head
+
+    @property
+    def start_seq(self) -> int:
+        """Sequence number of the oldest live row."""
+        return self._start_seq
+
+    @property
+    def end_seq(self) -> int:
+        """Sequence number the next appended row will get."""
+        return self._start_seq + len(self)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(arr.nbytes for arr in self._data.values())
+
+    def _index(self, seq: int) -> int:
+        if not self._start_seq <= seq < self.end_seq:
+            raise IndexError(f"seq {seq} not in buffer [{self._start_seq}, {self.end_seq})")
+        return self._head + (seq - self._start_seq)
+
+    def _ensure_room(self, rows: int = 1) -> None:
+        if self._tail + rows <= self._size:
+            return
+        n = len(self)
+        if self.capacity is not None and n + rows > self.capacity:
+            # Rows the write evicts anyway are dropped before, not moved
+            self.popleft(n + rows - self.capacity)
+            n = len(self)
+        if self.capacity is None and n + rows > self._size // 2:
+            new_size = self._size
+            while n + rows > new_size // 2:
+                new_size *= 2
+            new_data = self._allocate(new_size)
+            for name, arr in self._data.items():
+                new_data[name][:n] = arr[self._head:self._tail]
+            self._data = new_data
+            self._size = new_size
+        else:
+            for arr in self._data.values():
+                arr[:n] = arr[self._head:self._tail]
+        self._head = 0
+        self._tail = n
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def _write_dtcs(self, i: int, seq: int, codes: List[str]) -> None:
+        dtc_row = self._data["dtc_codes"][i]
+        dtc_row[:] = NO_CODE
+        if len(codes) > MAX_DTC_PER_EVENT:
+            self._extra_dtcs[seq] = list(codes)
+        else:
+            for j, code in enumerate(codes):
+                dtc_row[j] = DTC_CODES.intern(code)
+
+    def append(self, event: TelematicsEvent) -> int:
+        """Append one event and return its sequence number."""
+        if self.vehicle_id is None:
+            self.vehicle_id = event.vehicle_id
+
+        self._ensure_room()
+        i = self._tail
+        seq = self.end_seq
+        data = self._data
+
+        for name in FLOAT_COLUMNS:
+            data[name][i] = getattr(event, name)
+        for name in INT_COLUMNS:
+            data[name][i] = getattr(event, name)
+
+        data["ts_us"][i], data["ts_offset_min"][i] = event.ts_epoch
+        data["driving_mode"][i] = DRIVING_MODES.intern(event.driving_mode)
+
+        codes = event.dtc_codes
+        data["dtc_count"][i] = min(len(codes), 127)
+        self._write_dtcs(i, seq, codes)
+
+        raw_id = _uuid_bytes(event.event_id)
+        if raw_id is not None:
+            data["event_uuid"][i] = np.frombuffer(raw_id, dtype=np.uint8)
+        else:
+            data["event_uuid"][i] = 0
+            self._extra_ids[seq] = event.event_id
+
+        self._tail += 1
+        if self.capacity is not None and len(self) > self.capacity:
+            self.popleft(len(self) - self.capacity)
+        return seq
+
+    def extend(self, events: List[TelematicsEvent]) -> None:
+        """Append many events, filling each column with one slice assignment."""
+        events = list(events)
+        if self.capacity is not None and len(events) > self.capacity:
+            # Rows that would be evicted right away are skipped, their
+            # sequence numbers are still consumed.
+            skipped = len(events) - self.capacity
+            self.popleft(len(self))
+            self._start_seq += skipped
+            events = events[skipped:]
+        n = len(events)
+        if n == 0:
+            return
+        if self.vehicle_id is None:
+            self.vehicle_id = events[0].vehicle_id
+
+        self._ensure_room(n)
+        lo, hi = self._tail, self._tail + n
+        first_seq = self.end_seq
+        data = self._data
+
+        for name in FLOAT_COLUMNS:
+            data[name][lo:hi] = [getattr(ev, name) for ev in events]
+        for name in INT_COLUMNS:
+            data[name][lo:hi] = [getattr(ev, name) for ev in events]
+
+        epochs = np.array([ev.ts_epoch for ev in events], dtype=np.int64)
+        data["ts_us"][lo:hi] = epochs[:, 0]
+        data["ts_offset_min"][lo:hi] = epochs[:, 1]
+        data["driving_mode"][lo:hi] = [DRIVING_MODES.intern(ev.driving_mode) for ev in events]
+
+        dtc_lists = [ev.dtc_codes for ev in events]
+        data["dtc_count"][lo:hi] = [min(len(codes), 127) for codes in dtc_lists]
+        data["dtc_codes"][lo:hi] = NO_CODE
+        for k, codes in enumerate(dtc_lists):
+            if codes:
+                self._write_dtcs(lo + k, first_seq + k, codes)
+
+        raw_ids = []
+        for k, ev in enumerate(events):
+            raw_id = _uuid_bytes(ev.event_id)
+            if raw_id is None:
+                raw_id = bytes(16)
+                self._extra_ids[first_seq + k] = ev.event_id
+            raw_ids.append(raw_id)
+        data["event_uuid"][lo:hi] = np.frombuffer(b"".join(raw_ids), dtype=np.uint8).reshape(n, 16)
+
+        self._tail = hi
+        if self.capacity is not None and len(self) > self.capacity:
+            self.popleft(len(self) - self.capacity)
+
+    def extend_columns(self, columns: Dict[str, np.ndarray]) -> None:
+        """
+        Append rows given column-wise (every column of the buffer, same
+        length, codes from this process's interners), e.g. a slice of a
+        fleet_dataset file.
+        """
+        n = len(columns["ts_us"])
+        if self.capacity is not None and n > self.capacity:
+            skipped = n - self.capacity
+            self.popleft(len(self))
+            self._start_seq += skipped
+            columns = {name: col[skipped:] for name, col in columns.items()}
+            n = self.capacity
+        if n == 0:
+            return
+
+        self._ensure_room(n)
+        for name, arr in self._data.items():
+            arr[self._tail:self._tail + n] = columns[name]
+        self._tail += n
+        if self.capacity is not None and len(self) > self.capacity:
+            self.popleft(len(self) - self.capacity)
+
+    def extend_from(
+        self,
+        other: "TelematicsRingBuffer",
+        since_seq: int = 0,
+        max_rows: Optional[int] = None,
+    ) -> int:
+        """
+        Bulk-copy rows with seq >= since_seq from another buffer (only the
+        oldest max_rows of them if given). Returns the number of rows copied.
+        """
+        start = max(since_seq, other.start_seq)
+        count = other.end_seq - start
+        if max_rows is not None:
+            count = min(count, max_rows)
+        if count <= 0:
+            return 0
+        if self.vehicle_id is None:
+            self.vehicle_id = other.vehicle_id
+        if self.capacity is not None and count > self.capacity:
+            start += count - self.capacity
+            count = self.capacity
+
+        self._ensure_room(count)
+        src = other._index(start)
+        first_seq = self.end_seq
+        for name, arr in self._data.items():
+            arr[self._tail:self._tail + count] = other._data[name][src:src + count]
+        for seq, value in other._extra_ids.items():
+            if start <= seq < start + count:
+                self._extra_ids[first_seq + (seq - start)] = value
+        for seq, value in other._extra_dtcs.items():
+            if start <= seq < start + count:
+                self._extra_dtcs[first_seq + (seq - start)] = value
+
+        self._tail += count
+        if self.capacity is not None and len(self) > self.capacity:
+            self.popleft(len(self) - self.capacity)
+        return count
+
+    def snapshot(self) -> "TelematicsRingBuffer":
+        """Unbounded copy of the live rows, keeping their seq numbers."""
+        copy = TelematicsRingBuffer(self.vehicle_id, capacity=None, initial_rows=len(self))
+        copy._start_seq = self._start_seq
+        copy.extend_from(self, self._start_seq)
+        return copy
+
+    def popleft(self, count: int = 1) -> None:
+        """Drop the `count` oldest rows."""
+        count = min(count, len(self))
+        if count <= 0:
+            return
+        end = self._start_seq + count
+        if self._extra_ids:
+            self._extra_ids = {s: v for s, v in self._extra_ids.items() if s >= end}
+        if self._extra_dtcs:
+            self._extra_dtcs = {s: v for s, v in self._extra_dtcs.items() if s >= end}
+        self._head += count
+        self._start_seq = end
+        if self._head == self._tail:
+            self._head = self._tail = 0
+
+    # ------------------------------------------------------------------
+    # Columnar reads
+    # ------------------------------------------------------------------
+    def column(self, name: str) -> np.ndarray:
+        """Contiguous view of one column, oldest row first."""
+        return self._data[name][self._head:self._tail]
+
+    def value(self, name: str, seq: int):
+        """Single cell as a Python scalar."""
+        return self._data[name].item(self._index(seq))
+
+    def timestamp_iso(self, seq: int) -> str:
+        i = self._index(seq)
+        return epoch_us_to_iso(self._data["ts_us"][i], self._data["ts_offset_min"][i])
+
+    def dtc_codes_at(self, seq: int) -> List[str]:
+        if seq in self._extra_dtcs:
+            return list(self._extra_dtcs[seq])
+        i = self._index(seq)
+        n = int(self._data["dtc_count"][i])
+        return [DTC_CODES.value(int(c)) for c in self._data["dtc_codes"][i][:n]]
+
+    def last_dtc_codes(self) -> List[str]:
+        """DTC codes of the most recent row that reported any."""
+        nz = np.flatnonzero(self.column("dtc_count"))
+        if nz.size == 0:
+            return []
+        return self.dtc_codes_at(self._start_seq + int(nz[-1]))
+
+    # ------------------------------------------------------------------
+    # Event materialisation
+    # ------------------------------------------------------------------
+    def event_at(self, seq: int) -> TelematicsEvent:
+        i = self._index(seq)
+        data = self._data
+
+        if seq in self._extra_ids:
+            event_id = self._extra_ids[seq]
+        else:
+            event_id = str(uuid.UUID(bytes=data["event_uuid"][i].tobytes()))
+
+        fields = {name: data[name].item(i) for name in FLOAT_COLUMNS}
+        fields.update({name: data[name].item(i) for name in INT_COLUMNS})
+
+        ts_epoch = (int(data["ts_us"][i]), int(data["ts_offset_min"][i]))
+        return TelematicsEvent.trusted(
+            ts_epoch=ts_epoch,
+            event_id=event_id,
+            vehicle_id=self.vehicle_id,
+            timestamp=epoch_us_to_iso(*ts_epoch),
+            driving_mode=DRIVING_MODES.value(int(data["driving_mode"][i])),
+            dtc_codes=self.dtc_codes_at(seq),
+            **fields,
+        )
+
+    def last_event(self) -> TelematicsEvent:
+        if not len(self):
+            raise IndexError("buffer is empty")
+        return self.event_at(self.end_seq - 1)
+
+    def events_since(self, seq: int) -> List[TelematicsEvent]:
+        return [self.event_at(s) for s in range(max(seq, self._start_seq), self.end_seq)]
+
+    def to_events(self) -> List[TelematicsEvent]:
+        return self.events_since(self._start_seq)
+
+    def __iter__(self) -> Iterator[TelematicsEvent]:
+        for seq in range(self._start_seq, self.end_seq):
+            yield self.event_at(seq)
+
+    def __getitem__(self, index: Union[int, slice]):
+        n = len(self)
+        if isinstance(index, slice):
+            return [self.event_at(self._start_seq + i) for i in range(*index.indices(n))]
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("buffer index out of range")
+        return self.event_at(self._start_seq + index)
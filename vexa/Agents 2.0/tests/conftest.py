@@ -0,0 +1,107 @@
+import os
+import types
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+# Agents read their keys at construction; nothing in the suite calls out
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("TECDOC_RAPIDAPI_KEY", "test")
+
+
+class FakeLLM:
+    """Stands in for ChatOpenAI: counts calls, answers with a fixed report."""
+
+    def __init__(self, reply: str = "report", delay_s: float = 0.0) -> None:
+        self.reply = reply
+        self.delay_s = delay_s
+        self.prompts = []
+
+    def invoke(self, prompt: str):
+        import time
+
+        self.prompts.append(prompt)
+        if self.delay_s:
+            time.sleep(self.delay_s)
+        return types.SimpleNamespace(content=self.reply)
+
+
+def _stream(vehicle_id="VH-STREAM", n=500, seed=0, now=datetime(2025, 3, 1)):
+    """
+    Synthetic history with irregular timing: 2-minute samples, idle runs
+    of 1-6 samples and the odd gap of 20 minutes to 1.5 days, so the
+    7-day / 500 km windows expire rows and trips close both ways.
+    """
+    from synthetic_data import generate_vehicle_history
+
+    events, maintenance = generate_vehicle_history(vehicle_id, num_events=n, seed=seed, now=now)
+    rng = np.random.default_rng(seed)
+    ts = now - timedelta(days=20)
+    idle_left = 0
+    out = []
+    for ev in events:
+        if rng.random() < 0.03:
+            ts += timedelta(seconds=float(rng.choice([20 * 60, 6 * 3600, 36 * 3600])))
+        else:
+            ts += timedelta(minutes=2)
+        if idle_left == 0 and rng.random() < 0.08:
+            idle_left = int(rng.integers(1, 7))
+        speed = ev.speed_kmph
+        if idle_left:
+            speed, idle_left = 0.0, idle_left - 1
+        out.append(ev.model_copy(update={"timestamp": ts.isoformat(), "speed_kmph": speed}))
+    return out, maintenance
+
+
+@pytest.fixture
+def make_stream():
+    return _stream
+
+
+@pytest.fixture
+def fake_llm():
+    return FakeLLM
+
+
+@pytest.fixture
+def make_master(tmp_path, monkeypatch):
+    """Builds MasterAgents with their DB / spill files under tmp_path and no network."""
+    monkeypatch.chdir(tmp_path)
+    from agents.master_agent import MasterAgent
+
+    def offline(path, params=None):
+        raise RuntimeError("offline")
+
+    def make(**kwargs):
+        kwargs.setdefault("spill_dir", str(tmp_path / f"spill-{len(built)}"))
+        agent = MasterAgent(**kwargs)
+        agent.diagnosis.llm = FakeLLM()
+        agent.spare_parts._get = offline
+        built.append(agent)
+        return agent
+
+    built = []
+    yield make
+    for agent in built:
+        fleet = agent.__dict__.get("fleet_agent")
+        if fleet is not None and fleet.analyzer is not None:
+            fleet.analyzer.shutdown()
+
+
+@pytest.fixture
+def master(make_master):
+    return make_master()
+
+
+@pytest.fixture
+def api(make_master, monkeypatch):
+    """TestClient for main.app, served by a fresh offline MasterAgent."""
+    from fastapi.testclient import TestClient
+
+    import main
+    from versions import VersionCounters
+
+    monkeypatch.setattr(main, "master_agent", make_master(history_now=datetime(2025, 3, 1)))
+    monkeypatch.setattr(main, "insights_versions", VersionCounters())
+    return TestClient(main.app)
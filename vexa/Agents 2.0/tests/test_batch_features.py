@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from batch_features import (
+    FEATURE_NAMES,
+    FleetTelematics,
+    compute_fleet_features,
+    last_replacement_odometers,
+)
+from feature_engineering import compute_windowed_features
+from telematics_buffer import TelematicsRingBuffer
+
+
+@pytest.fixture
+def fleet(make_stream):
+    """Three vehicles of different lengths, one with a single event."""
+    streams, maintenance = {}, {}
+    for i, (vid, n) in enumerate((("VH-B1", 400), ("VH-B2", 150), ("VH-B3", 1))):
+        streams[vid], maintenance[vid] = make_stream(vid, n=n, seed=i)
+    return streams, maintenance
+
+
+def _fleet_telematics(streams, shuffle=False):
+    buffers = {}
+    for vid, events in streams.items():
+        buffers[vid] = TelematicsRingBuffer(vid, capacity=None)
+        buffers[vid].extend(events)
+    fleet = FleetTelematics.from_buffers(buffers)
+    if shuffle:
+        order = np.random.default_rng(0).permutation(len(fleet))
+        fleet = FleetTelematics(
+            fleet.vehicle_ids, fleet.vehicle_idx[order], {n: c[order] for n, c in fleet.columns.items()}
+        )
+    return fleet
+
+
+@pytest.mark.parametrize("shuffle", [False, True])
+def test_fleet_features_match_per_vehicle_features(fleet, shuffle):
+    streams, maintenance = fleet
+    telematics = _fleet_telematics(streams, shuffle)
+    features = compute_fleet_features(
+        telematics, last_replacement_odometers(telematics.vehicle_ids, maintenance)
+    )
+
+    assert sorted(features.vehicle_ids) == sorted(streams)
+    assert features.feature_names == FEATURE_NAMES
+    for vid, events in streams.items():
+        expected = compute_windowed_features(events, maintenance[vid])
+        actual = features.row(vid)
+        assert set(expected) == set(actual)
+        for name, value in expected.items():
+            assert actual[name] == pytest.approx(value, rel=1e-9, abs=1e-9), name
+        # The latest row points back at the vehicle's newest event
+        row = features.latest_rows[features.index_of(vid)]
+        assert telematics.columns["ts_us"][row] == max(ev.ts_epoch_us for ev in events)
+
+
+def test_fleet_features_without_maintenance_count_from_zero(fleet):
+    streams, _ = fleet
+    features = compute_fleet_features(_fleet_telematics(streams))
+    for vid, events in streams.items():
+        expected = compute_windowed_features(events, [])
+        assert features.row(vid)["km_since_last_brake_change"] == pytest.approx(
+            expected["km_since_last_brake_change"]
+        )
@@ -0,0 +1,132 @@
+import threading
+
+from diagnosis_cache import DiagnosisCache, diagnosis_key
+from models import HealthScore, HealthSummary
+from single_flight import SingleFlight
+
+
+def _summary(timestamp="2025-01-01T00:00:00", eta_km=1234.0, score=0.4):
+    return HealthSummary(
+        vehicle_id="VH-1",
+        timestamp=timestamp,
+        component_health=[
+            HealthScore(component="brake_pad", health_score=score, risk_level="HIGH", eta_km=eta_km)
+        ],
+    )
+
+
+def test_key_ignores_timestamp_and_eta_within_bucket():
+    a = diagnosis_key(_summary("2025-01-01T00:00:00", 1234.0), ["P0300"])
+    b = diagnosis_key(_summary("2025-06-01T12:00:00", 1400.0), ["P0300"])
+    assert a == b
+    assert a != diagnosis_key(_summary(score=0.5), ["P0300"])
+    assert a != diagnosis_key(_summary(), ["P0420"])
+
+
+def test_memory_then_disk_tier(tmp_path):
+    db = str(tmp_path / "cache.db")
+    cache = DiagnosisCache(db_path=db)
+    cache.put("k", "report")
+    assert cache.get("k") == "report"
+    assert cache.memory_hits == 1
+
+    # A fresh instance only has the SQLite tier
+    reopened = DiagnosisCache(db_path=db)
+    assert reopened.get("k") == "report"
+    assert reopened.disk_hits == 1
+    assert reopened.get("k") == "report"
+    assert reopened.memory_hits == 1
+
+
+def test_ttl_expires_both_tiers(tmp_path, monkeypatch):
+    import diagnosis_cache
+
+    now = [1000.0]
+    monkeypatch.setattr(diagnosis_cache.time, "time", lambda: now[0])
+    cache = DiagnosisCache(db_path=str(tmp_path / "cache.db"), ttl_seconds=60)
+    cache.put("k", "report")
+    now[0] += 61
+    assert cache.get("k") is None
+    assert cache.misses == 1
+    assert cache.purge_expired() == 1
+
+
+def test_lru_bound():
+    cache = DiagnosisCache(db_path=None, max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, key)
+    assert cache.get("a") is None
+    assert cache.get("c") == "c"
+
+
+def test_concurrent_misses_share_one_llm_call(fake_llm, monkeypatch):
+    from agents import diagnosis_agent
+    from agents.diagnosis_agent import DiagnosisAgentLLM
+
+    monkeypatch.setattr(diagnosis_agent, "LLM_REQUESTS", SingleFlight())
+    agent = DiagnosisAgentLLM(cache=DiagnosisCache(db_path=None))
+    agent.llm = fake_llm(delay_s=0.2)
+
+    # Same state, different timestamps / exact eta: the prompts differ
+    summaries = [_summary(f"2025-01-01T00:00:0{i}", 1200.0 + i) for i in range(6)]
+    results = []
+    threads = [
+        threading.Thread(target=lambda s=s: results.append(agent.run(s, ["P0300"])))
+        for s in summaries
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == ["report"] * 6
+    assert len(agent.llm.prompts) == 1
+
+
+def test_uncached_path_coalesces_identical_prompts(fake_llm, monkeypatch):
+    from agents import diagnosis_agent
+    from agents.diagnosis_agent import DiagnosisAgentLLM
+
+    monkeypatch.setattr(diagnosis_agent, "LLM_REQUESTS", SingleFlight())
+    agent = DiagnosisAgentLLM(use_cache=False)
+    agent.llm = fake_llm(delay_s=0.2)
+
+    threads = [threading.Thread(target=agent.run, args=(_summary(), [])) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(agent.llm.prompts) == 1
+
+
+def test_disk_entry_keeps_its_age_in_memory(tmp_path, monkeypatch):
+    import diagnosis_cache
+
+    now = [1000.0]
+    monkeypatch.setattr(diagnosis_cache.time, "time", lambda: now[0])
+    db = str(tmp_path / "cache.db")
+    DiagnosisCache(db_path=db, ttl_seconds=60).put("k", "report")
+
+    now[0] += 50
+    reopened = DiagnosisCache(db_path=db, ttl_seconds=60)
+    assert reopened.get("k") == "report"  # promoted to memory
+    now[0] += 20
+    assert reopened.get("k") is None  # 70 s after it was written
+
+
+def test_get_or_compute_caches_results_not_errors():
+    import pytest
+
+    cache = DiagnosisCache(db_path=None)
+    calls = []
+
+    def fail():
+        calls.append("fail")
+        raise RuntimeError("llm down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute("k", fail)
+    assert cache.get_or_compute("k", lambda: calls.append("ok") or "report") == "report"
+    assert cache.get_or_compute("k", fail) == "report"
+    assert calls == ["fail", "ok"]
+    assert cache.stats()["memory_hits"] == 1
@@ -0,0 +1,91 @@
+import main
+from versions import VersionCounters, etag_matches
+
+
+def test_etag_matches_weak_comparison():
+    tag = 'W/"abc-1"'
+    assert etag_matches(tag, tag)
+    assert etag_matches('"abc-1"', tag)
+    assert etag_matches('"x", W/"abc-1"', tag)
+    assert etag_matches("*", tag)
+    assert not etag_matches(None, tag) and not etag_matches("", tag)
+    assert not etag_matches('W/"abc-2"', tag)
+
+
+def test_version_counter_tags():
+    versions = VersionCounters()
+    first = versions.etag("VH-1")
+    assert first.startswith('W/"') and versions.etag("VH-1") == first
+    assert versions.etag("VH-1", ("urgency",)) != first
+    versions.bump("VH-1")
+    assert versions.etag("VH-1") != first
+    # A restarted process never reissues a tag
+    assert VersionCounters().etag("VH-1") != first
+
+
+def _get(api, path, etag=None):
+    return api.get(path, headers={"If-None-Match": etag} if etag else {})
+
+
+def test_full_data_conditional_get(api, monkeypatch):
+    agent = main.master_agent
+    ingests = []
+    ingest = agent._ingest
+    monkeypatch.setattr(agent, "_ingest", lambda *a, **k: ingests.append(a) or ingest(*a, **k))
+    path = "/vehicle/VH-E1/full_data?simulate=false&fields=urgency,latest_telematics"
+
+    first = _get(api, path)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    ingests.clear()
+    cached = _get(api, path, etag)
+    assert cached.status_code == 304 and cached.content == b""
+    assert cached.headers["etag"] == etag and ingests == []
+
+    # Other fields, a simulated step or refresh=true are not answered from the tag
+    assert _get(api, "/vehicle/VH-E1/full_data?simulate=false&fields=urgency", etag).status_code == 200
+    assert _get(api, path + "&refresh=true", etag).status_code == 200
+    stepped = _get(api, path.replace("simulate=false", "simulate=true"), etag)
+    assert stepped.status_code == 200 and stepped.headers["etag"] != etag
+    etag = stepped.headers["etag"]
+    assert _get(api, path, etag).status_code == 304
+
+    # Changes made through the API invalidate the tag
+    api.post("/vehicle/VH-E1/book", json={"slot": "2025-03-02T10:00"})
+    booked = _get(api, path, etag)
+    assert booked.status_code == 200
+    etag = booked.headers["etag"]
+
+    event = agent.vehicle_memory.get("VH-E1").events.last_event()
+    pushed = event.model_copy(update={"event_id": "pushed-1"})
+    api.post(
+        "/telematics/batch",
+        content=pushed.model_dump_json(),
+        headers={"content-type": "application/x-ndjson"},
+    )
+    fresh = _get(api, path, etag)
+    assert fresh.status_code == 200
+    assert fresh.json()["latest_telematics"]["event_id"] == "pushed-1"
+
+
+def test_views_share_the_vehicle_version(api):
+    urgency = _get(api, "/vehicle/VH-E2/urgency?simulate=false")
+    health = _get(api, "/vehicle/VH-E2/health?simulate=false")
+    assert urgency.headers["etag"] != health.headers["etag"]
+    assert _get(api, "/vehicle/VH-E2/urgency?simulate=false", urgency.headers["etag"]).status_code == 304
+
+    api.post("/vehicle/VH-E2/complete_service")
+    assert _get(api, "/vehicle/VH-E2/health?simulate=false", health.headers["etag"]).status_code == 200
+
+
+def test_insights_conditional_get(api, monkeypatch):
+    monkeypatch.setattr(
+        main.manufacturing_agent, "generate_dashboard_insights", lambda services, feedback: {"ok": True}
+    )
+    first = _get(api, "/manufacturing/insights")
+    etag = first.headers["etag"]
+    assert _get(api, "/manufacturing/insights", etag).status_code == 304
+
+    api.post("/vehicle/VH-E3/feedback", json={"rating": 4})
+    assert _get(api, "/manufacturing/insights", etag).status_code == 200
@@ -0,0 +1,86 @@
+import os
+from datetime import datetime
+
+from agents.master_agent import DEFAULT_BACKEND_LIMITS
+
+
+def _caps(pipeline):
+    return {name: pipeline.limit(name) for name in pipeline._limits}
+
+
+def test_backend_limits_apply_without_fleet_agent(master):
+    assert "fleet_agent" not in master.__dict__
+    assert _caps(master.pipeline) == DEFAULT_BACKEND_LIMITS
+
+
+def test_fleet_agent_overrides_only_explicit_limits(master):
+    from agents.fleet_agent import FleetAgent
+
+    FleetAgent(master, backend_limits={"llm": 1, "nylas": None})
+    assert _caps(master.pipeline) == {"llm": 1, "tecdoc": DEFAULT_BACKEND_LIMITS["tecdoc"]}
+
+
+def _analysis(result):
+    """Fields computed by ingest + CPU stages, minus wall-clock stamps."""
+
+    def strip(value):
+        if isinstance(value, dict):
+            return {k: strip(v) for k, v in value.items() if k != "timestamp"}
+        if isinstance(value, list):
+            return [strip(v) for v in value]
+        return value
+
+    return strip(
+        {
+            "health": result["health_summary"]["component_health"],
+            "urgency": result["urgency"],
+            "dtc_codes": result["dtc_codes"],
+            "driver_tips": result["driver_tips"],
+            "vehicle_ueba": result["vehicle_ueba"],
+            "driver_ueba": result["driver_ueba"],
+        }
+    )
+
+
+def test_sharded_fleet_run_matches_in_process(make_master):
+    import asyncio
+
+    now = datetime(2025, 3, 1, 12, 0, 0)
+    in_process = make_master(history_now=now)
+    sharded = make_master(history_now=now, process_shards=2)
+    assert in_process.fleet_agent.analyzer is None
+    assert sharded.fleet_agent.analyzer.num_shards == 2
+
+    async def fleet(agent):
+        results = {}
+        async for vid, res, err in agent.fleet_agent.iter_fleet(["VH-S1", "VH-S2"]):
+            assert err is None, err
+            results[vid] = res
+        return results
+
+    expected = asyncio.run(fleet(in_process))
+    actual = asyncio.run(fleet(sharded))
+
+    assert set(actual) == {"VH-S1", "VH-S2"}
+    assert any(pool is not None for pool in sharded.fleet_agent.analyzer._pools)
+    for vid, result in expected.items():
+        assert _analysis(actual[vid]) == _analysis(result)
+        assert actual[vid]["health_summary"]["timestamp"] == result["health_summary"]["timestamp"]
+
+
+def test_shard_workers_spill_to_their_own_directories(tmp_path, monkeypatch):
+    import asyncio
+
+    from fleet_shards import ShardedAnalyzer, shard_of
+
+    # Workers inherit the cwd their agents put the database in
+    monkeypatch.chdir(tmp_path)
+    spill_dir = tmp_path / "spill"
+    analyzer = ShardedAnalyzer(2, history_now=datetime(2025, 3, 1), spill_dir=str(spill_dir))
+    try:
+        inputs = asyncio.run(analyzer.analyze("VH-S1", simulate=False))
+    finally:
+        analyzer.shutdown()
+    assert inputs["vehicle_id"] == "VH-S1" and inputs["events"] is None
+    # Only the vehicle's shard was started, in its own directory
+    assert os.listdir(spill_dir) == [f"shard-{shard_of('VH-S1', 2)}"]
@@ -0,0 +1,84 @@
+import json
+import os
+import uuid
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from fleet_dataset import (
+    META_FILE,
+    UNIFORM_RANGES,
+    generate_fleet_telematics,
+    open_fleet_dataset,
+    vehicle_buffers,
+    write_fleet_dataset,
+)
+from models import TelematicsEvent
+from timestamps import datetime_to_epoch_us
+
+START = datetime(2025, 3, 1)
+# 5 vehicles x 30 rows, generated 2 vehicles (60 rows) per block
+ARGS = dict(num_vehicles=5, duration_hours=1.0, sample_interval_s=120.0, seed=7, start=START, chunk_rows=60)
+
+
+def test_generated_fleet_is_deterministic_and_well_formed():
+    fleet = generate_fleet_telematics(**ARGS)
+    again = generate_fleet_telematics(**ARGS)
+    other = generate_fleet_telematics(**dict(ARGS, seed=8))
+    assert len(fleet) == 150 and fleet.vehicle_ids == [f"LT-{i:06d}" for i in range(5)]
+    for name, col in fleet.columns.items():
+        np.testing.assert_array_equal(col, again.columns[name])
+    assert not np.array_equal(fleet.columns["speed_kmph"], other.columns["speed_kmph"])
+
+    cols = fleet.columns
+    for name, (low, high) in UNIFORM_RANGES.items():
+        assert cols[name].min() >= low and cols[name].max() <= high, name
+    start_us, _ = datetime_to_epoch_us(START)
+    ts = cols["ts_us"].reshape(5, 30)
+    assert (ts[:, 0] == start_us).all() and (np.diff(ts, axis=1) == 120_000_000).all()
+    assert (np.diff(cols["odometer_km"].reshape(5, 30), axis=1) > 0).all()
+    assert set(np.unique(cols["dtc_count"])) <= {0, 1}
+
+    events = vehicle_buffers(fleet)["LT-000003"].to_events()
+    assert len(events) == 30
+    for event in events:
+        assert uuid.UUID(event.event_id).version == 4
+        assert event.driving_mode in ("city", "highway")
+        assert len(event.dtc_codes) <= 1
+        # What the generator writes passes the event schema
+        TelematicsEvent.model_validate(event.model_dump())
+
+
+def test_written_dataset_reads_back_like_the_in_memory_one(tmp_path):
+    path = str(tmp_path / "fleet")
+    meta = write_fleet_dataset(path, **ARGS)
+    assert meta["rows_per_vehicle"] == 30 and META_FILE in os.listdir(path)
+
+    expected = generate_fleet_telematics(**ARGS)
+    for mmap in (True, False):
+        loaded = open_fleet_dataset(path, mmap=mmap)
+        assert loaded.vehicle_ids == expected.vehicle_ids
+        np.testing.assert_array_equal(loaded.vehicle_idx, expected.vehicle_idx)
+        for name, col in expected.columns.items():
+            np.testing.assert_array_equal(loaded.columns[name], col, err_msg=name)
+    assert isinstance(open_fleet_dataset(path).columns["speed_kmph"], np.memmap)
+
+    newest = vehicle_buffers(loaded, capacity=10)["LT-000001"]
+    assert len(newest) == 10
+    assert newest.column("ts_us")[0] == expected.columns["ts_us"][30 + 20]
+
+
+def test_invalid_datasets_are_rejected(tmp_path):
+    with pytest.raises(ValueError, match="at least one"):
+        generate_fleet_telematics(**dict(ARGS, duration_hours=0.01))
+    path = str(tmp_path / "fleet")
+    write_fleet_dataset(path, **ARGS)
+    meta_path = os.path.join(path, META_FILE)
+    with open(meta_path) as f:
+        meta = json.load(f)
+    meta["format"] = 99
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+    with pytest.raises(ValueError, match="Unsupported fleet dataset format"):
+        open_fleet_dataset(path)
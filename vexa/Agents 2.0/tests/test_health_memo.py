@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+from agents.data_analysis_agent import DataAnalysisAgent
+from health_memo import DEFAULT_STEPS, HealthMemo
+from models import HealthSummary
+
+
+def _summary(timestamp="2025-03-01T00:00:00"):
+    return HealthSummary(vehicle_id="VH-M", timestamp=timestamp, component_health=[])
+
+
+def _memo_with(features, **kwargs):
+    memo = HealthMemo(**kwargs)
+    memo.store("VH-M", features, _summary())
+    return memo
+
+
+def test_relative_epsilon_and_min_step():
+    memo = _memo_with({"avg_brake_pressure": 100.0, "overheat_events": 0.0}, epsilon=0.01, min_step=0.01)
+    assert memo.lookup("VH-M", {"avg_brake_pressure": 100.9, "overheat_events": 0.005}, "t1")
+    assert memo.lookup("VH-M", {"avg_brake_pressure": 101.5, "overheat_events": 0.0}, "t2") is None
+    # A zero reference falls back to min_step
+    assert memo.lookup("VH-M", {"avg_brake_pressure": 100.0, "overheat_events": 0.02}, "t3") is None
+    assert (memo.hits, memo.misses) == (1, 2)
+
+
+def test_fixed_steps_for_cumulative_distances():
+    assert DEFAULT_STEPS["latest_odometer_km"] == 5.0
+    memo = _memo_with({"latest_odometer_km": 10_000.0})
+    assert memo.lookup("VH-M", {"latest_odometer_km": 10_004.0}, "t1") is not None
+    # 1% of the odometer would be 100 km; its fixed step is 5 km
+    assert memo.lookup("VH-M", {"latest_odometer_km": 10_006.0}, "t2") is None
+
+
+def test_drift_is_measured_from_the_scored_reference():
+    memo = _memo_with({"latest_odometer_km": 10_000.0})
+    assert memo.lookup("VH-M", {"latest_odometer_km": 10_003.0}, "t1") is not None
+    # Only 3 km past the previous poll, but 6 km past what was scored
+    assert memo.lookup("VH-M", {"latest_odometer_km": 10_006.0}, "t2") is None
+
+
+def test_hit_is_a_copy_with_the_new_timestamp():
+    memo = _memo_with({"dtc_count": 1.0})
+    hit = memo.lookup("VH-M", {"dtc_count": 1.0}, "2025-03-02T00:00:00")
+    assert hit.unchanged and hit.timestamp == "2025-03-02T00:00:00"
+    assert memo.pop("VH-M")[1].unchanged is False
+
+    memo = _memo_with({"dtc_count": 1.0})
+    assert memo.lookup("VH-M", {"dtc_count": 1.0, "overheat_events": 0.0}, "t") is None
+    assert memo.lookup("VH-X", {"dtc_count": 1.0}, "t") is None
+    memo.invalidate("VH-M")
+    assert memo.lookup("VH-M", {"dtc_count": 1.0}, "t") is None
+
+
+def _next(event, **update):
+    ts = datetime.fromisoformat(event.timestamp) + timedelta(seconds=10)
+    return event.model_copy(update={"event_id": f"{event.event_id}+", "timestamp": ts.isoformat(), **update})
+
+
+def test_odometer_moving_past_its_step_forces_a_rescore(make_stream):
+    events, maintenance = make_stream("VH-M", n=200)
+    # 5%: one more sample barely moves the window averages
+    agent = DataAnalysisAgent(change_epsilon=0.05)
+    first = agent.handle_events(events, maintenance)
+    assert not first.unchanged
+
+    # A DTC would add to the 7-day dtc_count
+    same = _next(events[-1], dtc_codes=[])
+    repeat = agent.handle_event(same, maintenance)
+    assert repeat.unchanged and repeat.timestamp == same.timestamp
+    assert repeat.component_health == first.component_health
+
+    moved = _next(same, odometer_km=same.odometer_km + 10.0)
+    rescored = agent.handle_event(moved, maintenance)
+    assert not rescored.unchanged
+    brake = {h.component: h for h in rescored.component_health}["brake_pad"]
+    before = {h.component: h for h in first.component_health}["brake_pad"]
+    assert brake.details["km_since_last_change"] > before.details["km_since_last_change"]
+    assert agent.memo.hits == 1
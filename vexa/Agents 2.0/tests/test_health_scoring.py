@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from health_scoring import HealthModelParams, compute_all_components, score_batch
+
+SCORED_FEATURES = [
+    "hard_brakes_per_100km",
+    "km_since_last_brake_change",
+    "avg_battery_voltage_v",
+    "km_since_last_battery_change",
+    "low_tire_pressure_ratio",
+    "overheat_events",
+    "max_coolant_temp_c",
+    "dtc_count",
+    "harsh_accel_braking_index",
+]
+
+
+def _matrix(n=40, seed=0):
+    """Feature rows spread over every risk band, clipping both ends."""
+    rng = np.random.default_rng(seed)
+    return np.column_stack(
+        [
+            rng.uniform(0, 40, n),
+            rng.uniform(0, 60_000, n),
+            rng.uniform(10.5, 13.0, n),
+            rng.uniform(0, 90_000, n),
+            rng.uniform(0, 1, n),
+            rng.integers(0, 12, n),
+            rng.uniform(80, 130, n),
+            rng.integers(0, 9, n),
+            rng.uniform(0, 4, n),
+        ]
+    )
+
+
+def _assert_rows_match(batch, matrix, names, params):
+    for row in range(len(matrix)):
+        expected = compute_all_components(dict(zip(names, matrix[row])), params)
+        actual = batch.to_health_scores(row)
+        assert [s.component for s in actual] == [s.component for s in expected]
+        for a, e in zip(actual, expected):
+            assert a.risk_level == e.risk_level, (row, e.component)
+            assert a.health_score == pytest.approx(e.health_score, abs=1e-12)
+            assert (a.eta_km is None) == (e.eta_km is None)
+            if e.eta_km is not None:
+                assert a.eta_km == pytest.approx(e.eta_km, rel=1e-12)
+            assert a.details == pytest.approx(e.details, rel=1e-12)
+
+
+@pytest.mark.parametrize(
+    "params", [HealthModelParams(), HealthModelParams(brake_base_life_km=20_000, high_risk_below=0.4)]
+)
+def test_score_batch_matches_scalar_scorer(params):
+    matrix = _matrix()
+    batch = score_batch(matrix, SCORED_FEATURES, params=params)
+    assert len(batch) == len(matrix) and {"LOW", "MEDIUM", "HIGH"} <= set(batch.risk_levels().ravel())
+    _assert_rows_match(batch, matrix, SCORED_FEATURES, params)
+
+
+def test_score_batch_defaults_missing_features_like_scalar_scorer():
+    # Extra columns are ignored, missing ones take the scalar .get() defaults
+    names = ["km_since_last_brake_change", "dtc_count", "latest_odometer_km"]
+    matrix = _matrix()[:, [1, 7, 3]]
+    batch = score_batch(matrix, names, vehicle_ids=[f"VH-{i}" for i in range(len(matrix))])
+    assert batch.index_of("VH-3") == 3
+    _assert_rows_match(batch, matrix, names, HealthModelParams())
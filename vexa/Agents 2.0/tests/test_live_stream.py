@@ -0,0 +1,120 @@
+import asyncio
+import json
+
+import pytest
+
+import main
+from live_stream import LiveTelematicsHub
+
+
+class _Frames:
+    """Frame source: two components, the brake score drops, then one failure."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, vehicle_id):
+        self.calls += 1
+        if self.calls == 3:
+            raise RuntimeError("sensor offline")
+        brake = 0.9 if self.calls == 1 else 0.5
+        return {
+            "vehicle_id": vehicle_id,
+            "timestamp": f"t{self.calls}",
+            "urgency": "LOW",
+            "latest_telematics": {"speed_kmph": 40.0 + self.calls},
+            "health": [
+                {"component": "brake_pad", "health_score": brake, "risk_level": "LOW"},
+                {"component": "battery", "health_score": 0.8, "risk_level": "LOW"},
+            ],
+        }
+
+
+def _parse(body):
+    events = []
+    for block in body.split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if fields:
+            events.append((fields["event"], int(fields["id"]), json.loads(fields["data"])))
+    return events
+
+
+async def _stream(app, path, count):
+    """
+    GET an SSE endpoint through the ASGI interface, disconnect after
+    `count` events. (TestClient reads the whole body, which never ends.)
+    """
+    received, enough = [], asyncio.Event()
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await enough.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            received.append(message)
+        elif message["type"] == "http.response.body":
+            received.append(message["body"].decode())
+            if sum(chunk.count("\n\n") for chunk in received[1:]) >= count:
+                enough.set()
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"test")],
+        "client": ("test", 1),
+        "server": ("test", 80),
+    }
+    await asyncio.wait_for(app(scope, receive, send), timeout=10)
+    return received[0], "".join(received[1:])
+
+
+@pytest.fixture
+def hub(monkeypatch):
+    hub = LiveTelematicsHub(_Frames(), interval_s=0.01)
+    monkeypatch.setattr(main, "live_hub", hub)
+    return hub
+
+
+def test_live_stream_sends_snapshot_deltas_and_errors(hub):
+    start, body = asyncio.run(_stream(main.app, "/vehicle/VH-L/live", count=4))
+    assert start["status"] == 200
+    assert (b"content-type", b"text/event-stream; charset=utf-8") in start["headers"]
+
+    events = _parse(body)[:4]
+    assert [(name, seq) for name, seq, _ in events] == [
+        ("snapshot", 1), ("frame", 2), ("error", 3), ("frame", 4)
+    ]
+    snapshot, delta, error, unchanged = (data for _, _, data in events)
+    assert [c["component"] for c in snapshot["health"]] == ["brake_pad", "battery"]
+    # Only the component whose score moved, with the latest telematics
+    assert delta["health"] == [{"component": "brake_pad", "health_score": 0.5, "risk_level": "LOW"}]
+    assert delta["latest_telematics"] == {"speed_kmph": 42.0}
+    assert error == {"vehicle_id": "VH-L", "error": "sensor offline"}
+    assert unchanged["health"] == [] and unchanged["timestamp"] == "t4"
+
+
+def test_disconnect_unsubscribes_and_stops_the_producer(hub):
+    async def watch():
+        await _stream(main.app, "/vehicle/VH-L/live", count=2)
+        stats, calls = hub.stats(), hub.frame_source.calls
+        # Ten intervals: a producer still running would poll again
+        await asyncio.sleep(0.1)
+        return stats, calls, hub.frame_source.calls
+
+    stats, calls, later = asyncio.run(watch())
+    assert stats["subscribers"] == 0 and stats["vehicles"] == 0
+    assert hub._snapshots == {} and hub._subscribers == {}
+    assert later == calls
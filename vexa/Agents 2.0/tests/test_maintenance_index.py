@@ -0,0 +1,63 @@
+import numpy as np
+
+from maintenance_index import FleetMaintenanceIndex, MaintenanceIndex, as_maintenance_index
+from models import MaintenanceRecord, ReplacedPart
+
+
+def _record(vehicle_id, record_id, odometer_km, *components):
+    return MaintenanceRecord(
+        record_id=record_id,
+        vehicle_id=vehicle_id,
+        service_date=f"2025-01-{len(record_id):02d}",
+        odometer_km=odometer_km,
+        service_center_id="SC-1",
+        complaint_desc="",
+        dtc_at_intake=[],
+        operations=[],
+        parts_replaced=[
+            ReplacedPart(part_number=f"PN-{c}", component=c, qty=1, reason_code="wear") for c in components
+        ],
+        warranty_flag=False,
+    )
+
+
+def test_latest_replacement_per_component_in_any_order():
+    records = [
+        _record("VH-1", "R3", 30_000.0, "brake_pad", "battery"),
+        _record("VH-1", "R1", 10_000.0, "brake_pad"),
+        _record("VH-1", "R2", 0.0, "tire"),
+        _record("VH-1", "R4", 20_000.0, "battery"),
+    ]
+    index = MaintenanceIndex(records)
+    assert index.vehicle_id == "VH-1" and len(index) == 4 and list(index) == records
+
+    assert index.last_replacement("brake_pad").record_id == "R3"
+    assert index.last_replacement_odometer("battery") == 30_000.0
+    # A replacement at 0 km does not count, as in the original scan
+    assert index.last_replacement("tire") is None
+    assert index.km_since_last_replacement("brake_pad", 31_500.0) == 1_500.0
+    assert index.km_since_last_replacement("brake_pad", 29_000.0) == 0.0
+    assert index.km_since_last_replacement("tire", 31_500.0) == 31_500.0
+
+    index.add(_record("VH-1", "R5", 35_000.0, "tire"))
+    assert index.last_replacement_odometer("tire") == 35_000.0
+    assert as_maintenance_index(index) is index
+    assert as_maintenance_index(records).last_replacement("battery").record_id == "R3"
+
+
+def test_fleet_bulk_load_from_list_or_mapping():
+    records = [
+        _record("VH-1", "R1", 10_000.0, "brake_pad"),
+        _record("VH-2", "R2", 5_000.0, "battery"),
+        _record("VH-1", "R3", 12_000.0, "battery"),
+    ]
+    by_vehicle = {"VH-1": [records[0], records[2]], "VH-2": [records[1]]}
+    for source in (records, iter(records), by_vehicle):
+        fleet = FleetMaintenanceIndex.bulk_load(source)
+        assert len(fleet) == 2 and "VH-1" in fleet and "VH-9" not in fleet
+        odometers = fleet.last_replacement_odometers(["VH-2", "VH-9", "VH-1"], ["brake_pad", "battery"])
+        np.testing.assert_array_equal(odometers["brake_pad"], [0.0, 0.0, 10_000.0])
+        np.testing.assert_array_equal(odometers["battery"], [5_000.0, 0.0, 12_000.0])
+
+    # for_vehicle creates an empty index for an unknown vehicle
+    assert len(fleet.for_vehicle("VH-9")) == 0 and "VH-9" in fleet
@@ -0,0 +1,109 @@
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from agents.master_agent import EXPENSIVE_STAGES, OUTCOME_STAGES
+
+
+class _SlowCoach:
+    """Driver coach that checks its events do not change under it."""
+
+    def __init__(self):
+        self.seen = []
+
+    def run(self, events):
+        end_seq, speed = events.end_seq, events.column("speed_kmph").copy()
+        time.sleep(0.05)
+        assert events.end_seq == end_seq
+        assert np.array_equal(events.column("speed_kmph"), speed)
+        self.seen.append(end_seq)
+        return "tips"
+
+
+def test_concurrent_simulated_requests_give_stages_a_stable_snapshot(master, monkeypatch):
+    coach = _SlowCoach()
+    monkeypatch.setattr(master, "driver_coach", coach)
+    vehicle_id = "VH-RACE"
+    master.process_vehicle(vehicle_id, simulate=False, fields=["urgency"])
+    start = master.vehicle_memory.get(vehicle_id).events.end_seq
+
+    async def burst():
+        return await asyncio.gather(
+            *(
+                master.process_vehicle_async(
+                    vehicle_id, simulate=True, fields=["driver_tips", "vehicle_ueba", "driver_ueba"]
+                )
+                for _ in range(6)
+            )
+        )
+
+    results = asyncio.run(burst())
+    assert all(r["driver_tips"] == "tips" for r in results)
+    # Every request appended one row and its stages saw exactly that state
+    assert sorted(coach.seen) == list(range(start + 1, start + 7))
+    assert master.vehicle_memory.get(vehicle_id).events.end_seq == start + 6
+
+
+@pytest.fixture
+def scored(master, monkeypatch):
+    """A MEDIUM-urgency vehicle with a full previous outcome, and inputs for its next call."""
+    monkeypatch.setattr(master, "_decide_urgency", lambda summary: "MEDIUM")
+    master.process_vehicle("VH-R", simulate=False)
+    return master, master._ingest("VH-R", simulate=False)
+
+
+def _with(inputs, **changes):
+    return dict(inputs, **changes)
+
+
+def test_unchanged_summary_reuses_every_outcome(scored):
+    master, inputs = scored
+    unchanged = _with(inputs, summary=inputs["summary"].model_copy(update={"unchanged": True}))
+    plan = master._reuse_plan(unchanged, refresh=False)
+    assert plan == master._last_outcome["VH-R"]["values"]
+    assert set(plan) == set(OUTCOME_STAGES)
+    assert master._reuse_plan(unchanged, refresh=True) == {}
+
+
+def test_dtc_change_reruns_everything(scored):
+    master, inputs = scored
+    unchanged = inputs["summary"].model_copy(update={"unchanged": True})
+    changed = _with(inputs, summary=unchanged, dtc_codes=inputs["dtc_codes"] + ["P0420"])
+    assert master._reuse_plan(changed, refresh=False) == {}
+
+
+def test_urgency_gates_the_expensive_stages(scored):
+    master, inputs = scored
+    assert master.expensive_min_urgency == "HIGH" and inputs["urgency"] == "MEDIUM"
+    assert set(master._reuse_plan(inputs, refresh=False)) == set(EXPENSIVE_STAGES)
+
+    assert master._reuse_plan(_with(inputs, urgency="LOW"), refresh=False) == {}
+    # At or above expensive_min_urgency they always run
+    master.expensive_min_urgency = "MEDIUM"
+    assert master._reuse_plan(inputs, refresh=False) == {}
+
+
+def test_stage_ages_report_reused_stages(scored):
+    master, _ = scored
+    outcome = master._last_outcome["VH-R"]
+    outcome["computed_at"] = {name: t - 12.5 for name, t in outcome["computed_at"].items()}
+
+    # Same urgency, summary rescored: only the gated stages are reused
+    result = master.process_vehicle("VH-R", simulate=False)
+    assert set(result["stage_ages_s"]) == set(EXPENSIVE_STAGES)
+    assert all(age == pytest.approx(12.5, abs=1.0) for age in result["stage_ages_s"].values())
+    assert not set(EXPENSIVE_STAGES) & set(result["stage_timings_ms"])
+    assert {"alert", "message", "booking"} <= set(result["stage_timings_ms"])
+
+    # Reused stages keep their age; rerun ones start again from zero
+    state = master.vehicle_memory.get("VH-R")
+    state.latest_summary = state.latest_summary.model_copy(update={"unchanged": True})
+    result = master.process_vehicle("VH-R", simulate=False)
+    ages = result["stage_ages_s"]
+    assert set(ages) == set(OUTCOME_STAGES)
+    assert ages["diagnosis"] == pytest.approx(12.5, abs=1.0) and ages["alert"] < 1.0
+    assert not set(OUTCOME_STAGES) & set(result["stage_timings_ms"])
+
+    assert master.process_vehicle("VH-R", simulate=False, refresh=True)["stage_ages_s"] == {}
@@ -0,0 +1,45 @@
+from datetime import datetime, timezone
+
+from models import TelematicsEvent
+from telematics_buffer import TelematicsRingBuffer
+from timestamps import NAIVE_TS
+
+
+def _fields(event):
+    return {name: getattr(event, name) for name in TelematicsEvent.model_fields}
+
+
+def test_trusted_event_matches_a_validated_one(make_stream):
+    validated = make_stream(n=5)[0][-1]
+    trusted = TelematicsEvent.trusted(**_fields(validated))
+    assert trusted.model_dump() == validated.model_dump()
+    assert trusted.model_dump_json() == validated.model_dump_json()
+    assert trusted.model_fields_set == validated.model_fields_set
+    assert TelematicsEvent.model_validate_json(trusted.model_dump_json()).model_dump() == trusted.model_dump()
+    assert trusted.ts_epoch_us == validated.ts_epoch_us
+
+    buffer = TelematicsRingBuffer(trusted.vehicle_id)
+    buffer.append(trusted)
+    assert buffer.last_event().model_dump() == validated.model_dump()
+
+
+def test_ts_epoch_parses_offsets_and_naive_timestamps(make_stream):
+    event = make_stream(n=1)[0][0]
+    aware = event.model_copy(update={"timestamp": "2025-03-01T10:00:00+05:30"})
+    utc = datetime(2025, 3, 1, 4, 30, tzinfo=timezone.utc)
+    assert aware.ts_epoch == (int(utc.timestamp()) * 1_000_000, 330)
+
+    naive = event.model_copy(update={"timestamp": "2025-03-01T04:30:00.000250"})
+    assert naive.ts_epoch == (int(utc.timestamp()) * 1_000_000 + 250, NAIVE_TS)
+
+
+def test_ts_epoch_uses_the_given_value_until_the_timestamp_changes(make_stream):
+    fields = _fields(make_stream(n=1)[0][0])
+    # A deliberately wrong pre-computed value shows the cache is used
+    trusted = TelematicsEvent.trusted(ts_epoch=(123, 0), **fields)
+    assert trusted.ts_epoch == (123, 0)
+
+    trusted.timestamp = "2025-03-01T00:00:00"
+    assert trusted.ts_epoch_us == int(datetime(2025, 3, 1, tzinfo=timezone.utc).timestamp()) * 1_000_000
+    # Without ts_epoch it is parsed on first use
+    assert TelematicsEvent.trusted(**fields).ts_epoch == TelematicsEvent(**fields).ts_epoch
@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from pipeline import Stage, StagePipeline
+
+
+def _record(log, name, value=None, delay_s=0.0):
+    def fn(values):
+        log.append(("start", name))
+        if delay_s:
+            time.sleep(delay_s)
+        log.append(("end", name))
+        return value if value is not None else name
+
+    return fn
+
+
+def _graph(log, delay_s=0.0):
+    return StagePipeline(
+        [
+            Stage("c", _record(log, "c"), ("a", "b"), "inline"),
+            Stage("a", _record(log, "a", delay_s=delay_s), ("x",), "io"),
+            Stage("b", _record(log, "b", delay_s=delay_s), ("x",), "cpu"),
+            Stage("d", _record(log, "d"), (), "io"),
+        ],
+        inputs=("x",),
+    )
+
+
+def test_invalid_graphs_rejected():
+    with pytest.raises(ValueError, match="unknown"):
+        StagePipeline([Stage("a", lambda v: 1, ("missing",))])
+    with pytest.raises(ValueError, match="Cycle"):
+        StagePipeline([Stage("a", lambda v: 1, ("b",)), Stage("b", lambda v: 1, ("a",))])
+    with pytest.raises(ValueError, match="kind"):
+        StagePipeline([Stage("a", lambda v: 1, (), "gpu")])
+
+
+def test_plan_orders_dependencies_and_prunes():
+    pipeline = _graph([])
+    order = pipeline.plan()
+    assert order.index("a") < order.index("c") and order.index("b") < order.index("c")
+    assert pipeline.plan(["c"]) == [n for n in order if n in ("a", "b", "c")]
+    assert pipeline.plan(["d"]) == ["d"]
+    with pytest.raises(ValueError):
+        pipeline.plan(["nope"])
+
+
+def test_async_run_overlaps_independent_stages():
+    log = []
+    pipeline = _graph(log, delay_s=0.2)
+    started = time.perf_counter()
+    run = asyncio.run(pipeline.run({"x": 1}, targets=["c"]))
+    elapsed = time.perf_counter() - started
+
+    assert run["c"] == "c" and "d" not in run.values
+    assert elapsed < 0.35
+    # c starts only after both of its dependencies ended
+    assert log.index(("start", "c")) > max(log.index(("end", "a")), log.index(("end", "b")))
+
+
+def test_reuse_and_precomputed_inputs_skip_stages():
+    log = []
+    pipeline = _graph(log)
+    run = pipeline.run_sync({"x": 1, "b": "from-shard"}, reuse={"a": "cached"})
+    assert run["a"] == "cached" and run["b"] == "from-shard"
+    assert run.reused == ["a"]
+    assert ("start", "a") not in log and ("start", "b") not in log
+
+
+def test_resource_limit_caps_concurrent_stages():
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def call(values):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+
+    pipeline = StagePipeline(
+        [Stage(f"s{i}", call, (), "io", "api") for i in range(6)]
+    )
+    pipeline.set_limit("api", 2)
+    asyncio.run(pipeline.run({}))
+    assert peak[0] == 2
+
+    pipeline.set_limit("api", None)
+    peak[0] = 0
+    asyncio.run(pipeline.run({}))
+    assert peak[0] > 2
+
+
+def test_stages_waiting_on_a_limit_leave_io_threads_free():
+    ended = []
+
+    def slow(values):
+        time.sleep(0.05)
+        ended.append("api")
+
+    stages = [Stage(f"api{i}", slow, (), "io", "api") for i in range(4)]
+    stages.append(Stage("free", lambda values: ended.append("free"), (), "io"))
+    pipeline = StagePipeline(stages, io_executor=ThreadPoolExecutor(max_workers=1))
+    pipeline.set_limit("api", 1)
+    assert pipeline.limit("api") == 1 and pipeline.limit("other") is None
+
+    asyncio.run(pipeline.run({}))
+    assert ended.index("free") < 2 and ended.count("api") == 4
+
+
+def test_failing_stage_raises():
+    def boom(values):
+        raise RuntimeError("stage failed")
+
+    pipeline = StagePipeline([Stage("a", boom), Stage("b", lambda v: 1, ("a",))])
+    with pytest.raises(RuntimeError, match="stage failed"):
+        asyncio.run(pipeline.run({}))
+
+
+def test_slot_waits_for_a_reserved_part(master, monkeypatch):
+    calls = []
+    monkeypatch.setattr(master.spare_parts, "is_available_for_vehicle", lambda *a, **k: False)
+    monkeypatch.setattr(
+        master.scheduler, "propose_slot", lambda **kw: calls.append(kw) or {"slot": "x"}
+    )
+    inputs = master._ingest("VH-SLOT", simulate=False)
+    inputs["urgency"] = "CRITICAL"
+
+    run = asyncio.run(master.pipeline.run(inputs, targets=["booking"]))
+    assert run["parts"] is None and run["slot"] is None and run["booking"] is None
+    assert calls == []
+
+    monkeypatch.setattr(master.spare_parts, "is_available_for_vehicle", lambda *a, **k: True)
+    monkeypatch.setattr(master.spare_parts, "reserve_for_vehicle", lambda *a, **k: {"id": 1})
+    run = asyncio.run(master.pipeline.run(inputs, targets=["booking"]))
+    assert run["booking"]["slot"] == "x" and len(calls) == 1
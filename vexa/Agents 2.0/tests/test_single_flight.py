@@ -0,0 +1,61 @@
+import threading
+import time
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def _run_concurrently(n, fn):
+    results, errors = [], []
+
+    def target():
+        try:
+            results.append(fn())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=target) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+
+def test_followers_share_leader_result():
+    flight = SingleFlight()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return "value"
+
+    results, errors = _run_concurrently(5, lambda: flight.do("k", slow))
+    assert results == ["value"] * 5 and not errors
+    assert len(calls) == 1
+    assert flight.executed == 1 and flight.shared == 4
+
+
+def test_followers_get_leader_exception():
+    flight = SingleFlight()
+
+    def failing():
+        time.sleep(0.2)
+        raise ValueError("backend down")
+
+    results, errors = _run_concurrently(4, lambda: flight.do("k", failing))
+    assert not results
+    assert len(errors) == 4
+    assert all(isinstance(e, ValueError) and str(e) == "backend down" for e in errors)
+    assert flight.executed == 1
+
+
+def test_nothing_kept_after_completion():
+    flight = SingleFlight()
+    assert flight.do("k", lambda: 1) == 1
+    assert flight.do("k", lambda: 2) == 2
+    with pytest.raises(KeyError):
+        flight.do("k", lambda: {}["missing"])
+    assert flight.do("k", lambda: 3) == 3
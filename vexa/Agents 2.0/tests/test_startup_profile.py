@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+
+from startup_profile import STARTUP_PROFILE, LazyAgent, StartupProfile, lazy_agent_names
+
+
+class _Owner:
+    built = []
+
+    def _build(cls, owner):
+        _Owner.built.append(owner)
+        time.sleep(0.02)
+        return cls([("owner", owner)])
+
+    store = LazyAgent("collections", ("NoSuchClass", "OrderedDict"), _build)
+    plain = LazyAgent("fractions", "Fraction")
+    broken = LazyAgent("collections", "NoSuchClass")
+
+
+@pytest.fixture(autouse=True)
+def _fresh():
+    _Owner.built.clear()
+
+
+def test_agent_is_built_on_first_read_and_kept():
+    owner = _Owner()
+    assert "store" not in owner.__dict__ and isinstance(_Owner.store, LazyAgent)
+
+    store = owner.store
+    # First class name the module defines, built by the factory with the owner
+    assert type(store).__name__ == "OrderedDict" and store["owner"] is owner
+    assert owner.store is store and owner.__dict__["store"] is store
+    assert _Owner.built == [owner]
+    assert owner.plain == 0
+
+    entry = STARTUP_PROFILE.report()["components"]["_Owner.store"]
+    assert set(entry) == {"import_ms", "init_ms"} and entry["init_ms"] >= 15
+
+    with pytest.raises(ImportError, match="NoSuchClass"):
+        owner.broken
+    assert lazy_agent_names(_Owner) == ["store", "plain", "broken"]
+
+
+def test_concurrent_first_reads_build_once():
+    owner = _Owner()
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(owner.store)) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert _Owner.built == [owner] and all(s is seen[0] for s in seen)
+
+
+def test_profile_report_totals():
+    profile = StartupProfile()
+    profile.record("A.x", 1.0004, 2.0)
+    profile.record("A.y", 3.0, 0.5)
+    report = profile.report()
+    assert report["components"]["A.x"] == {"import_ms": 1.0, "init_ms": 2.0}
+    assert report["total_import_ms"] == 4.0 and report["total_init_ms"] == 2.5
+
+
+def test_master_agent_builds_sub_agents_on_demand(make_master):
+    master = make_master()
+    pending = master.startup_report()["pending"]
+    assert "fleet_agent" in pending and "diagnosis" not in pending  # make_master touched it
+
+    report = master.warm_up()
+    assert report["pending"] == []
+    assert "MasterAgent.fleet_agent" in report["components"]
+
+
+def test_api_startup_fails_fast_on_missing_settings(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import main
+
+    monkeypatch.setattr("dotenv.load_dotenv", lambda *a, **k: False)
+    with TestClient(main.app) as client:
+        assert client.get("/").status_code == 200
+
+    monkeypatch.delenv("TECDOC_RAPIDAPI_KEY")
+    with pytest.raises(RuntimeError, match=r"TECDOC_RAPIDAPI_KEY \(needed by spare_parts\)"):
+        with TestClient(main.app):
+            pass
+    # Nothing was built to find out
+    assert "spare_parts" not in main.master_agent.__dict__
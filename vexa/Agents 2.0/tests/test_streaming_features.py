@@ -0,0 +1,121 @@
+import numpy as np
+import pytest
+
+from feature_engineering import (
+    _aggregate_basic_stats,
+    compute_buffer_features,
+    compute_streaming_features,
+    compute_windowed_features,
+)
+from telematics_buffer import TelematicsRingBuffer
+from timestamps import US_PER_DAY
+from window_store import RollingStats, VehicleWindowStore
+
+TRIP_FEATURES = ("trip_max_brake_pressure_avg", "trip_harsh_index_avg")
+
+
+def _assert_same(actual, expected, skip=()):
+    assert actual.keys() == expected.keys()
+    for key in expected:
+        if key not in skip:
+            assert actual[key] == pytest.approx(expected[key], rel=1e-9, abs=1e-9), key
+
+
+def test_rolling_stats_match_rescan_as_rows_expire(make_stream):
+    events, _ = make_stream(n=300)
+    buffer = TelematicsRingBuffer(capacity=None)
+    stats = RollingStats(buffer)
+    rng = np.random.default_rng(1)
+    first = 0
+    for i, ev in enumerate(events):
+        buffer.append(ev)
+        stats.push()
+        # Expire a few of the oldest rows now and then (maxima included)
+        for _ in range(int(rng.integers(0, 3)) if rng.random() < 0.4 else 0):
+            if len(stats) > 1:
+                stats.pop()
+                first += 1
+        assert len(stats) == i + 1 - first
+        _assert_same(stats.snapshot(), _aggregate_basic_stats(events[first:i + 1]))
+
+    while len(stats):
+        stats.pop()
+    assert stats.snapshot() == {}
+
+
+def _last_days(events, days=7):
+    cutoff = events[-1].ts_epoch_us - days * US_PER_DAY
+    return [ev for ev in events if ev.ts_epoch_us >= cutoff]
+
+
+def test_streaming_matches_batch_features(make_stream):
+    events, maintenance = make_stream()
+    store = VehicleWindowStore()
+    for i, ev in enumerate(events, start=1):
+        store.add_event(ev)
+        if i % 25 and i != len(events):
+            continue
+        assert store.is_ordered()
+        streaming = compute_streaming_features(store, maintenance)
+
+        # Window features: a rescan of the store's 7-day window (the
+        # 500 km window is a suffix of it); trips: the whole stream
+        window = _last_days(events[:i])
+        assert store.get_events() == window
+        batch = compute_windowed_features(window, maintenance)
+        _assert_same(streaming, batch, skip=TRIP_FEATURES)
+        full = compute_windowed_features(events[:i], maintenance)
+        for key in TRIP_FEATURES:
+            assert streaming[key] == pytest.approx(full[key]), key
+
+        buffer = TelematicsRingBuffer(capacity=None)
+        buffer.extend(window)
+        _assert_same(streaming, compute_buffer_features(buffer, maintenance), skip=TRIP_FEATURES)
+
+    # The stream spans more than 7 days: the time window dropped rows
+    assert len(store) < len(events)
+
+
+def test_buffer_ingest_matches_event_ingest(make_stream):
+    events, maintenance = make_stream()
+    source = TelematicsRingBuffer(capacity=None)
+    by_buffer, by_event = VehicleWindowStore(), VehicleWindowStore()
+    for lo, hi in ((0, 1), (1, 170), (170, 171), (171, len(events))):
+        source.extend(events[lo:hi])
+        by_buffer.add_from_buffer(source, since_seq=lo)
+        for ev in events[lo:hi]:
+            by_event.add_event(ev)
+        _assert_same(
+            compute_streaming_features(by_buffer, maintenance),
+            compute_streaming_features(by_event, maintenance),
+        )
+
+
+def test_out_of_order_window_falls_back_to_rescan(make_stream):
+    events, maintenance = make_stream(n=200)
+    swapped = list(events)
+    swapped[150], swapped[151] = swapped[151], swapped[150]
+
+    store = VehicleWindowStore()
+    for ev in swapped:
+        store.add_event(ev)
+    assert not store.is_ordered()
+    # The rescan sorts the window; trips only see in-order rows
+    _assert_same(
+        compute_streaming_features(store, maintenance),
+        compute_windowed_features(swapped, maintenance),
+        skip=TRIP_FEATURES,
+    )
+
+
+def test_inversion_leaves_with_its_rows(make_stream):
+    events, _ = make_stream(n=40)
+    swapped = list(events)
+    swapped[0], swapped[1] = swapped[1], swapped[0]
+    store = VehicleWindowStore(max_events=10)
+    for ev in swapped[:5]:
+        store.add_event(ev)
+    assert not store.is_ordered()
+    for ev in swapped[5:]:
+        store.add_event(ev)
+    assert store.is_ordered()
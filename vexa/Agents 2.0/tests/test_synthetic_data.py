@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta
+
+from synthetic_data import generate_vehicle_history
+
+NOW = datetime(2025, 3, 1, 12, 0, 0)
+
+
+def test_history_is_reproducible_with_fixed_now():
+    events_a, maintenance_a = generate_vehicle_history("VH-REPRO", num_events=50, now=NOW)
+    events_b, maintenance_b = generate_vehicle_history("VH-REPRO", num_events=50, now=NOW)
+    assert events_a == events_b
+    assert maintenance_a == maintenance_b
+
+
+def test_times_are_relative_to_now():
+    events, maintenance = generate_vehicle_history("VH-REPRO", num_events=50, now=NOW)
+    assert events[0].timestamp == (NOW - timedelta(hours=3)).isoformat()
+    assert maintenance[0].service_date == (NOW - timedelta(days=180)).date().isoformat()
+
+    base = datetime(2024, 1, 1)
+    later, _ = generate_vehicle_history("VH-REPRO", num_events=50, base_time=base, now=NOW)
+    assert later[0].timestamp == base.isoformat()
+    # Only the times depend on `now`
+    assert [e.speed_kmph for e in later] == [e.speed_kmph for e in events]
+
+
+def test_lazy_history_matches_list():
+    events, _ = generate_vehicle_history("VH-REPRO", num_events=20, now=NOW)
+    lazy, _ = generate_vehicle_history("VH-REPRO", num_events=20, now=NOW, lazy=True)
+    assert list(lazy) == events
+
+
+def test_seed_and_id_select_the_history():
+    base, _ = generate_vehicle_history("VH-REPRO", num_events=10, now=NOW)
+    other_seed, _ = generate_vehicle_history("VH-REPRO", num_events=10, seed=1, now=NOW)
+    other_id, _ = generate_vehicle_history("VH-OTHER", num_events=10, now=NOW)
+    assert base != other_seed and base != other_id
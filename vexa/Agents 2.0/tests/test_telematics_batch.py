@@ -0,0 +1,265 @@
+import gzip
+import json
+import struct
+
+import numpy as np
+import pytest
+
+from batch_features import FleetTelematics
+from telematics_batch import (
+    FRAME_MAGIC,
+    BatchError,
+    decode_frame,
+    encode_frame,
+    group_events,
+    group_frame,
+    gunzip,
+    parse_ndjson,
+)
+from telematics_buffer import DRIVING_MODES, DTC_CODES, NO_CODE, TelematicsRingBuffer
+from timestamps import MAX_EPOCH_US, NAIVE_TS
+
+
+@pytest.fixture
+def streams(make_stream):
+    return {vid: make_stream(vid, n=30, seed=i)[0] for i, vid in enumerate(("VH-F1", "VH-F2"))}
+
+
+def _fleet(streams):
+    buffers = {}
+    for vid, events in streams.items():
+        buffers[vid] = TelematicsRingBuffer(vid, capacity=None)
+        buffers[vid].extend(events)
+    fleet = FleetTelematics.from_buffers(buffers)
+    # Columns are views into the buffers; tests mutate them
+    fleet.columns = {name: col.copy() for name, col in fleet.columns.items()}
+    return fleet
+
+
+def _split(frame):
+    (header_len,) = struct.unpack_from("<I", frame, 4)
+    return json.loads(frame[8:8 + header_len]), frame[8 + header_len:]
+
+
+def _join(header, payload):
+    raw = json.dumps(header).encode("utf-8")
+    return FRAME_MAGIC + struct.pack("<I", len(raw)) + raw + payload
+
+
+def test_frame_round_trip(streams):
+    buffers = group_frame(decode_frame(encode_frame(_fleet(streams))))
+    assert {vid: buf.to_events() for vid, buf in buffers.items()} == streams
+
+
+def test_frame_rows_are_regrouped_in_time_order(streams):
+    fleet = _fleet(streams)
+    order = np.random.default_rng(0).permutation(len(fleet))
+    shuffled = FleetTelematics(
+        fleet.vehicle_ids, fleet.vehicle_idx[order], {n: c[order] for n, c in fleet.columns.items()}
+    )
+    buffers = group_frame(decode_frame(encode_frame(shuffled)))
+    assert {vid: buf.to_events() for vid, buf in buffers.items()} == streams
+
+
+def test_frame_codes_are_remapped_to_local_tables(streams):
+    fleet = _fleet(streams)
+    modes = [DRIVING_MODES.value(i) for i in range(len(DRIVING_MODES))]
+    # The sender's table lists the modes in reverse
+    fleet.columns["driving_mode"] = (len(modes) - 1 - fleet.columns["driving_mode"]).astype(np.int16)
+    header, payload = _split(encode_frame(fleet))
+    header["driving_modes"] = modes[::-1]
+
+    buffers = group_frame(decode_frame(_join(header, payload)))
+    assert {vid: buf.to_events() for vid, buf in buffers.items()} == streams
+
+
+def _mutated_header(streams, **changes):
+    header, payload = _split(encode_frame(_fleet(streams)))
+    header.update(changes)
+    return _join(header, payload)
+
+
+@pytest.mark.parametrize(
+    "make_body, message",
+    [
+        (lambda s: b"NOPE" + encode_frame(_fleet(s))[4:], "Not a telematics frame"),
+        (lambda s: FRAME_MAGIC, "Not a telematics frame"),
+        (lambda s: FRAME_MAGIC + struct.pack("<I", 5) + b"{oops", "Bad frame header"),
+        (lambda s: _mutated_header(s, rows="many"), "Bad frame header"),
+        (lambda s: _mutated_header(s, rows=-1), "Negative row count"),
+        (lambda s: _mutated_header(s, vehicle_ids=["VH-F1", "VH-F1"]), "Duplicate vehicle ids"),
+        (lambda s: _mutated_header(s, columns=["vehicle_idx", "speed_kmph"]), "do not match"),
+        (lambda s: encode_frame(_fleet(s))[:-10], "truncated"),
+        (lambda s: encode_frame(_fleet(s)) + b"\0", "Trailing bytes"),
+        (lambda s: _mutated_header(s, vehicle_ids=["VH-F1"]), "vehicle_idx out of range"),
+        (lambda s: _mutated_header(s, driving_modes=[]), "driving_mode code out of range"),
+    ],
+)
+def test_decode_frame_rejects(streams, make_body, message):
+    with pytest.raises(BatchError, match=message):
+        decode_frame(make_body(streams))
+
+
+def test_decode_frame_rejects_unknown_dtc_code(streams):
+    fleet = _fleet(streams)
+    fleet.columns["dtc_codes"][0, 0] = 30_000
+    with pytest.raises(BatchError, match="dtc code out of range"):
+        decode_frame(encode_frame(fleet))
+
+
+def _set_dtcs(fleet, row, codes, count):
+    fleet.columns["dtc_codes"][row] = codes
+    fleet.columns["dtc_count"][row] = count
+    return fleet
+
+
+@pytest.mark.parametrize(
+    "mutate, message",
+    [
+        (lambda f: _set_dtcs(f, 0, [NO_CODE] * 4, 5), "dtc_count out of range"),
+        (lambda f: _set_dtcs(f, 0, [NO_CODE] * 4, -1), "dtc_count out of range"),
+        (lambda f: _set_dtcs(f, 0, [NO_CODE] * 4, 1), "does not match"),
+        (lambda f: _set_dtcs(f, 0, [0, NO_CODE, NO_CODE, NO_CODE], 0), "does not match"),
+        (lambda f: _set_dtcs(f, 0, [NO_CODE, 0, NO_CODE, NO_CODE], 1), "does not match"),
+        (lambda f: f.columns["ts_offset_min"].__setitem__(0, 1440), "ts_offset_min out of range"),
+        (lambda f: f.columns["ts_offset_min"].__setitem__(0, -1440), "ts_offset_min out of range"),
+        (lambda f: f.columns["ts_us"].__setitem__(0, MAX_EPOCH_US + 1), "ts_us out of range"),
+        (lambda f: f.columns["ts_us"].__setitem__(0, -(2**62)), "ts_us out of range"),
+    ],
+)
+def test_decode_frame_rejects_values_the_columns_cannot_hold(streams, mutate, message):
+    fleet = _fleet(streams)
+    DTC_CODES.intern("P0300")
+    mutate(fleet)
+    with pytest.raises(BatchError, match=message):
+        decode_frame(encode_frame(fleet))
+
+
+def test_decode_frame_accepts_naive_and_offset_timestamps(streams):
+    fleet = _fleet(streams)
+    fleet.columns["ts_offset_min"][0] = NAIVE_TS
+    fleet.columns["ts_offset_min"][1] = -1439
+    assert len(decode_frame(encode_frame(fleet))) == len(fleet)
+
+
+@pytest.mark.parametrize(
+    "changes, message",
+    [
+        ({"driving_modes": ["city", "highway", "ludicrous", "NORMAL", "SPORT"]}, "Unknown driving mode"),
+        ({"dtc_codes": ["DROP TABLE"]}, "not an OBD-II code"),
+        ({"dtc_codes": [7]}, "not an OBD-II code"),
+    ],
+)
+def test_decode_frame_rejects_unknown_table_values(streams, changes, message):
+    before = (len(DRIVING_MODES), len(DTC_CODES))
+    if "dtc_codes" in changes:
+        # Appended, so the codes the rows use stay in range
+        changes = {"dtc_codes": [DTC_CODES.value(i) for i in range(before[1])] + changes["dtc_codes"]}
+    with pytest.raises(BatchError, match=message):
+        decode_frame(_mutated_header(streams, **changes))
+    assert (len(DRIVING_MODES), len(DTC_CODES)) == before
+
+
+def test_batches_cannot_overflow_the_dtc_table(streams, monkeypatch):
+    monkeypatch.setattr(DTC_CODES, "max_size", len(DTC_CODES))
+    with pytest.raises(BatchError, match="DTC codes, only 0 fit"):
+        known = [DTC_CODES.value(i) for i in range(len(DTC_CODES))]
+        decode_frame(_mutated_header(streams, dtc_codes=known + ["P0AAA"]))
+
+    event = streams["VH-F1"][0].model_copy(update={"dtc_codes": ["B1FFF"]})
+    with pytest.raises(BatchError, match="DTC codes, only 0 fit"):
+        parse_ndjson(event.model_dump_json().encode())
+
+
+def _dumps(events):
+    # Parsed events carry a timestamp cache the originals may not have yet
+    return [ev.model_dump() for ev in events]
+
+
+def test_ndjson_keeps_good_lines_and_reports_bad_ones(streams):
+    events = streams["VH-F1"][:5]
+    lines = [ev.model_dump_json().encode() for ev in events]
+    body = b"\n".join(
+        [lines[0], b"", lines[1], b"{not json", lines[2], b'{"vehicle_id": "x"}', lines[3], lines[4]]
+    )
+    parsed, errors = parse_ndjson(body)
+    assert _dumps(parsed) == _dumps(events)
+    assert [e["line"] for e in errors] == [4, 6]
+
+    parsed, errors = parse_ndjson(b"\n".join(lines) + b"\n")
+    assert _dumps(parsed) == _dumps(events) and errors == []
+    grouped = group_events(list(reversed(parsed)))
+    assert _dumps(grouped["VH-F1"].to_events()) == _dumps(events)
+
+
+@pytest.mark.parametrize(
+    "update, message",
+    [
+        ({"timestamp": "yesterday"}, "timestamp: Invalid isoformat"),
+        ({"timestamp": "2025-02-30T00:00:00"}, "timestamp: day is out of range"),
+        ({"timestamp": "0001-01-01T00:00:00"}, "timestamp: out of range"),
+        ({"engine_rpm": 2**40}, "engine_rpm: out of range"),
+        ({"hard_brake_events_last_10min": 40_000}, "hard_brake_events_last_10min: out of range"),
+        ({"driving_mode": "ludicrous"}, "driving_mode: unknown mode"),
+        ({"dtc_codes": ["P0300", "junk"]}, "dtc_codes: not an OBD-II code"),
+    ],
+)
+def test_ndjson_reports_values_the_columns_cannot_hold(streams, update, message):
+    events = streams["VH-F1"][:3]
+    bad = events[1].model_copy(update=update)
+    body = b"\n".join(ev.model_dump_json().encode() for ev in [events[0], bad, events[2]])
+
+    parsed, errors = parse_ndjson(body)
+    assert [ev.event_id for ev in parsed] == [events[0].event_id, events[2].event_id]
+    assert len(errors) == 1 and errors[0]["line"] == 2
+    assert errors[0]["error"].startswith(message)
+    group_events(parsed)
+
+    # Same when another line fails schema validation (the slow path)
+    parsed, errors = parse_ndjson(body + b"\n{bad")
+    assert [e["line"] for e in errors] == [2, 4] and len(parsed) == 2
+
+
+def test_gunzip_is_bounded():
+    body = gzip.compress(b"x" * 1000)
+    assert gunzip(body, 1000) == b"x" * 1000
+    with pytest.raises(BatchError, match="larger than"):
+        gunzip(body, 999)
+    with pytest.raises(BatchError, match="Bad gzip"):
+        gunzip(b"not gzip", 1000)
+
+
+def test_batch_endpoint(api, streams):
+    events = streams["VH-F1"]
+    body = b"\n".join([ev.model_dump_json().encode() for ev in events] + [b"{bad"])
+    response = api.post(
+        "/telematics/batch",
+        content=gzip.compress(body),
+        headers={"content-type": "application/x-ndjson", "content-encoding": "gzip"},
+    )
+    assert response.status_code == 200
+    ack = response.json()
+    assert ack["accepted"] == len(events) and ack["rejected"] == 1
+    assert ack["errors"][0]["line"] == len(events) + 1
+
+    latest = api.get("/vehicle/VH-F1/full_data?simulate=false&fields=latest_telematics").json()
+    assert latest["latest_telematics"]["event_id"] == events[-1].event_id
+
+    frame = encode_frame(_fleet({"VH-F2": streams["VH-F2"]}))
+    response = api.post(
+        "/telematics/batch", content=frame, headers={"content-type": "application/x-vexa-telematics"}
+    )
+    assert response.json()["vehicles"]["VH-F2"]["accepted"] == len(streams["VH-F2"])
+
+    assert api.post(
+        "/telematics/batch", content=frame[:-1], headers={"content-type": "application/x-vexa-telematics"}
+    ).status_code == 400
+    assert api.post(
+        "/telematics/batch", content=b"x", headers={"content-type": "text/csv"}
+    ).status_code == 415
+    for length in ("lots", "-5"):
+        assert api.post(
+            "/telematics/batch",
+            content=b"",
+            headers={"content-type": "application/x-ndjson", "content-length": length},
+        ).status_code == 400
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from trips import TRIP_GAP_SECONDS, TripDetector, segment_trips
+
+
+def _columns(events):
+    return (
+        np.array([ev.ts_epoch_us for ev in events], dtype=np.int64),
+        np.array([ev.speed_kmph for ev in events]),
+        np.array([ev.odometer_km for ev in events]),
+        np.array([ev.brake_pedal_pressure for ev in events]),
+        np.array(
+            [ev.hard_brake_events_last_10min + ev.harsh_accel_events_last_10min for ev in events]
+        ),
+    )
+
+
+def _streamed(events):
+    detector = TripDetector(max_trips=10_000)
+    for ev in events:
+        detector.add_event(ev)
+    return detector.last_trips(10_000)
+
+
+def _rows(table, mask=None):
+    idx = np.flatnonzero(mask) if mask is not None else range(len(table))
+    return [
+        (
+            int(table.start_ts_us[i]),
+            int(table.end_ts_us[i]),
+            float(table.start_odometer_km[i]),
+            float(table.end_odometer_km[i]),
+            int(table.num_events[i]),
+            float(table.max_brake_pressure[i]),
+            int(table.harsh_events[i]),
+        )
+        for i in idx
+    ]
+
+
+def _summaries(trips):
+    return [
+        (t.start_ts_us, t.end_ts_us, t.start_odometer_km, t.end_odometer_km,
+         t.num_events, t.max_brake_pressure, t.harsh_events)
+        for t in trips
+    ]
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2, 3])
+def test_segment_trips_matches_detector(make_stream, seed):
+    events, _ = make_stream(n=400, seed=seed)
+    trips = _streamed(events)
+    table = segment_trips(*_columns(events))
+    assert _rows(table) == _summaries(trips)
+    # The stream exercises both closing rules
+    gaps = np.diff(_columns(events)[0]) > TRIP_GAP_SECONDS * 1_000_000
+    assert gaps.any()
+    # ... idle closes: the next trip starts without a time gap in between
+    assert any(
+        b.start_ts_us - a.end_ts_us <= TRIP_GAP_SECONDS * 1_000_000 for a, b in zip(trips, trips[1:])
+    )
+
+
+def test_segments_never_share_a_trip(make_stream):
+    first, _ = make_stream("VH-A", n=200, seed=4)
+    second, _ = make_stream("VH-B", n=200, seed=5)
+    cols = [np.concatenate(pair) for pair in zip(_columns(first), _columns(second))]
+    segment = np.repeat([0, 1], [len(first), len(second)])
+    table = segment_trips(*cols, segment=segment)
+
+    assert _rows(table, table.segment == 0) == _summaries(_streamed(first))
+    assert _rows(table, table.segment == 1) == _summaries(_streamed(second))
+
+    last = table.last_per_segment(5)
+    assert _rows(table, last & (table.segment == 1)) == _summaries(_streamed(second)[-5:])
+
+
+def test_detector_skips_late_events(make_stream):
+    events, _ = make_stream(n=50)
+    detector = TripDetector()
+    for ev in events + [events[10]]:
+        detector.add_event(ev)
+    assert detector.late_events == 1
+    assert _summaries(detector.last_trips(20)) == _summaries(_streamed(events))[-20:]
+
+
+def test_idle_only_stream_has_no_trips(make_stream):
+    events, _ = make_stream(n=20)
+    idle = [ev.model_copy(update={"speed_kmph": 0.0}) for ev in events]
+    assert _streamed(idle) == []
+    assert len(segment_trips(*_columns(idle))) == 0
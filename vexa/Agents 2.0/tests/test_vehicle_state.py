@@ -0,0 +1,86 @@
+import os
+from datetime import datetime
+
+from maintenance_index import MaintenanceIndex
+from telematics_buffer import TelematicsRingBuffer
+from vehicle_state import VehicleState, VehicleStateCache
+
+
+def _state(events):
+    buffer = TelematicsRingBuffer(events[0].vehicle_id, capacity=100)
+    buffer.extend(events)
+    return VehicleState(buffer, MaintenanceIndex(vehicle_id=events[0].vehicle_id))
+
+
+def test_lru_spills_over_budget_and_reloads(make_stream, tmp_path):
+    events, _ = make_stream(n=60)
+    one = _state(events).nbytes
+    evicted = []
+    cache = VehicleStateCache(
+        max_bytes=int(2.5 * one),
+        spill_dir=str(tmp_path),
+        on_evict=lambda vid, state: evicted.append(vid),
+    )
+    for vid in ("A", "B", "C"):
+        cache.put(vid, _state(events))
+    assert evicted == ["A"]
+    assert cache.stats()["vehicles_in_memory"] == 2 and len(cache) == 3
+    assert "A" in cache and len(os.listdir(cache.spill_dir)) == 1
+    assert cache.nbytes <= cache.max_bytes
+
+    # Reloading A spills the least recently used of the others (B)
+    state = cache.get("A")
+    assert state.events.to_events() == events
+    assert evicted == ["A", "B"] and cache.reloads == 1
+    assert len(os.listdir(cache.spill_dir)) == 1
+
+    assert cache.get("missing") is None and cache.misses == 1
+    cache.discard("B")
+    assert "B" not in cache and os.listdir(cache.spill_dir) == []
+
+
+def test_caches_sharing_a_spill_dir_keep_their_own_files(make_stream, tmp_path):
+    events, _ = make_stream(n=60)
+    first, second = (VehicleStateCache(max_bytes=1, spill_dir=str(tmp_path)) for _ in range(2))
+    assert first.spill_dir != second.spill_dir
+    assert os.path.dirname(first.spill_dir) == str(tmp_path)
+    assert f"-{os.getpid()}-" in os.path.basename(first.spill_dir)
+
+    for cache, other in ((first, events[:30]), (second, events[30:])):
+        cache.put("A", _state(other))
+        cache.put("B", _state(other))
+    assert first.get("A").events.to_events() == events[:30]
+    assert second.get("A").events.to_events() == events[30:]
+
+    spill_dir = first.spill_dir
+    del first
+    assert not os.path.exists(spill_dir)
+
+
+def test_most_recent_vehicle_is_kept_even_over_budget(make_stream, tmp_path):
+    events, _ = make_stream(n=60)
+    cache = VehicleStateCache(max_bytes=1, spill_dir=str(tmp_path))
+    cache.put("A", _state(events))
+    cache.put("B", _state(events))
+    assert cache.stats()["vehicles_in_memory"] == 1
+    assert cache.get("B") is not None and cache.hits == 1
+
+
+def test_spilled_vehicle_continues_where_it_left_off(make_master):
+    now = datetime(2025, 3, 1)
+    # Budget for about one vehicle: every switch spills the other
+    tight = make_master(vehicle_memory_bytes=1, history_now=now)
+    roomy = make_master(history_now=now)
+
+    for _ in range(2):
+        for vid in ("VH-1", "VH-2"):
+            spilled = tight._ingest(vid, simulate=False)
+            kept = roomy._ingest(vid, simulate=False)
+            assert spilled["summary"].component_health == kept["summary"].component_health
+            assert spilled["urgency"] == kept["urgency"]
+
+    stats = tight.vehicle_memory.stats()
+    assert stats["evictions"] >= 3 and stats["reloads"] >= 2
+    # The window store came back with the vehicle: its rows were fed once
+    store = tight.data_analysis.window_manager.get_store("VH-2")
+    assert store.buffer.end_seq == tight.vehicle_memory.get("VH-2").events.end_seq
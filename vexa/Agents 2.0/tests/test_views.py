@@ -0,0 +1,74 @@
+import dataclasses
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def stage_calls(api):
+    """Names of the pipeline stages the API's MasterAgent runs."""
+    calls = []
+    pipeline = main.master_agent.pipeline
+
+    def spy(stage):
+        def fn(values):
+            calls.append(stage.name)
+            return stage.fn(values)
+
+        return dataclasses.replace(stage, fn=fn)
+
+    pipeline.stages = {name: spy(stage) for name, stage in pipeline.stages.items()}
+    return calls
+
+
+def test_urgency_projection_runs_no_stages(api, stage_calls):
+    response = api.get("/vehicle/VH-V1/full_data?fields=urgency")
+    assert response.status_code == 200
+    assert set(response.json()) == {"urgency"}
+    assert response.json()["urgency"] in ("LOW", "MEDIUM", "HIGH", "CRITICAL")
+    assert stage_calls == [] and main.master_agent.diagnosis.llm.prompts == []
+
+
+def test_projection_runs_only_the_stages_its_fields_need(api, stage_calls):
+    response = api.get("/vehicle/VH-V1/full_data?fields=vehicle_id,driver_tips")
+    assert set(response.json()) == {"vehicle_id", "driver_tips"}
+    assert stage_calls == ["driver_tips"]
+
+
+def test_unknown_field_is_rejected(api, stage_calls):
+    response = api.get("/vehicle/VH-V1/full_data?fields=urgency,bogus")
+    assert response.status_code == 400
+    assert "bogus" in response.json()["detail"]
+    assert stage_calls == [] and "VH-V1" not in main.master_agent.vehicle_memory
+
+
+@pytest.mark.parametrize(
+    "view, keys",
+    [
+        ("telematics", {"vehicle_id", "latest_telematics"}),
+        ("health", {"vehicle_id", "health_summary", "urgency", "dtc_codes"}),
+        ("urgency", {"vehicle_id", "urgency"}),
+    ],
+)
+def test_lightweight_views(api, stage_calls, view, keys):
+    first = api.get(f"/vehicle/VH-V2/{view}?simulate=false")
+    assert first.status_code == 200 and set(first.json()) == keys
+    assert first.json()["vehicle_id"] == "VH-V2"
+    assert stage_calls == []
+
+    # Conditional GET works on the views too
+    again = api.get(f"/vehicle/VH-V2/{view}?simulate=false", headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+
+    # simulate=true adds a row, so the telematics move on
+    moved = api.get(f"/vehicle/VH-V2/{view}")
+    assert moved.headers["etag"] != first.headers["etag"]
+
+
+def test_service_status_is_a_selectable_field(api, stage_calls):
+    api.post("/vehicle/VH-V3/complete_service")
+    body = api.get("/vehicle/VH-V3/full_data?simulate=false&fields=urgency,service_status").json()
+    assert body["service_status"] == "COMPLETED" and set(body) == {"urgency", "service_status"}
+    assert "service_status" not in api.get("/vehicle/VH-V3/urgency?simulate=false").json()
+    assert stage_calls == []
@@ -0,0 +1,66 @@
+import numpy as np
+
+from timestamps import US_PER_DAY
+from window_index import EventWindowIndex
+
+
+def _by_time(events, days):
+    ordered = sorted(events, key=lambda ev: ev.ts_epoch_us)
+    cutoff = ordered[-1].ts_epoch_us - days * US_PER_DAY
+    return [ev for ev in ordered if ev.ts_epoch_us >= cutoff]
+
+
+def _by_distance(events, km):
+    ordered = sorted(sorted(events, key=lambda ev: ev.ts_epoch_us), key=lambda ev: ev.odometer_km)
+    min_odo = max(ordered[-1].odometer_km - km, 0.0)
+    return [ev for ev in ordered if ev.odometer_km >= min_odo]
+
+
+def _check(index, events):
+    assert len(index) == len(events)
+    assert list(index.time_ordered()) == sorted(events, key=lambda ev: ev.ts_epoch_us)
+    assert index.latest() == max(events, key=lambda ev: ev.ts_epoch_us)
+    for days in (0.5, 3, 7, 30):
+        assert list(index.by_time(days)) == _by_time(events, days)
+    for km in (50.0, 500.0, 1e6):
+        assert list(index.by_distance(km)) == _by_distance(events, km)
+    assert list(index.last_n(50)) == sorted(events, key=lambda ev: ev.ts_epoch_us)[-50:]
+
+
+def test_in_order_windows_match_rescan(make_stream):
+    events, _ = make_stream(n=300)
+    _check(EventWindowIndex(events), events)
+
+
+def test_late_inserts_land_in_place(make_stream):
+    events, _ = make_stream(n=300)
+    rng = np.random.default_rng(3)
+    arrived = list(events)
+    # Delay a tenth of the events by up to 20 positions
+    for i in rng.choice(len(arrived) - 20, size=30, replace=False):
+        arrived.insert(i + int(rng.integers(1, 20)), arrived.pop(i))
+
+    one_by_one = EventWindowIndex()
+    for ev in arrived:
+        one_by_one.add(ev)
+    _check(one_by_one, arrived)
+
+    batched = EventWindowIndex(arrived[:100])
+    batched.extend(arrived[100:200])
+    batched.extend(arrived[200:])
+    _check(batched, arrived)
+
+
+def test_equal_timestamps_keep_arrival_order(make_stream):
+    events, _ = make_stream(n=5)
+    twin = events[2].model_copy(update={"event_id": "twin"})
+    index = EventWindowIndex(events)
+    index.add(twin)
+    ordered = list(index.time_ordered())
+    assert ordered.index(twin) == ordered.index(events[2]) + 1
+
+
+def test_empty_index():
+    index = EventWindowIndex()
+    assert len(index) == 0
+    assert list(index.by_time(7)) == [] and list(index.by_distance(500.0)) == []
@@ -0,0 +1,85 @@
+from datetime import datetime
+
+import pytest
+
+from feature_engineering import compute_streaming_features, compute_windowed_features
+from synthetic_data import generate_vehicle_history
+from telematics_buffer import TelematicsRingBuffer
+from window_store import VehicleWindowStore
+
+TRIP_FEATURES = ("trip_max_brake_pressure_avg", "trip_harsh_index_avg")
+
+
+@pytest.fixture(scope="module")
+def history():
+    return generate_vehicle_history("VH-WIN", num_events=700, base_time=datetime(2025, 1, 1))
+
+
+def _buffer(events):
+    buffer = TelematicsRingBuffer("VH-WIN", capacity=None)
+    buffer.extend(events)
+    return buffer
+
+
+def _assert_same(actual, expected, skip=()):
+    assert actual.keys() == expected.keys()
+    for key in expected:
+        if key not in skip:
+            assert actual[key] == pytest.approx(expected[key]), key
+
+
+def test_bounded_store_keeps_newest_events_in_fixed_memory(history):
+    events, maintenance = history
+    store = VehicleWindowStore(max_events=200)
+    store.add_from_buffer(_buffer(events[:200]))
+    nbytes = store.buffer.nbytes
+
+    store.add_from_buffer(_buffer(events), since_seq=200)
+    assert len(store) == 200
+    assert store.buffer.nbytes == nbytes
+    assert store.get_events() == events[-200:]
+
+    # Trips are detected over everything streamed, so the first trip of
+    # the window is not cut at its start
+    _assert_same(
+        compute_streaming_features(store, maintenance),
+        compute_windowed_features(events[-200:], maintenance),
+        skip=TRIP_FEATURES,
+    )
+
+
+def test_chunked_ingest_matches_event_by_event(history):
+    events, maintenance = history
+    chunked = VehicleWindowStore(max_events=150)
+    chunked.add_from_buffer(_buffer(events))
+    single = VehicleWindowStore(max_events=150)
+    for ev in events:
+        single.add_event(ev)
+
+    assert chunked.get_events() == single.get_events()
+    _assert_same(
+        compute_streaming_features(chunked, maintenance),
+        compute_streaming_features(single, maintenance),
+    )
+
+
+def test_unbounded_store_keeps_time_window(history):
+    events, _ = history
+    store = VehicleWindowStore()
+    store.add_from_buffer(_buffer(events))
+    # 2-minute spacing: all 700 events are within 7 days
+    assert len(store) == 700
+
+
+def test_ring_buffer_slack_and_partial_copy(history):
+    events, _ = history
+    ring = TelematicsRingBuffer("VH-WIN", capacity=200)
+    # capacity + CAPACITY_SLACK rows are allocated, not 2 x capacity
+    assert ring.nbytes == TelematicsRingBuffer(capacity=None, initial_rows=250).nbytes
+    ring.extend(events[:150])
+    ring.extend(events[150:300])
+    assert len(ring) == 200 and ring.to_events() == events[100:300]
+
+    partial = TelematicsRingBuffer("VH-WIN", capacity=None)
+    assert partial.extend_from(ring, ring.start_seq + 10, max_rows=5) == 5
+    assert partial.to_events() == events[110:115]
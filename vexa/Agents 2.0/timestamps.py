@@ -0,0 +1,43 @@
+"""
+Timestamp helpers shared by the models and the columnar stores.
+
+Events carry ISO strings; internally they are compared as integer epoch
+microseconds (UTC) plus the original utc offset so the string can be
+rebuilt exactly.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Tuple
+
+US_PER_DAY = 86_400 * 1_000_000
+NAIVE_TS = -32768  # offset marker for timestamps without tzinfo
+
+_EPOCH = datetime(1970, 1, 1)
+_ONE_US = timedelta(microseconds=1)
+
+# Epoch microseconds whose ISO string can be rebuilt with any utc offset
+# (a day inside the range datetime can represent); offsets are < 1 day
+MIN_EPOCH_US = (datetime(1, 1, 2) - _EPOCH) // _ONE_US
+MAX_EPOCH_US = (datetime(9999, 12, 30) - _EPOCH) // _ONE_US
+MINUTES_PER_DAY = 1440
+
+
+def datetime_to_epoch_us(dt: datetime) -> Tuple[int, int]:
+    """datetime -> (epoch microseconds in UTC, utc offset in minutes or NAIVE_TS)."""
+    if dt.tzinfo is None:
+        return (dt - _EPOCH) // _ONE_US, NAIVE_TS
+    offset = dt.utcoffset()
+    return (dt.replace(tzinfo=None) - offset - _EPOCH) // _ONE_US, offset // timedelta(minutes=1)
+
+
+def iso_to_epoch_us(ts: str) -> Tuple[int, int]:
+    """ISO timestamp -> (epoch microseconds in UTC, utc offset in minutes or NAIVE_TS)."""
+    return datetime_to_epoch_us(datetime.fromisoformat(ts))
+
+
+def epoch_us_to_iso(ts_us: int, offset_min: int) -> str:
+    dt = _EPOCH + timedelta(microseconds=int(ts_us))
+    if offset_min == NAIVE_TS:
+        return dt.isoformat()
+    offset = timedelta(minutes=int(offset_min))
+    return (dt + offset).replace(tzinfo=timezone(offset)).isoformat()
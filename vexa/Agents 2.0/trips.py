@@ -0,0 +1,247 @@
+"""
+Trip segmentation for telematics streams.
+
+A trip opens on the first moving event and closes when
+- the next event is more than `gap_seconds` later (ignition off / no data), or
+- the vehicle has been stationary (speed <= idle_speed_kmph) for
+  `idle_seconds`; the event that crosses the threshold is the trip's last.
+
+Stationary events while no trip is open belong to no trip.
+
+TripDetector applies these rules event by event and keeps per-trip
+running aggregates; segment_trips() applies the same rules to
+time-ordered columns with NumPy for the batch paths.
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List, Optional
+
+import numpy as np
+
+from models import TelematicsEvent
+
+TRIP_GAP_SECONDS = 15 * 60
+IDLE_SPEED_KMPH = 2.0
+IDLE_SECONDS = 5 * 60
+MAX_CLOSED_TRIPS = 20
+
+_US = 1_000_000
+
+
+@dataclass
+class TripSummary:
+    start_ts_us: int
+    end_ts_us: int
+    start_odometer_km: float
+    end_odometer_km: float
+    num_events: int
+    max_brake_pressure: float
+    harsh_events: int
+
+    @property
+    def distance_km(self) -> float:
+        return self.end_odometer_km - self.start_odometer_km
+
+    @property
+    def duration_s(self) -> float:
+        return (self.end_ts_us - self.start_ts_us) / _US
+
+    @property
+    def harsh_index(self) -> float:
+        """(hard brake + harsh accel events) per event, as in _aggregate_basic_stats."""
+        return self.harsh_events / self.num_events
+
+
+class TripDetector:
+    """
+    Streaming trip segmentation with a bounded deque of closed trips.
+
+    Events must arrive in timestamp order; an event older than the last
+    one seen is counted in `late_events` and not attributed to a trip.
+    """
+
+    def __init__(
+        self,
+        gap_seconds: float = TRIP_GAP_SECONDS,
+        idle_speed_kmph: float = IDLE_SPEED_KMPH,
+        idle_seconds: float = IDLE_SECONDS,
+        max_trips: int = MAX_CLOSED_TRIPS,
+    ) -> None:
+        self.idle_speed_kmph = idle_speed_kmph
+        self._gap_us = int(gap_seconds * _US)
+        self._idle_us = int(idle_seconds * _US)
+
+        self.closed: Deque[TripSummary] = deque(maxlen=max_trips)
+        self.current: Optional[TripSummary] = None
+        self.late_events = 0
+        self._last_ts: Optional[int] = None
+        self._idle_since: Optional[int] = None
+
+    def _close(self) -> None:
+        self.closed.append(self.current)
+        self.current = None
+        self._idle_since = None
+
+    def add(
+        self,
+        ts_us: int,
+        speed_kmph: float,
+        odometer_km: float,
+        brake_pressure: float,
+        harsh_events: int,
+    ) -> None:
+        if self._last_ts is not None:
+            if ts_us < self._last_ts:
+                self.late_events += 1
+                return
+            if self.current is not None and ts_us - self._last_ts > self._gap_us:
+                self._close()
+        self._last_ts = ts_us
+
+        idle = speed_kmph <= self.idle_speed_kmph
+        trip = self.current
+        if trip is None:
+            if idle:
+                return
+            trip = self.current = TripSummary(
+                start_ts_us=ts_us,
+                end_ts_us=ts_us,
+                start_odometer_km=odometer_km,
+                end_odometer_km=odometer_km,
+                num_events=0,
+                max_brake_pressure=brake_pressure,
+                harsh_events=0,
+            )
+
+        trip.end_ts_us = ts_us
+        trip.end_odometer_km = odometer_km
+        trip.num_events += 1
+        trip.harsh_events += harsh_events
+        if brake_pressure > trip.max_brake_pressure:
+            trip.max_brake_pressure = brake_pressure
+
+        if idle:
+            if self._idle_since is None:
+                self._idle_since = ts_us
+            if ts_us - self._idle_since >= self._idle_us:
+                self._close()
+        else:
+            self._idle_since = None
+
+    def add_event(self, event: TelematicsEvent) -> None:
+        self.add(
+            event.ts_epoch_us,
+            event.speed_kmph,
+            event.odometer_km,
+            event.brake_pedal_pressure,
+            event.hard_brake_events_last_10min + event.harsh_accel_events_last_10min,
+        )
+
+    def last_trips(self, n: int = 5) -> List[TripSummary]:
+        """The last n trips, oldest first, including the one still open."""
+        trips = list(self.closed)
+        if self.current is not None:
+            trips.append(self.current)
+        return trips[-n:]
+
+
+@dataclass
+class TripTable:
+    """Columnar trip summaries, one row per trip, ordered by (segment, start)."""
+
+    segment: np.ndarray
+    start_ts_us: np.ndarray
+    end_ts_us: np.ndarray
+    start_odometer_km: np.ndarray
+    end_odometer_km: np.ndarray
+    num_events: np.ndarray
+    max_brake_pressure: np.ndarray
+    harsh_events: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.segment)
+
+    @property
+    def harsh_index(self) -> np.ndarray:
+        return self.harsh_events / self.num_events
+
+    def last_per_segment(self, n: int) -> np.ndarray:
+        """Boolean mask of the last n trips of every segment."""
+        if not len(self):
+            return np.zeros(0, dtype=bool)
+        starts = np.flatnonzero(np.r_[True, self.segment[1:] != self.segment[:-1]])
+        counts = np.diff(np.r_[starts, len(self.segment)])
+        rank = np.arange(len(self.segment)) - np.repeat(starts, counts)
+        return rank >= np.repeat(counts - n, counts)
+
+
+def _empty_table(segment: np.ndarray) -> TripTable:
+    ints, floats = np.zeros(0, dtype=np.int64), np.zeros(0)
+    return TripTable(segment[:0], ints, ints, floats, floats, ints, floats, ints)
+
+
+def segment_trips(
+    ts_us: np.ndarray,
+    speed_kmph: np.ndarray,
+    odometer_km: np.ndarray,
+    brake_pressure: np.ndarray,
+    harsh_events: np.ndarray,
+    segment: Optional[np.ndarray] = None,
+    gap_seconds: float = TRIP_GAP_SECONDS,
+    idle_speed_kmph: float = IDLE_SPEED_KMPH,
+    idle_seconds: float = IDLE_SECONDS,
+) -> TripTable:
+    """
+    TripDetector rules over columns sorted by (segment, timestamp).
+    `segment` (e.g. a vehicle index per row) keeps trips from spanning
+    two vehicles; None means a single vehicle.
+    """
+    n = len(ts_us)
+    if segment is None:
+        segment = np.zeros(n, dtype=np.int64)
+    if n == 0:
+        return _empty_table(segment)
+
+    ts_us = ts_us.astype(np.int64, copy=False)
+    idle = speed_kmph <= idle_speed_kmph
+    moving = ~idle
+
+    # Blocks: rows between segment changes / time gaps
+    new_segment = np.r_[True, segment[1:] != segment[:-1]]
+    gap = np.r_[False, np.diff(ts_us) > int(gap_seconds * _US)]
+    block_start = new_segment | gap
+    block = np.cumsum(block_start) - 1
+    moving_before = np.cumsum(moving) - moving
+    moving_before = moving_before - moving_before[np.flatnonzero(block_start)][block]
+
+    # Idle runs and the row where each run reaches idle_seconds
+    prev_idle = np.r_[False, idle[:-1]]
+    run_start = idle & (block_start | ~prev_idle)
+    run_id = np.maximum(np.cumsum(run_start) - 1, 0)
+    run_first_ts = ts_us[np.flatnonzero(run_start)] if run_start.any() else np.zeros(1, np.int64)
+    reached = idle & (ts_us - run_first_ts[run_id] >= int(idle_seconds * _US))
+    prev_reached = np.r_[False, reached[:-1]]
+    closing = reached & (run_start | ~prev_reached)
+
+    leading_idle = idle & (moving_before == 0)
+    included = moving | (idle & ~leading_idle & (closing | ~reached))
+    trip_start = moving & ((moving_before == 0) | (prev_reached & ~block_start))
+
+    rows = np.flatnonzero(included)
+    if rows.size == 0:
+        return _empty_table(segment)
+    starts = np.flatnonzero(trip_start[rows])
+    ends = np.r_[starts[1:], rows.size] - 1
+    first_rows, last_rows = rows[starts], rows[ends]
+
+    return TripTable(
+        segment=segment[first_rows],
+        start_ts_us=ts_us[first_rows],
+        end_ts_us=ts_us[last_rows],
+        start_odometer_km=odometer_km[first_rows],
+        end_odometer_km=odometer_km[last_rows],
+        num_events=np.diff(np.r_[starts, rows.size]),
+        max_brake_pressure=np.maximum.reduceat(brake_pressure[rows], starts),
+        harsh_events=np.add.reduceat(harsh_events[rows].astype(np.int64), starts),
+    )
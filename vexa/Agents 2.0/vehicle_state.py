@@ -0,0 +1,195 @@
+"""
+Bounded per-vehicle state with spill to disk.
+
+VehicleStateCache keeps the state of the most recently used vehicles
+(telematics buffer, maintenance history, derived analysis state) in memory
+up to a byte budget. Beyond it the least recently used vehicles are
+pickled to spill_dir, one file per vehicle, and read back on their next
+access, so the memory held does not grow with the number of vehicle ids
+ever seen.
+
+Interned driving-mode / DTC codes are process-local, so every cache
+spills to a private subdirectory of spill_dir, named after its process id
+and removed with the cache. Processes sharing VEHICLE_SPILL_DIR (such as
+the fleet shard workers) never read each other's files.
+"""
+
+import hashlib
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Set
+
+from maintenance_index import MaintenanceIndex
+from models import HealthSummary
+from telematics_buffer import TelematicsRingBuffer
+
+DEFAULT_MAX_BYTES = int(os.getenv("VEHICLE_MEMORY_MB", "256")) * 1024 * 1024
+DEFAULT_SPILL_DIR = os.getenv("VEHICLE_SPILL_DIR")
+
+# Rough in-memory size of one MaintenanceRecord (Pydantic object + strings)
+RECORD_BYTES = 2048
+
+
+@dataclass
+class VehicleState:
+    events: TelematicsRingBuffer
+    maintenance: MaintenanceIndex
+    # First seq not yet fed to data analysis, and the summary it last produced
+    ingest_cursor: int = 0
+    latest_summary: Optional[HealthSummary] = None
+    # Window store + health memo entry of a spilled vehicle (see
+    # DataAnalysisAgent.detach); in memory they live in the agent instead
+    analysis: Optional[Dict[str, Any]] = None
+
+    @property
+    def nbytes(self) -> int:
+        size = self.events.nbytes + RECORD_BYTES * len(self.maintenance)
+        window = self.analysis["window"] if self.analysis else None
+        if window is not None:
+            size += window.buffer.nbytes
+        return size
+
+
+class VehicleStateCache:
+    """
+    LRU of VehicleState keyed by vehicle id, holding at most max_bytes
+    (the most recently used vehicle is always kept). size_of(vehicle_id,
+    state) gives a vehicle's size (default state.nbytes). on_evict(
+    vehicle_id, state) is called just before a vehicle is spilled, so
+    state kept elsewhere can be moved into `state` and spilled with it.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        spill_dir: Optional[str] = DEFAULT_SPILL_DIR,
+        on_evict: Optional[Callable[[str, VehicleState], None]] = None,
+        size_of: Optional[Callable[[str, VehicleState], int]] = None,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self.size_of = size_of
+        if spill_dir is not None:
+            os.makedirs(spill_dir, exist_ok=True)
+        # System temp dir if spill_dir is None
+        self.spill_dir = tempfile.mkdtemp(prefix=f"vexa-vehicles-{os.getpid()}-", dir=spill_dir)
+        weakref.finalize(self, shutil.rmtree, self.spill_dir, True)
+
+        self._hot: "OrderedDict[str, VehicleState]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._spilled: Set[str] = set()
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.reloads = 0
+
+    # ------------------------------------------------------------------
+    # Mapping interface
+    # ------------------------------------------------------------------
+    def __contains__(self, vehicle_id: str) -> bool:
+        with self._lock:
+            return vehicle_id in self._hot or vehicle_id in self._spilled
+
+    def __len__(self) -> int:
+        """Vehicles known to the cache, in memory or spilled."""
+        with self._lock:
+            return len(self._hot) + len(self._spilled)
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def get(self, vehicle_id: str) -> Optional[VehicleState]:
+        """The vehicle's state (reloaded from disk if it was spilled), or None."""
+        with self._lock:
+            state = self._hot.get(vehicle_id)
+            if state is not None:
+                self.hits += 1
+                self._hot.move_to_end(vehicle_id)
+                self._account(vehicle_id, state)
+            elif vehicle_id in self._spilled:
+                state = self._reload(vehicle_id)
+                self.reloads += 1
+                self._hot[vehicle_id] = state
+                self._account(vehicle_id, state)
+            else:
+                self.misses += 1
+                return None
+            self._evict_over_budget()
+            return state
+
+    def put(self, vehicle_id: str, state: VehicleState) -> None:
+        with self._lock:
+            self._spilled.discard(vehicle_id)
+            self._hot[vehicle_id] = state
+            self._hot.move_to_end(vehicle_id)
+            self._account(vehicle_id, state)
+            self._evict_over_budget()
+
+    def discard(self, vehicle_id: str) -> None:
+        """Forget the vehicle entirely (memory and disk)."""
+        with self._lock:
+            if self._hot.pop(vehicle_id, None) is not None:
+                self._bytes -= self._sizes.pop(vehicle_id)
+            if vehicle_id in self._spilled:
+                self._spilled.discard(vehicle_id)
+                self._remove_file(vehicle_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "vehicles_in_memory": len(self._hot),
+                "vehicles_spilled": len(self._spilled),
+                "bytes_in_memory": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "reloads": self.reloads,
+                "spill_dir": self.spill_dir,
+            }
+
+    # ------------------------------------------------------------------
+    # Budget / spill
+    # ------------------------------------------------------------------
+    def _account(self, vehicle_id: str, state: VehicleState) -> None:
+        size = self.size_of(vehicle_id, state) if self.size_of else state.nbytes
+        self._bytes += size - self._sizes.get(vehicle_id, 0)
+        self._sizes[vehicle_id] = size
+
+    def _evict_over_budget(self) -> None:
+        while self._bytes > self.max_bytes and len(self._hot) > 1:
+            vehicle_id, state = self._hot.popitem(last=False)
+            self._bytes -= self._sizes.pop(vehicle_id)
+            if self.on_evict is not None:
+                self.on_evict(vehicle_id, state)
+            with open(self._path(vehicle_id), "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            self._spilled.add(vehicle_id)
+            self.evictions += 1
+
+    def _path(self, vehicle_id: str) -> str:
+        name = hashlib.sha1(vehicle_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.spill_dir, name + ".pkl")
+
+    def _reload(self, vehicle_id: str) -> VehicleState:
+        with open(self._path(vehicle_id), "rb") as f:
+            state = pickle.load(f)
+        self._spilled.discard(vehicle_id)
+        self._remove_file(vehicle_id)
+        return state
+
+    def _remove_file(self, vehicle_id: str) -> None:
+        try:
+            os.remove(self._path(vehicle_id))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,53 @@
+"""
+Change counters behind the API's ETags.
+
+VersionCounters holds one integer per key (vehicle id, aggregate name)
+that is bumped whenever data a response is built from changes. An ETag
+is the counter plus a digest of whatever else selects the response
+(e.g. the requested fields), prefixed with a per-process epoch so tags
+handed out before a restart never match.
+
+ETags are weak (W/"..."): responses with the same tag carry the same
+data, but volatile extras such as stage ages or the global UEBA log may
+differ.
+"""
+
+import hashlib
+import os
+import threading
+from typing import Dict, Iterable, Optional
+
+
+class VersionCounters:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+        self.epoch = os.urandom(4).hex()
+
+    def get(self, key: str) -> int:
+        return self._versions.get(key, 0)
+
+    def bump(self, key: str) -> int:
+        with self._lock:
+            version = self._versions.get(key, 0) + 1
+            self._versions[key] = version
+            return version
+
+    def etag(self, key: str, *selectors: object) -> str:
+        """Weak ETag of `key`'s current version, varied by `selectors`."""
+        tag = f"{self.epoch}-{self.get(key)}"
+        if selectors:
+            digest = hashlib.sha1(repr(selectors).encode("utf-8")).hexdigest()[:12]
+            tag += f"-{digest}"
+        return f'W/"{tag}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check with weak comparison (RFC 9110 13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    candidates: Iterable[str] = (t.strip() for t in if_none_match.split(","))
+    return any((t[2:] if t.startswith("W/") else t) == opaque for t in candidates)
@@ -0,0 +1,142 @@
+"""
+Sorted window index over TelematicsEvent lists.
+
+Events are kept in timestamp order and in odometer order, each with a
+parallel key list, so the 7-day / 500 km / last-N windows are found with
+bisect and returned as zero-copy views.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from typing import Iterable, Iterator, List, Union
+
+from models import TelematicsEvent
+from timestamps import US_PER_DAY
+
+
+class WindowView(Sequence):
+    """
+    Read-only [start, stop) view of a list. Slicing returns another view.
+
+    A view is only valid until the index it came from is modified.
+    """
+
+    __slots__ = ("_items", "_start", "_stop")
+
+    def __init__(self, items: List[TelematicsEvent], start: int, stop: int) -> None:
+        self._items = items
+        self._start = start
+        self._stop = stop
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __iter__(self) -> Iterator[TelematicsEvent]:
+        return map(self._items.__getitem__, range(self._start, self._stop))
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            r = range(self._start, self._stop)[index]
+            if r.step != 1:
+                return [self._items[i] for i in r]
+            return WindowView(self._items, r.start, max(r.start, r.stop))
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("window index out of range")
+        return self._items[self._start + index]
+
+
+def _sorted_parallel(keys: List, items: List[TelematicsEvent]):
+    """Stable sort of items by keys (ties keep their current order)."""
+    if all(keys[i - 1] <= keys[i] for i in range(1, len(keys))):
+        return keys, items
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    return [keys[i] for i in order], [items[i] for i in order]
+
+
+class EventWindowIndex:
+    """
+    Events of one vehicle ordered by timestamp and by odometer.
+
+    In-order events are appended in O(1); the occasional late event is
+    inserted at its place (after any equal key). Window lookups are
+    O(log n) and return WindowView objects, no sorting or copying.
+    """
+
+    def __init__(self, events: Iterable[TelematicsEvent] = ()) -> None:
+        self._by_time: List[TelematicsEvent] = []
+        self._ts: List[int] = []
+        self._by_odo: List[TelematicsEvent] = []
+        self._odo: List[float] = []
+        self.extend(events)
+
+    def __len__(self) -> int:
+        return len(self._by_time)
+
+    def add(self, event: TelematicsEvent) -> None:
+        ts = event.ts_epoch_us
+        if not self._ts or ts >= self._ts[-1]:
+            self._ts.append(ts)
+            self._by_time.append(event)
+        else:
+            i = bisect_right(self._ts, ts)
+            self._ts.insert(i, ts)
+            self._by_time.insert(i, event)
+
+        odo = event.odometer_km
+        if not self._odo or odo >= self._odo[-1]:
+            self._odo.append(odo)
+            self._by_odo.append(event)
+        else:
+            i = bisect_right(self._odo, odo)
+            self._odo.insert(i, odo)
+            self._by_odo.insert(i, event)
+
+    def extend(self, events: Iterable[TelematicsEvent]) -> None:
+        """Bulk add; a batch with late events is merged with one stable sort."""
+        batch = list(events)
+        if not batch:
+            return
+        ts, batch = _sorted_parallel([e.ts_epoch_us for e in batch], batch)
+        # Odometer order is derived from time order, as in the old per-call sorts
+        odo, batch_by_odo = _sorted_parallel([e.odometer_km for e in batch], batch)
+
+        if not self._ts or ts[0] >= self._ts[-1]:
+            self._ts.extend(ts)
+            self._by_time.extend(batch)
+        else:
+            self._ts, self._by_time = _sorted_parallel(self._ts + ts, self._by_time + batch)
+
+        if not self._odo or odo[0] >= self._odo[-1]:
+            self._odo.extend(odo)
+            self._by_odo.extend(batch_by_odo)
+        else:
+            self._odo, self._by_odo = _sorted_parallel(
+                self._odo + odo, self._by_odo + batch_by_odo
+            )
+
+    def latest(self) -> TelematicsEvent:
+        return self._by_time[-1]
+
+    def time_ordered(self) -> WindowView:
+        return WindowView(self._by_time, 0, len(self._by_time))
+
+    def by_time(self, days: float) -> WindowView:
+        """Events within `days` of the latest timestamp."""
+        if not self._ts:
+            return self.time_ordered()
+        cutoff = self._ts[-1] - int(days * US_PER_DAY)
+        return WindowView(self._by_time, bisect_left(self._ts, cutoff), len(self._ts))
+
+    def by_distance(self, km_window: float) -> WindowView:
+        """Events within `km_window` of the highest odometer, in odometer order."""
+        if not self._odo:
+            return WindowView(self._by_odo, 0, 0)
+        min_odo = max(self._odo[-1] - km_window, 0.0)
+        return WindowView(self._by_odo, bisect_left(self._odo, min_odo), len(self._odo))
+
+    def last_n(self, n: int) -> WindowView:
+        total = len(self._by_time)
+        return WindowView(self._by_time, max(total - n, 0), total)
@@ -1,47 +1,284 @@
 from collections import deque
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Deque, Dict, List, Optional, Tuple
 
 from models import TelematicsEvent
+from telematics_buffer import DRIVING_MODES, TelematicsRingBuffer
+from timestamps import US_PER_DAY
+from trips import TripDetector
 
 
-def parse_ts(ts: str) -> datetime:
-    return datetime.fromisoformat(ts)
+class RollingStats:
+    """
+    Running aggregates over a FIFO window [start_seq, end_seq) of a
+    TelematicsRingBuffer.
+
+    Sums and counts are updated on push / pop, maxima are tracked with
+    monotonic deques, so snapshot() is O(1) regardless of window size.
+    The snapshot has the same keys as feature_engineering's
+    _aggregate_basic_stats().
+    """
+
+    def __init__(self, buffer: TelematicsRingBuffer) -> None:
+        self.buffer = buffer
+        self.start_seq = buffer.end_seq
+        self.end_seq = buffer.end_seq
+
+        self.sum_speed = 0.0
+        self.sum_brake_pressure = 0.0
+        self.sum_coolant = 0.0
+        self.sum_oil = 0.0
+        self.sum_rpm = 0.0
+        self.sum_battery_voltage = 0.0
+
+        self.hard_brakes = 0
+        self.harsh_accel = 0
+        self.dtc_count = 0
+        self.city_events = 0
+        self.overheat_events = 0
+        self.low_pressure_events = 0
+
+        # (seq, value) pairs with strictly decreasing values
+        self._max_brake: Deque[Tuple[int, float]] = deque()
+        self._max_coolant: Deque[Tuple[int, float]] = deque()
+        self._max_rpm: Deque[Tuple[int, float]] = deque()
+
+    def __len__(self) -> int:
+        return self.end_seq - self.start_seq
+
+    @staticmethod
+    def _push_max(dq: Deque[Tuple[int, float]], seq: int, value: float) -> None:
+        while dq and dq[-1][1] <= value:
+            dq.pop()
+        dq.append((seq, value))
+
+    def _apply(self, seq: int, sign: int) -> Tuple[float, float, int]:
+        v = self.buffer.value
+        brake = v("brake_pedal_pressure", seq)
+        coolant = v("engine_coolant_temp_c", seq)
+        rpm = v("engine_rpm", seq)
+
+        self.sum_speed += sign * v("speed_kmph", seq)
+        self.sum_brake_pressure += sign * brake
+        self.sum_coolant += sign * coolant
+        self.sum_oil += sign * v("engine_oil_temp_c", seq)
+        self.sum_rpm += sign * rpm
+        self.sum_battery_voltage += sign * v("battery_voltage_v", seq)
+
+        self.hard_brakes += sign * v("hard_brake_events_last_10min", seq)
+        self.harsh_accel += sign * v("harsh_accel_events_last_10min", seq)
+        self.dtc_count += sign * v("dtc_count", seq)
+        if v("driving_mode", seq) == DRIVING_MODES.code("city"):
+            self.city_events += sign
+        if coolant > 105:
+            self.overheat_events += sign
+        if (
+            v("tire_pressure_fl_psi", seq) < 30
+            or v("tire_pressure_fr_psi", seq) < 30
+            or v("tire_pressure_rl_psi", seq) < 30
+            or v("tire_pressure_rr_psi", seq) < 30
+        ):
+            self.low_pressure_events += sign
+        return brake, coolant, rpm
+
+    def push(self) -> None:
+        """Extend the window by the next buffer row."""
+        seq = self.end_seq
+        brake, coolant, rpm = self._apply(seq, 1)
+        self.end_seq += 1
+        self._push_max(self._max_brake, seq, brake)
+        self._push_max(self._max_coolant, seq, coolant)
+        self._push_max(self._max_rpm, seq, rpm)
+
+    def pop(self) -> None:
+        """Drop the oldest row from the window (it must still be in the buffer)."""
+        seq = self.start_seq
+        self._apply(seq, -1)
+        self.start_seq += 1
+        for dq in (self._max_brake, self._max_coolant, self._max_rpm):
+            if dq and dq[0][0] == seq:
+                dq.popleft()
+
+    def snapshot(self) -> Dict[str, float]:
+        n = len(self)
+        if n == 0:
+            return {}
+
+        odo = self.buffer.value
+        km_covered = max(
+            odo("odometer_km", self.end_seq - 1) - odo("odometer_km", self.start_seq), 1.0
+        )
+
+        return {
+            "avg_speed_kmph": self.sum_speed / n,
+            "avg_brake_pressure": self.sum_brake_pressure / n,
+            "avg_coolant_temp_c": self.sum_coolant / n,
+            "avg_oil_temp_c": self.sum_oil / n,
+            "avg_rpm": self.sum_rpm / n,
+            "avg_battery_voltage_v": self.sum_battery_voltage / n,
+            "max_brake_pressure": self._max_brake[0][1],
+            "max_coolant_temp_c": self._max_coolant[0][1],
+            "max_rpm": float(self._max_rpm[0][1]),
+            "hard_brakes_per_100km": (self.hard_brakes / km_covered) * 100.0,
+            "city_ratio": self.city_events / n,
+            "overheat_events": float(self.overheat_events),
+            "low_tire_pressure_ratio": self.low_pressure_events / n,
+            "harsh_accel_braking_index": (self.hard_brakes + self.harsh_accel) / n,
+            "dtc_count": float(self.dtc_count),
+        }
+
+
+# Rows add_from_buffer copies at a time into a bounded store
+INGEST_CHUNK_ROWS = 64
 
 
 class VehicleWindowStore:
-    """Rolling buffer of events for a vehicle (last N days)."""
+    """
+    Rolling buffer of events for a vehicle (last N days).
+
+    Events are held in a columnar TelematicsRingBuffer that is trimmed to
+    the time window. With max_events set the time window is also capped
+    at the newest max_events rows and the buffer is fixed-size; without
+    it the buffer grows with the events in max_days. Alongside it the
+    store keeps incremental aggregates for the 7-day, 500 km and
+    last-N-events windows, and a TripDetector.
+    The window aggregates are only valid while events arrive in timestamp
+    and odometer order; is_ordered() reports whether the current window
+    can be read from the aggregates.
+    """
 
-    def __init__(self, max_days: int = 7):
+    def __init__(
+        self,
+        max_days: int = 7,
+        max_km: float = 500.0,
+        last_n: int = 50,
+        max_events: Optional[int] = None,
+    ):
         self.max_days = max_days
-        self.events: deque[TelematicsEvent] = deque()
+        self.max_km = max_km
+        self.last_n = last_n
+        self.max_events = max_events
+
+        # Room for one ingest chunk on top of the window, so rows are
+        # popped from the stats before the buffer could evict them
+        self.buffer = TelematicsRingBuffer(
+            capacity=max_events + INGEST_CHUNK_ROWS if max_events else None
+        )
+        self.time_stats = RollingStats(self.buffer)
+        self.distance_stats = RollingStats(self.buffer)
+        self.recent_stats = RollingStats(self.buffer)
+        self.trips = TripDetector()
+
+        # Adjacent pairs in the window whose timestamp or odometer goes backwards
+        self._inversions = 0
+
+    def __len__(self) -> int:
+        return len(self.buffer)
+
+    def _is_inversion(self, prev_seq: int, next_seq: int) -> bool:
+        v = self.buffer.value
+        return (
+            v("ts_us", next_seq) < v("ts_us", prev_seq)
+            or v("odometer_km", next_seq) < v("odometer_km", prev_seq)
+        )
+
+    def _on_appended(self, seq: int) -> None:
+        buf = self.buffer
+        if seq > buf.start_seq and self._is_inversion(seq - 1, seq):
+            self._inversions += 1
+
+        self.time_stats.push()
+        self.distance_stats.push()
+        self.recent_stats.push()
+
+        v = buf.value
+        self.trips.add(
+            v("ts_us", seq),
+            v("speed_kmph", seq),
+            v("odometer_km", seq),
+            v("brake_pedal_pressure", seq),
+            v("hard_brake_events_last_10min", seq) + v("harsh_accel_events_last_10min", seq),
+        )
+
+        cutoff = buf.value("ts_us", seq) - self.max_days * US_PER_DAY
+        max_rows = self.max_events or len(self.time_stats)
+        while len(self.time_stats) and (
+            len(self.time_stats) > max_rows
+            or buf.value("ts_us", self.time_stats.start_seq) < cutoff
+        ):
+            dropped = self.time_stats.start_seq
+            self.time_stats.pop()
+            if len(self.time_stats) and self._is_inversion(dropped, dropped + 1):
+                self._inversions -= 1
+
+        # Distance / count windows are suffixes of the time window.
+        min_odo = max(buf.value("odometer_km", seq) - self.max_km, 0.0)
+        while len(self.distance_stats) and (
+            self.distance_stats.start_seq < self.time_stats.start_seq
+            or buf.value("odometer_km", self.distance_stats.start_seq) < min_odo
+        ):
+            self.distance_stats.pop()
+
+        while len(self.recent_stats) > min(self.last_n, len(self.time_stats)):
+            self.recent_stats.pop()
+
+        buf.popleft(self.time_stats.start_seq - buf.start_seq)
 
     def add_event(self, event: TelematicsEvent) -> None:
-        self.events.append(event)
-        latest_ts = parse_ts(event.timestamp)
-        cutoff = latest_ts - timedelta(days=self.max_days)
+        self._on_appended(self.buffer.append(event))
 
-        while self.events and parse_ts(self.events[0].timestamp) < cutoff:
-            self.events.popleft()
+    def add_from_buffer(self, source: TelematicsRingBuffer, since_seq: int = 0) -> int:
+        """Ingest rows of another buffer with seq >= since_seq without materialising events."""
+        since_seq = max(since_seq, source.start_seq)
+        chunk = INGEST_CHUNK_ROWS if self.max_events else None
+        total = 0
+        while True:
+            first = self.buffer.end_seq
+            count = self.buffer.extend_from(source, since_seq + total, chunk)
+            for seq in range(first, first + count):
+                self._on_appended(seq)
+            total += count
+            if not count or chunk is None:
+                return total
+
+    def is_ordered(self) -> bool:
+        return self._inversions == 0
 
     def get_events(self) -> List[TelematicsEvent]:
-        return list(self.events)
+        return self.buffer.to_events()
 
 
 class TelematicsWindowManager:
     """Manages a rolling window store for each vehicle."""
 
-    def __init__(self, max_days: int = 7):
+    def __init__(self, max_days: int = 7, max_events: Optional[int] = None):
         self.max_days = max_days
+        self.max_events = max_events
         self._stores: Dict[str, VehicleWindowStore] = {}
 
+    def _store_for(self, vehicle_id: str) -> VehicleWindowStore:
+        if vehicle_id not in self._stores:
+            self._stores[vehicle_id] = VehicleWindowStore(
+                max_days=self.max_days, max_events=self.max_events
+            )
+        return self._stores[vehicle_id]
+
     def add_event(self, event: TelematicsEvent) -> VehicleWindowStore:
-        vid = event.vehicle_id
-        if vid not in self._stores:
-            self._stores[vid] = VehicleWindowStore(max_days=self.max_days)
-        store = self._stores[vid]
+        store = self._store_for(event.vehicle_id)
         store.add_event(event)
         return store
 
+    def add_from_buffer(
+        self, source: TelematicsRingBuffer, since_seq: int = 0
+    ) -> VehicleWindowStore:
+        store = self._store_for(source.vehicle_id)
+        store.add_from_buffer(source, since_seq)
+        return store
+
     def get_store(self, vehicle_id: str) -> Optional[VehicleWindowStore]:
         return self._stores.get(vehicle_id)
+
+    def pop(self, vehicle_id: str) -> Optional[VehicleWindowStore]:
+        return self._stores.pop(vehicle_id, None)
+
+    def put(self, vehicle_id: str, store: VehicleWindowStore) -> None:
+        self._stores[vehicle_id] = store
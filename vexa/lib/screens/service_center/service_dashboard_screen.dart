@@ -26,6 +26,7 @@ class _ServiceDashboardScreenState extends State<ServiceDashboardScreen> {
       final data = await _agentService.fetchVehicleData(
         'VH-1001',
         simulate: false,
+        fields: ['vehicle_id', 'urgency', 'booking_info', 'health_summary'],
       );
       setState(() {
         _vehicleData = data;
@@ -1,4 +1,5 @@
 import 'dart:async';
+import 'package:flutter/foundation.dart';
 import 'package:flutter/material.dart';
 import 'package:vexa/services/agent_service.dart';
 import 'package:vexa/theme/app_theme.dart';
@@ -16,16 +17,20 @@ class _LiveSensorScreenState extends State<LiveSensorScreen> {
   bool _isLoading = true;
   Map<String, dynamic>? _vehicleData;
   Timer? _timer;
+  StreamSubscription<Map<String, dynamic>>? _liveSubscription;
   String? _error;
 
   @override
   void initState() {
     super.initState();
-    _fetchData();
-    // Poll every 5 seconds for live data
-    _timer = Timer.periodic(const Duration(seconds: 5), (timer) {
-      if (mounted) {
-        _fetchData(silent: true);
+    // Latest telematics for the first render, then live frames
+    _fetchData().then((_) {
+      if (!mounted) return;
+      // Browsers buffer streamed responses in package:http, so web polls
+      if (kIsWeb) {
+        _startPolling();
+      } else {
+        _startLiveStream();
       }
     });
   }
@@ -33,13 +38,48 @@ class _LiveSensorScreenState extends State<LiveSensorScreen> {
   @override
   void dispose() {
     _timer?.cancel();
+    _liveSubscription?.cancel();
     super.dispose();
   }
 
+  void _startLiveStream() {
+    _liveSubscription = _agentService
+        .streamLiveTelematics('VH-1001')
+        .listen(
+          (frame) {
+            if (!mounted || frame['_event'] == 'error') return;
+            setState(() {
+              _vehicleData = {
+                ...?_vehicleData,
+                'latest_telematics': frame['latest_telematics'],
+                'urgency': frame['urgency'],
+              };
+            });
+          },
+          // Server without the live endpoint or connection lost: poll instead
+          onError: (_) => _startPolling(),
+          onDone: _startPolling,
+          cancelOnError: true,
+        );
+  }
+
+  void _startPolling() {
+    if (!mounted || _timer != null) return;
+    // Poll every 5 seconds for live data
+    _timer = Timer.periodic(const Duration(seconds: 5), (timer) {
+      if (mounted) {
+        _fetchData(silent: true);
+      }
+    });
+  }
+
   Future<void> _fetchData({bool silent = false}) async {
     try {
       // Hardcoded vehicle ID for demo
-      final data = await _agentService.fetchVehicleData('VH-1001');
+      final data = await _agentService.fetchVehicleData(
+        'VH-1001',
+        fields: ['vehicle_id', 'latest_telematics', 'urgency'],
+      );
       if (mounted) {
         setState(() {
           _vehicleData = data;
@@ -8,6 +8,34 @@ class AgentService {
       ? 'http://localhost:8000'
       : 'http://10.0.2.2:8000';
 
+  // Last ETag and decoded body per URL, for conditional polling
+  final Map<String, String> _etags = {};
+  final Map<String, Map<String, dynamic>> _cachedBodies = {};
+
+  /// GET that sends the URL's last ETag as If-None-Match; on 304 the
+  /// cached body is returned. The body is null for any other status.
+  Future<(int, Map<String, dynamic>?)> _getJson(Uri uri) async {
+    final key = uri.toString();
+    final etag = _etags[key];
+    final response = await http.get(
+      uri,
+      headers: etag == null ? null : {'If-None-Match': etag},
+    );
+    if (response.statusCode == 304 && _cachedBodies.containsKey(key)) {
+      return (200, _cachedBodies[key]);
+    }
+    if (response.statusCode != 200) {
+      return (response.statusCode, null);
+    }
+    final body = json.decode(response.body) as Map<String, dynamic>;
+    final newEtag = response.headers['etag'];
+    if (newEtag != null) {
+      _etags[key] = newEtag;
+      _cachedBodies[key] = body;
+    }
+    return (200, body);
+  }
+
   Future<Map<String, dynamic>> login(String username, String password) async {
     try {
       final response = await http.post(
@@ -29,25 +57,74 @@ class AgentService {
     }
   }
 
+  /// `fields` limits the response to those keys; the backend then runs
+  /// only the stages they need (e.g. no LLM call for telematics alone).
+  /// With simulate=false an unchanged vehicle is answered with 304.
   Future<Map<String, dynamic>> fetchVehicleData(
     String vehicleId, {
     bool simulate = true,
+    List<String>? fields,
   }) async {
     try {
-      final response = await http.get(
-        Uri.parse('$baseUrl/vehicle/$vehicleId/full_data?simulate=$simulate'),
+      final query = fields == null ? '' : '&fields=${fields.join(',')}';
+      final (status, body) = await _getJson(
+        Uri.parse(
+          '$baseUrl/vehicle/$vehicleId/full_data?simulate=$simulate$query',
+        ),
       );
 
-      if (response.statusCode == 200) {
-        return json.decode(response.body);
+      if (body != null) {
+        return body;
       } else {
-        throw Exception('Failed to load vehicle data: ${response.statusCode}');
+        throw Exception('Failed to load vehicle data: $status');
       }
     } catch (e) {
       throw Exception('Failed to connect to agent backend: $e');
     }
   }
 
+  /// Live telematics over Server-Sent Events (GET /vehicle/{id}/live).
+  /// Yields each event's JSON data with the event type under '_event'
+  /// ('snapshot', 'frame' or 'error').
+  Stream<Map<String, dynamic>> streamLiveTelematics(String vehicleId) async* {
+    final client = http.Client();
+    try {
+      final request = http.Request(
+        'GET',
+        Uri.parse('$baseUrl/vehicle/$vehicleId/live'),
+      );
+      request.headers['Accept'] = 'text/event-stream';
+      final response = await client.send(request);
+      if (response.statusCode != 200) {
+        throw Exception('Failed to open live stream: ${response.statusCode}');
+      }
+
+      var event = 'message';
+      final data = StringBuffer();
+      final lines = response.stream
+          .transform(utf8.decoder)
+          .transform(const LineSplitter());
+      await for (final line in lines) {
+        if (line.isEmpty) {
+          // Blank line ends an event; keepalive comments carry no data
+          if (data.isNotEmpty) {
+            final payload = json.decode(data.toString()) as Map<String, dynamic>;
+            payload['_event'] = event;
+            yield payload;
+          }
+          event = 'message';
+          data.clear();
+        } else if (line.startsWith('event:')) {
+          event = line.substring(6).trim();
+        } else if (line.startsWith('data:')) {
+          data.write(line.substring(5).trim());
+        }
+      }
+    } finally {
+      client.close();
+    }
+  }
+
   Future<void> confirmBooking(
     String vehicleId,
     Map<String, dynamic> bookingData,
@@ -101,11 +178,11 @@ class AgentService {
 
   Future<Map<String, dynamic>> fetchManufacturingInsights() async {
     try {
-      final response = await http.get(
+      final (_, body) = await _getJson(
         Uri.parse('$baseUrl/manufacturing/insights'),
       );
-      if (response.statusCode == 200) {
-        return json.decode(response.body);
+      if (body != null) {
+        return body;
       } else {
         throw Exception('Failed to load manufacturing insights');
       }